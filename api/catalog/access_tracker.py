@@ -0,0 +1,108 @@
+"""
+Batched last-access tracking for catalog bundles and their extracted trees.
+
+Executions record accesses in memory; they are written out (``StorageObject.last_accessed_at``
+when the DB is enabled, plus the mtime of each extracted tree's marker file) once enough
+accesses are pending or the flush interval has passed, so hot items cost no per-run I/O.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from .settings import catalog_settings
+from .storage import normalize_uri
+
+EXTRACTED_MARKER = ".extracted"
+
+FlushFunc = Callable[[Dict[str, datetime], Dict[str, float]], None]
+
+
+def _flush_accesses(bundles: Dict[str, datetime], markers: Dict[str, float]) -> None:
+    bundles = dict(bundles)
+    for marker, ts in markers.items():
+        try:
+            os.utime(marker, (ts, ts))
+            # Runs served from an extracted tree count as accesses of its bundle
+            with open(marker) as f:
+                uri = json.load(f).get("storage_uri")
+        except (OSError, ValueError):
+            continue  # tree was removed since it was accessed
+        if uri:
+            uri = normalize_uri(uri)
+            accessed = datetime.utcfromtimestamp(ts)
+            bundles[uri] = max(bundles.get(uri, accessed), accessed)
+    if not bundles:
+        return
+    from api.common.db import SessionLocal
+    from .repository import CatalogRepo
+
+    with SessionLocal() as db_session:
+        repo = CatalogRepo(db=db_session)
+        if repo.db_enabled:
+            repo.touch_storage_objects(bundles)
+
+
+class AccessTracker:
+    def __init__(
+        self,
+        *,
+        batch_size: Optional[int] = None,
+        interval: Optional[float] = None,
+        flush_func: Optional[FlushFunc] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.batch_size = batch_size or catalog_settings.CATALOG_ACCESS_FLUSH_BATCH
+        self.interval = interval if interval is not None else catalog_settings.CATALOG_ACCESS_FLUSH_SECONDS
+        self._flush_func = flush_func or _flush_accesses
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bundles: Dict[str, datetime] = {}
+        self._markers: Dict[str, float] = {}
+        self._last_flush = clock()
+
+    def record(self, storage_uri: Optional[str] = None, extracted_path: Optional[str] = None) -> None:
+        """Note an access to a bundle and/or an extracted tree; flushes when a batch is due."""
+        with self._lock:
+            if storage_uri:
+                self._bundles[normalize_uri(storage_uri)] = datetime.utcnow()
+            if extracted_path:
+                self._markers[os.path.join(extracted_path, EXTRACTED_MARKER)] = time.time()
+            due = (
+                len(self._bundles) + len(self._markers) >= self.batch_size
+                or self._clock() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write out pending accesses; returns how many were flushed."""
+        with self._lock:
+            bundles, self._bundles = self._bundles, {}
+            markers, self._markers = self._markers, {}
+            self._last_flush = self._clock()
+        if not bundles and not markers:
+            return 0
+        try:
+            self._flush_func(bundles, markers)
+        except Exception as e:
+            # Access times only steer GC; never fail an execution over them
+            print(f"⚠️ Failed to flush catalog access times: {e}")
+        return len(bundles) + len(markers)
+
+
+access_tracker = AccessTracker()
+atexit.register(access_tracker.flush)
+
+
+def record_access(storage_uri: Optional[str] = None, extracted_path: Optional[str] = None) -> None:
+    access_tracker.record(storage_uri, extracted_path)
+
+
+__all__ = ["AccessTracker", "EXTRACTED_MARKER", "access_tracker", "record_access"]
@@ -1,80 +1,77 @@
-import os, tempfile, tarfile, json, yaml
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from .descriptor_utils import atomic_write, load_descriptor_from_temp
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from redis.asyncio import Redis
+from ..deps import get_redis
+from ..task_queue import enqueue_job
+from .bundle_sync import BUNDLES_DIR, sync_bundle_directory
+from .bundles import load_descriptor_from_bundle, store_bundle
+from .descriptor_utils import atomic_write
+from .events import publish_version_available
 from .registry import upsert_version
+from .storage import get_blob_storage
 
 router = APIRouter(prefix="/catalog/bundle", tags=["catalog-bundle"])
-BUNDLES_DIR = "/app/data/bundles"
 
 @router.post("/import")
-async def import_bundle(file: UploadFile = File(...)):
+async def import_bundle(file: UploadFile = File(...), redis_client: Redis = Depends(get_redis)):
     """Import catalog item from uploaded .tar.gz bundle"""
     if not file.filename or not file.filename.endswith((".tar.gz", ".tgz")):
         raise HTTPException(400, "expected .tar.gz file")
     
     data = await file.read()
-    with tempfile.TemporaryDirectory() as td:
-        tmp_tar = os.path.join(td, "bundle.tgz")
-        atomic_write(tmp_tar, data)
-        
-        with tarfile.open(tmp_tar, "r:gz") as tar:
-            tar.extractall(td)
-        
-        manifest, schema, ui = load_descriptor_from_temp(td)
-        item_id = manifest["id"]
-        version = manifest["version"]
-        
-        # Save bundle to storage
-        os.makedirs(BUNDLES_DIR, exist_ok=True)
-        bundle_path = os.path.join(BUNDLES_DIR, f"{item_id}@{version}.tar.gz")
-        atomic_write(bundle_path, data)
-        
-        # Update registry
-        upsert_version(item_id, version, manifest, schema, ui, bundle_path,
-                       source={"source": "bundle-upload", "filename": file.filename})
-        
-        return {"item_id": item_id, "version": version, "bundle_path": bundle_path}
-
-@router.post("/sync")
-async def sync_existing_bundles():
-    """Sync existing bundle files from the bundles directory to the registry"""
-    if not os.path.exists(BUNDLES_DIR):
-        return {"synced": 0, "message": "No bundles directory found"}
+    try:
+        manifest, schema, ui, additional_schemas = await asyncio.to_thread(load_descriptor_from_bundle, data)
+    except Exception as e:
+        raise HTTPException(400, f"invalid bundle: {e}")
+    item_id = manifest.get("id") or manifest.get("name")
+    if not item_id:
+        raise HTTPException(400, "invalid bundle: manifest missing required field: id or name")
+    version = manifest["version"]
     
-    synced_count = 0
-    results = []
+    # Save bundle (and its member index) to storage
+    storage = get_blob_storage("bundles", BUNDLES_DIR, write_func=atomic_write)
+    bundle_path = await asyncio.to_thread(store_bundle, storage, f"{item_id}@{version}.tar.gz", data)
     
-    for filename in os.listdir(BUNDLES_DIR):
-        if not filename.endswith((".tar.gz", ".tgz")):
-            continue
-            
-        bundle_path = os.path.join(BUNDLES_DIR, filename)
-        
-        try:
-            with tempfile.TemporaryDirectory() as td:
-                # Extract bundle
-                with tarfile.open(bundle_path, "r:gz") as tar:
-                    tar.extractall(td)
-                
-                # Load descriptors
-                manifest, schema, ui = load_descriptor_from_temp(td)
-                item_id = manifest.get("id") or manifest.get("name")
-                if not item_id:
-                    raise ValueError("manifest missing required field: id or name")
-                version = manifest["version"]
-                
-                # Update registry
-                upsert_version(item_id, version, manifest, schema, ui, bundle_path,
-                               source={"source": "bundle-sync", "filename": filename})
-                
-                synced_count += 1
-                results.append({"item_id": item_id, "version": version, "filename": filename, "status": "synced"})
-                
-        except Exception as e:
-            results.append({"filename": filename, "status": "error", "error": str(e)})
+    # Update registry; the digest comes from the bytes in hand rather than a re-download
+    await asyncio.to_thread(upsert_version, item_id, version, manifest, schema, ui, bundle_path,
+                            source={"source": "bundle-upload", "filename": file.filename},
+                            additional_schemas=additional_schemas,
+                            sha256=hashlib.sha256(data).hexdigest(), size=len(data))
+    await publish_version_available(redis_client, item_id, version, storage_uri=bundle_path,
+                                    source="bundle-upload")
     
-    return {
-        "synced": synced_count,
-        "total_files": len([f for f in os.listdir(BUNDLES_DIR) if f.endswith((".tar.gz", ".tgz"))]),
-        "results": results
-    }
+    return {"item_id": item_id, "version": version, "bundle_path": bundle_path}
+
+@router.post("/sync")
+async def sync_existing_bundles(redis_client: Redis = Depends(get_redis)):
+    """Sync existing bundle files from the bundles directory to the registry.
+
+    Runs serially in the API process; ``/sync/async`` parses bundles in a worker process pool.
+    """
+    report = await asyncio.to_thread(sync_bundle_directory, BUNDLES_DIR, max_workers=1)
+    for result in report["results"]:
+        if result["status"] == "synced":
+            await publish_version_available(redis_client, result["item_id"], result["version"],
+                                            source="bundle-sync")
+    return report
+
+@router.post("/sync/async")
+async def sync_existing_bundles_async():
+    """Queue a worker job that syncs the bundles directory to the registry"""
+    job_id = str(uuid.uuid4())
+    try:
+        await enqueue_job(
+            "sync_catalog_bundles_task",
+            job_id,
+            payload={
+                "bundles_dir": BUNDLES_DIR,
+                "trigger": "manual",
+                "requested_at": datetime.utcnow().isoformat(),
+            },
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Failed to queue bundle sync job: {e}")
+    return {"success": True, "job_id": job_id, "message": "Bundle sync job queued"}
@@ -0,0 +1,174 @@
+"""Change-detecting, parallel sync of the bundles directory into the registry."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .bundles import BUNDLE_SUFFIXES, load_bundle_index, load_descriptor_from_bundle, write_bundle_index
+from .descriptor_utils import atomic_write
+from .registry import _load, upsert_versions
+from .settings import catalog_settings
+from .storage import BlobStorage, LocalBlobStorage, get_blob_storage, normalize_uri, storage_for_uri
+
+BUNDLES_DIR = "/app/data/bundles"
+
+
+def scan_bundles(storage: BlobStorage) -> List[Dict[str, Any]]:
+    """Stat every bundle in ``storage`` with a single listing (one scandir or LIST pass)."""
+    found = [
+        {"filename": blob["key"], "uri": blob["uri"], "size": blob["size"], "mtime_ns": blob["mtime_ns"]}
+        for blob in storage.list(BUNDLE_SUFFIXES)
+    ]
+    return sorted(found, key=lambda b: b["filename"])
+
+
+def _known_bundle_stats() -> Dict[str, Dict[str, Any]]:
+    """Registry versions keyed by bundle storage URI, with the stat recorded at their last sync."""
+    known = {}
+    for item_id, item in _load().get("items", {}).items():
+        for version, record in item.get("versions", {}).items():
+            stat = record.get("bundle_stat")
+            if stat and record.get("storage_uri"):
+                known[normalize_uri(record["storage_uri"])] = {"item_id": item_id, "version": version, **stat}
+    return known
+
+
+def _inspect_bundle(uri: str, known_sha256: Optional[str]) -> Dict[str, Any]:
+    """Digest a bundle and parse its descriptors if the content changed. Runs in a pool process."""
+    try:
+        storage = storage_for_uri(uri, write_func=atomic_write)
+        sha256 = storage.sha256(uri)
+        if known_sha256 and sha256 == known_sha256:
+            return {"status": "unchanged", "sha256": sha256}
+
+        if load_bundle_index(uri, storage) is None:
+            write_bundle_index(uri, storage=storage)
+        manifest, schema, ui, additional_schemas = load_descriptor_from_bundle(uri)
+        return {
+            "status": "parsed",
+            "sha256": sha256,
+            "item_id": manifest.get("id") or manifest.get("name"),
+            "version": manifest["version"],
+            "manifest": manifest,
+            "schema": schema,
+            "ui": ui,
+            "additional_schemas": additional_schemas,
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def _default_executor(max_workers: int) -> Optional[Executor]:
+    # Celery prefork children are daemonic and may not spawn pool processes; parse serially there
+    if max_workers <= 1 or multiprocessing.current_process().daemon:
+        return None
+    # Spawn rather than fork: the parent may hold threads, locks and open Redis connections
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def sync_bundle_directory(
+    bundles_dir: str = BUNDLES_DIR,
+    *,
+    storage: Optional[BlobStorage] = None,
+    max_workers: Optional[int] = None,
+    executor_factory: Optional[Callable[[int], Optional[Executor]]] = None,
+) -> Dict[str, Any]:
+    """
+    Sync bundle files into the registry, skipping bundles whose size/mtime or digest
+    already match what the registry recorded. Changed bundles are parsed in a process
+    pool and all upserts are applied with one registry write.
+
+    ``storage`` defaults to the configured backend's bundles area rooted at ``bundles_dir``.
+    """
+    report: Dict[str, Any] = {
+        "sync_timestamp": datetime.utcnow().isoformat(),
+        "synced": 0,
+        "unchanged": 0,
+        "errors": 0,
+        "total_files": 0,
+        "results": [],
+    }
+    storage = storage or get_blob_storage("bundles", bundles_dir)
+    if isinstance(storage, LocalBlobStorage) and not os.path.isdir(storage.root):
+        report["message"] = "No bundles directory found"
+        return report
+
+    bundles = scan_bundles(storage)
+    report["total_files"] = len(bundles)
+    known = _known_bundle_stats()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    candidates = []
+    for bundle in bundles:
+        stat = known.get(normalize_uri(bundle["uri"]))
+        if stat and stat.get("size") == bundle["size"] and stat.get("mtime_ns") == bundle["mtime_ns"]:
+            results[bundle["filename"]] = {
+                "filename": bundle["filename"],
+                "item_id": stat["item_id"],
+                "version": stat["version"],
+                "status": "unchanged",
+            }
+        else:
+            candidates.append((bundle, stat))
+
+    max_workers = max_workers or catalog_settings.CATALOG_BUNDLE_SYNC_WORKERS
+    executor = None
+    if len(candidates) > 1:
+        executor = (executor_factory or _default_executor)(min(max_workers, len(candidates)))
+    uris = [b["uri"] for b, _ in candidates]
+    shas = [stat.get("sha256") if stat else None for _, stat in candidates]
+    if executor is None:
+        inspected = list(map(_inspect_bundle, uris, shas))
+    else:
+        with executor:
+            inspected = list(executor.map(_inspect_bundle, uris, shas))
+
+    entries = []
+    stat_updates = []
+    for (bundle, stat), outcome in zip(candidates, inspected):
+        filename = bundle["filename"]
+        bundle_stat = {"size": bundle["size"], "mtime_ns": bundle["mtime_ns"], "sha256": outcome.get("sha256")}
+        if outcome["status"] == "error":
+            results[filename] = {"filename": filename, "status": "error", "error": outcome["error"]}
+        elif outcome["status"] == "unchanged":
+            stat_updates.append({"item_id": stat["item_id"], "version": stat["version"], "bundle_stat": bundle_stat})
+            results[filename] = {
+                "filename": filename,
+                "item_id": stat["item_id"],
+                "version": stat["version"],
+                "status": "unchanged",
+            }
+        else:
+            entries.append({
+                "item_id": outcome["item_id"],
+                "version": outcome["version"],
+                "manifest": outcome["manifest"],
+                "schema": outcome["schema"],
+                "ui": outcome["ui"],
+                "additional_schemas": outcome["additional_schemas"],
+                "storage_uri": bundle["uri"],
+                "source": {"source": "bundle-sync", "filename": filename},
+                "bundle_stat": bundle_stat,
+            })
+            results[filename] = {
+                "filename": filename,
+                "item_id": outcome["item_id"],
+                "version": outcome["version"],
+                "status": "synced",
+            }
+
+    upsert_versions(entries, stat_updates=stat_updates)
+
+    counters = {"synced": "synced", "unchanged": "unchanged", "error": "errors"}
+    for bundle in bundles:
+        result = results[bundle["filename"]]
+        report[counters[result["status"]]] += 1
+        report["results"].append(result)
+    return report
+
+
+__all__ = ["BUNDLES_DIR", "scan_bundles", "sync_bundle_directory"]
@@ -1,11 +1,41 @@
-import io, os, tarfile, json, yaml
-from typing import Tuple, Optional
+import io, os, tarfile, json, yaml, zlib
+from typing import Tuple, Optional, Union, Callable, Dict, Any
+from .access_tracker import record_access
 from .settings import catalog_settings
+from .storage import BlobStorage, LocalBlobStorage, get_blob_storage, storage_for_uri
+
+DESCRIPTOR_FILES = ("manifest.yaml", "schema.json", "ui.json")
+BUNDLE_SUFFIXES = (".tar.gz", ".tgz")
+INDEX_SUFFIX = ".index.json"
+INDEX_CHUNK = 4096
+
+def _member_name(name: str) -> str:
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+def _descriptor_names(path: str) -> list:
+    """Descriptor files (plus x-schema-map targets) present in a source dir, in pack order."""
+    names = [n for n in DESCRIPTOR_FILES if os.path.isfile(os.path.join(path, n))]
+    try:
+        with open(os.path.join(path, "schema.json")) as f:
+            schema_map = json.load(f).get("x-schema-map", {})
+    except (OSError, ValueError, AttributeError):
+        schema_map = {}
+    for mapped in schema_map.values():
+        if mapped not in names and os.path.isfile(os.path.join(path, mapped)):
+            names.append(mapped)
+    return names
 
 def pack_dir(path: str) -> bytes:
+    # Descriptors are written first so readers only decompress the head of the stream
+    first = _descriptor_names(path)
+    skip = {f"./{n}" for n in first}
     bio = io.BytesIO()
     with tarfile.open(fileobj=bio, mode="w:gz") as tar:
-        tar.add(path, arcname=".")
+        for name in first:
+            tar.add(os.path.join(path, name), arcname=f"./{name}")
+        tar.add(path, arcname=".", filter=lambda ti: None if ti.name in skip else ti)
     bio.seek(0); return bio.read()
 
 def unpack_to_temp(data: bytes, tempdir: str):
@@ -13,6 +43,195 @@ def unpack_to_temp(data: bytes, tempdir: str):
     with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
         tar.extractall(tempdir)
 
+def build_bundle_index(data: bytes) -> dict:
+    """
+    Map each regular file in a bundle to its offset/size in the decompressed tar stream,
+    plus ``compressed_end``: how many leading compressed bytes must be fetched (ranged
+    read) and inflated to reach the end of that member.
+    """
+    members = {}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        for m in tar:
+            if m.isfile():
+                members[_member_name(m.name)] = {"offset": m.offset_data, "size": m.size}
+
+    pending = sorted(members.values(), key=lambda e: e["offset"] + e["size"])
+    inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    produced = 0
+    pos = 0
+    while pending and pos < len(data):
+        chunk = data[pos:pos + INDEX_CHUNK]
+        pos += len(chunk)
+        produced += len(inflater.decompress(chunk))
+        while pending and pending[0]["offset"] + pending[0]["size"] <= produced:
+            pending.pop(0)["compressed_end"] = pos
+    for entry in pending:
+        entry["compressed_end"] = len(data)
+    # The gzip trailer (CRC32 + length of the tar stream) identifies the content cheaply
+    return {"bundle_size": len(data), "trailer": data[-8:].hex(), "members": members}
+
+def write_bundle_index(bundle_uri: str, data: Optional[bytes] = None,
+                       write_func: Optional[Callable[[str, bytes], None]] = None,
+                       storage: Optional[BlobStorage] = None) -> str:
+    """Write the sidecar member index next to the bundle at ``bundle_uri`` (path or URI)."""
+    storage = storage or storage_for_uri(bundle_uri, write_func=write_func)
+    if data is None:
+        data = storage.read(bundle_uri)
+    index_uri = bundle_uri + INDEX_SUFFIX
+    storage.put(index_uri, json.dumps(build_bundle_index(data)).encode())
+    return index_uri
+
+def load_bundle_index(bundle_uri: str, storage: Optional[BlobStorage] = None) -> Optional[dict]:
+    """Return the sidecar index for a bundle, or None if missing, stale or from an older format."""
+    try:
+        storage = storage or storage_for_uri(bundle_uri)
+        stat = storage.stat(bundle_uri)
+        if stat is None or not storage.exists(bundle_uri + INDEX_SUFFIX):
+            return None
+        index = json.loads(storage.read(bundle_uri + INDEX_SUFFIX))
+        if index.get("bundle_size") != stat["size"] or "trailer" not in index:
+            return None
+        if storage.read(bundle_uri, stat["size"] - 8, 8).hex() != index["trailer"]:
+            return None
+        return index
+    except (OSError, ValueError):
+        return None
+
+class BundleReader:
+    """
+    Read individual members of a .tar.gz bundle without extracting it.
+    ``source`` is a bundle path/URI or raw bytes. With a sidecar index only the compressed
+    prefix holding the requested member is fetched (a ranged read on remote storage);
+    otherwise tar headers are walked lazily.
+    """
+
+    def __init__(self, source: Union[str, bytes]):
+        self._source = source
+        self._storage = storage_for_uri(source) if isinstance(source, str) else None
+        self._index = load_bundle_index(source, self._storage) if self._storage else None
+        self._inflated = b""
+        self._fetched = 0
+        self._inflater = None
+        self._tar = None
+        self._members: Dict[str, tarfile.TarInfo] = {}
+        self._exhausted = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._tar is not None:
+            self._tar.close()
+
+    def _open_tar(self) -> tarfile.TarFile:
+        if self._tar is None:
+            if isinstance(self._source, bytes):
+                self._tar = tarfile.open(fileobj=io.BytesIO(self._source), mode="r:gz")
+            elif isinstance(self._storage, LocalBlobStorage):
+                self._tar = tarfile.open(LocalBlobStorage.path_for(self._source), mode="r:gz")
+            else:
+                # Unindexed remote bundle: random member access needs the whole object
+                self._tar = tarfile.open(fileobj=io.BytesIO(self._storage.read(self._source)), mode="r:gz")
+        return self._tar
+
+    def _lookup(self, name: Optional[str]) -> Optional[tarfile.TarInfo]:
+        # name=None walks the remaining headers so every member is known
+        if name in self._members or self._exhausted:
+            return self._members.get(name)
+        tar = self._open_tar()
+        while True:
+            m = tar.next()
+            if m is None:
+                self._exhausted = True
+                return None
+            if m.isfile():
+                self._members[_member_name(m.name)] = m
+                if _member_name(m.name) == name:
+                    return m
+
+    def _inflate_to(self, compressed_end: int) -> None:
+        # Members are read in pack order, so extend the inflated prefix incrementally
+        if compressed_end <= self._fetched:
+            return
+        if self._inflater is None:
+            self._inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunk = self._storage.read(self._source, self._fetched, compressed_end - self._fetched)
+        self._inflated += self._inflater.decompress(chunk)
+        self._fetched = compressed_end
+
+    def names(self) -> list:
+        if self._index is not None:
+            return list(self._index["members"])
+        self._lookup(None)
+        return list(self._members)
+
+    def exists(self, name: str) -> bool:
+        if self._index is not None:
+            return name in self._index["members"]
+        return self._lookup(name) is not None
+
+    def read(self, name: str) -> Optional[bytes]:
+        if self._index is not None:
+            entry = self._index["members"].get(name)
+            if entry is None:
+                return None
+            self._inflate_to(entry["compressed_end"])
+            return self._inflated[entry["offset"]:entry["offset"] + entry["size"]]
+        m = self._lookup(name)
+        if m is None:
+            return None
+        return self._open_tar().extractfile(m).read()
+
+def _descriptor_root(reader: BundleReader) -> str:
+    """Bundle root holding manifest.yaml/schema.json; handles nested items/<id> layouts."""
+    if reader.exists("manifest.yaml") and reader.exists("schema.json"):
+        return ""
+    names = set(reader.names())
+    for name in sorted(names):
+        parts = name.split("/")
+        if len(parts) == 3 and parts[0] == "items" and parts[2] == "manifest.yaml":
+            prefix = f"items/{parts[1]}/"
+            if prefix + "schema.json" in names:
+                return prefix
+    return ""
+
+def load_descriptor_from_bundle(source: Union[str, bytes]) -> Tuple[dict, dict, dict, dict]:
+    """
+    Load manifest, schema, ui and x-schema-map targets straight from bundle members.
+    `source` is a bundle path or the raw .tar.gz bytes.
+    """
+    with BundleReader(source) as reader:
+        root = _descriptor_root(reader)
+        manifest_raw = reader.read(root + "manifest.yaml")
+        schema_raw = reader.read(root + "schema.json")
+        if manifest_raw is None:
+            raise ValueError("manifest.yaml not found")
+        if schema_raw is None:
+            raise ValueError("schema.json not found")
+
+        manifest = yaml.safe_load(manifest_raw)
+        schema = json.loads(schema_raw)
+        ui_raw = reader.read(root + "ui.json")
+        ui = json.loads(ui_raw) if ui_raw is not None else {}
+
+        additional_schemas: Dict[str, Any] = {}
+        schema_map = schema.get("x-schema-map", {}) if isinstance(schema, dict) else {}
+        for mapped_name in schema_map.values():
+            mapped_raw = reader.read(root + mapped_name)
+            if mapped_raw is not None:
+                additional_schemas[mapped_name] = json.loads(mapped_raw)
+
+    # Minimal validation
+    if "version" not in manifest:
+        raise ValueError("manifest missing required field: version")
+    if "id" not in manifest and "name" not in manifest:
+        raise ValueError("manifest missing required field: id or name")
+
+    return manifest, schema, ui, additional_schemas
+
 def load_descriptor_from_dir(path: str) -> Tuple[dict, dict, Optional[dict], dict]:
     with open(os.path.join(path, "manifest.yaml")) as f:
         manifest = yaml.safe_load(f)
@@ -34,14 +253,22 @@ def load_descriptor_from_dir(path: str) -> Tuple[dict, dict, Optional[dict], dic
     
     return manifest, schema, ui, additional_schemas
 
+def store_bundle(storage: BlobStorage, key: str, data: bytes) -> str:
+    """Write a bundle and its member index; returns the bundle's storage URI."""
+    uri = storage.write(key, data)
+    write_bundle_index(uri, data, storage=storage)
+    return uri
+
+def delete_bundle(storage_uri: str) -> bool:
+    """Delete a bundle blob and its index. Returns False if the bundle did not exist."""
+    storage = storage_for_uri(storage_uri)
+    storage.delete(storage_uri + INDEX_SUFFIX)
+    return storage.delete(storage_uri)
+
 def write_blob(item_id: str, version: str, data: bytes) -> str:
-    root = catalog_settings.CATALOG_BLOB_DIR
-    os.makedirs(root, exist_ok=True)
-    fp = os.path.join(root, f"{item_id}@{version}.tar.gz")
-    with open(fp, "wb") as f:
-        f.write(data)
-    return fp
+    storage = get_blob_storage("blobs", catalog_settings.CATALOG_BLOB_DIR)
+    return store_bundle(storage, f"{item_id}@{version}.tar.gz", data)
 
 def read_blob(storage_uri: str) -> bytes:
-    with open(storage_uri, "rb") as f:
-        return f.read()
+    record_access(storage_uri)
+    return storage_for_uri(storage_uri).read(storage_uri)
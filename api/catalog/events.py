@@ -0,0 +1,60 @@
+"""Catalog notifications and usage counters kept in Redis."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+CATALOG_CHANNEL = "channel:catalog"
+EXEC_COUNTS_KEY = "catalog:exec_counts"
+
+
+def version_available_event(item_id: str, version: str, *, storage_uri: Optional[str] = None,
+                            source: Optional[str] = None) -> dict:
+    return {
+        "type": "version_available",
+        "item_id": item_id,
+        "version": version,
+        "storage_uri": storage_uri,
+        "source": source,
+        "published_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def publish_version_available(redis_client, item_id: str, version: str, *,
+                                    storage_uri: Optional[str] = None, source: Optional[str] = None) -> None:
+    """Announce a newly registered version so workers can pre-warm it. Best effort."""
+    event = version_available_event(item_id, version, storage_uri=storage_uri, source=source)
+    try:
+        await redis_client.publish(CATALOG_CHANNEL, json.dumps(event))
+    except Exception as e:
+        print(f"⚠️ Failed to publish version_available for {item_id}@{version}: {e}")
+
+
+async def record_execution(redis_client, item_id: str, version: str) -> None:
+    await redis_client.zincrby(EXEC_COUNTS_KEY, 1, f"{item_id}@{version}")
+
+
+async def most_executed_versions(redis_client, limit: int) -> List[Tuple[str, str]]:
+    """(item_id, version) pairs ordered by execution count, highest first."""
+    if limit <= 0:
+        return []
+    members = await redis_client.zrevrange(EXEC_COUNTS_KEY, 0, limit - 1)
+    versions = []
+    for member in members:
+        member = member.decode() if isinstance(member, bytes) else member
+        item_id, _, version = member.partition("@")
+        if item_id and version:
+            versions.append((item_id, version))
+    return versions
+
+
+__all__ = [
+    "CATALOG_CHANNEL",
+    "EXEC_COUNTS_KEY",
+    "most_executed_versions",
+    "publish_version_available",
+    "record_execution",
+    "version_available_event",
+]
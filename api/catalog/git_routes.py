@@ -1,13 +1,9 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-import json
-import uuid
-from datetime import datetime
 from redis.asyncio import Redis
 from ..deps import get_redis
-from ..settings import settings
-from ..task_queue import enqueue_job
+from ..task_queue import enqueue_jobs
 
 class GitImportRequest(BaseModel):
     repo_url: str
@@ -29,28 +25,14 @@ async def github_webhook(request: Request, redis_client: Redis = Depends(get_red
     if not ref.startswith("refs/tags/"):
         return {"queued": 0}  # ignore non-tag events
     tag = ref.split("/")[-1]
-    job_id = str(uuid.uuid4())
-    job = await enqueue_job(
+    job_ids = await enqueue_jobs(
         "sync_catalog_item_from_git",
-        job_id,
-        payload={"repo_url": repo_url, "ref": tag},
+        [{"repo_url": repo_url, "ref": tag}],
+        redis_client=redis_client,
+        job_type="git_import",
     )
-    
-    # Create job status record for dashboard tracking
-    await redis_client.set(
-        f"{settings.JOB_STATUS_PREFIX}{job.job_id}", 
-        json.dumps({
-            "state": "QUEUED",
-            "type": "git_webhook",
-            "params": {
-                "repo_url": repo_url,
-                "ref": tag
-            }
-        }), 
-        ex=settings.JOB_TTL
-    )
-    
-    return {"queued": 1, "repo_url": repo_url, "ref": tag, "job_id": job.job_id}
+
+    return {"queued": len(job_ids), "repo_url": repo_url, "ref": tag, "job_id": job_ids[0]}
 
 @router.post("/import")
 async def import_from_git(request: GitImportRequest, redis_client: Redis = Depends(get_redis)):
@@ -98,55 +80,20 @@ async def import_from_git(request: GitImportRequest, redis_client: Redis = Depen
         source_type = "branch"
         source_ref = branch
     
-    # Generate job ID
-    job_id = str(uuid.uuid4())
-    
-    job = await enqueue_job(
+    # Enqueue the job and create its status record through the job scripts
+    job_ids = await enqueue_jobs(
         "sync_catalog_item_from_git",
-        job_id,
-        payload={
+        [{
             "repo_url": repo_url,
             "item_name": item_name,
             "source_type": source_type,
             "source_ref": source_ref,
             "ref": ref,
-        },
+        }],
+        redis_client=redis_client,
+        job_type="git_import",
     )
-    
-    # Create job status record for dashboard tracking
-    job_data = {
-        "id": job_id,
-        "state": "QUEUED",
-        "type": "git_import",
-        "progress": 0,
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
-        "started_at": None,
-        "finished_at": None,
-        "params": {
-            "repo_url": repo_url,
-            "item_name": item_name,
-            "source_type": source_type,
-            "source_ref": source_ref
-        },
-        "result": None,
-        "error": None,
-        "current_step": "Queued"
-    }
-    
-    # Convert data to hash format
-    hash_data = {}
-    for key, value in job_data.items():
-        if value is None:
-            continue
-        elif key in ["params", "result", "error"]:
-            hash_data[key] = json.dumps(value)
-        else:
-            hash_data[key] = str(value)
-    
-    job_key = f"{settings.JOB_STATUS_PREFIX}{job_id}"
-    await redis_client.hset(job_key, mapping=hash_data)
-    await redis_client.expire(job_key, settings.JOB_TTL)
+    job_id = job_ids[0]
     
     return {
         "queued": True, 
@@ -22,48 +22,89 @@ from api.common.db import SessionLocal
 from api.catalog.repository import CatalogRepo
 
 def upsert_version(item_id: str, version: str, manifest: dict, schema: dict, ui: dict|None,
-                   storage_uri: str, source: dict, additional_schemas: dict = None):
+                   storage_uri: str, source: dict, additional_schemas: dict = None,
+                   sha256: str = None, size: int = None):
+    upsert_versions([{
+        "item_id": item_id,
+        "version": version,
+        "manifest": manifest,
+        "schema": schema,
+        "ui": ui,
+        "storage_uri": storage_uri,
+        "source": source,
+        "additional_schemas": additional_schemas,
+        "sha256": sha256,
+        "size": size,
+    }])
+
+def upsert_versions(entries: List[dict], stat_updates: List[dict] = None):
+    """
+    Apply several version upserts with a single registry write.
+    Each entry carries the upsert_version() arguments plus an optional bundle_stat, whose
+    sha256/size (like an entry's own sha256/size) spare the database write re-reading the blob;
+    stat_updates ({item_id, version, bundle_stat}) only refresh the stored bundle stat.
+    """
+    if not entries and not stat_updates:
+        return
     # Legacy implementation with dual-write support
     with _lock:
         # First, update JSON (source of truth)
         db = _load()
-        items = db["items"].setdefault(item_id, {"versions": {}})
+        for entry in entries:
+            items = db["items"].setdefault(entry["item_id"], {"versions": {}})
+            record = {
+                "manifest": entry["manifest"],
+                "schema": entry["schema"],
+                "ui": entry.get("ui") or {},
+                "additional_schemas": entry.get("additional_schemas") or {},
+                "storage_uri": entry["storage_uri"],
+                "source": entry["source"],
+                "active": True
+            }
+            if entry.get("bundle_stat"):
+                record["bundle_stat"] = entry["bundle_stat"]
+            items["versions"][entry["version"]] = record
         
-        items["versions"][version] = {
-            "manifest": manifest,
-            "schema": schema,
-            "ui": ui or {},
-            "additional_schemas": additional_schemas or {},
-            "storage_uri": storage_uri,
-            "source": source,
-            "active": True
-        }
+        for update in stat_updates or []:
+            record = db["items"].get(update["item_id"], {}).get("versions", {}).get(update["version"])
+            if record is not None:
+                record["bundle_stat"] = update["bundle_stat"]
         
         _save(db)
         
         # Then, dual-write to PostgreSQL if enabled
-        try:
-            with SessionLocal() as db_session:
-                repo = CatalogRepo(db=db_session)
-                repo.register_version(
-                    item_id=item_id,
-                    name=manifest.get("name", item_id),
-                    manifest=manifest,
-                    json_schema=schema,
-                    ui_schema=ui,
-                    version=version,
-                    storage_uri=storage_uri,
-                    source=source,
-                    is_active=True,
-                    labels=manifest.get("labels", {}),
-                    description=manifest.get("description")
-                )
-        except Exception as e:
-            # Log error but don't fail the request since JSON write succeeded
-            print(f"❌ Failed to write {item_id} v{version} to database: {e}")
-            import traceback
-            traceback.print_exc()
-            # In production, you might want to use proper logging here
+        for entry in entries:
+            _register_version_in_db(entry)
+
+def _register_version_in_db(entry: dict):
+    item_id = entry["item_id"]
+    version = entry["version"]
+    manifest = entry["manifest"]
+    bundle_stat = entry.get("bundle_stat") or {}
+    try:
+        with SessionLocal() as db_session:
+            repo = CatalogRepo(db=db_session)
+            repo.register_version(
+                item_id=item_id,
+                name=manifest.get("name", item_id),
+                manifest=manifest,
+                json_schema=entry["schema"],
+                ui_schema=entry.get("ui"),
+                version=version,
+                storage_uri=entry["storage_uri"],
+                source=entry["source"],
+                is_active=True,
+                labels=manifest.get("labels", {}),
+                description=manifest.get("description"),
+                sha256=entry.get("sha256") or bundle_stat.get("sha256"),
+                size=entry.get("size") or bundle_stat.get("size"),
+            )
+    except Exception as e:
+        # Log error but don't fail the request since JSON write succeeded
+        print(f"❌ Failed to write {item_id} v{version} to database: {e}")
+        import traceback
+        traceback.print_exc()
+        # In production, you might want to use proper logging here
 
 def list_items() -> List[dict]:
     db = _load()
@@ -517,37 +558,84 @@ def sync_registry_to_local():
     
     return {"created": created, "errors": errors}
 
+def _bundle_uri_for(item_id: str, version: str) -> Optional[str]:
+    """Storage URI of the bundle for item@version: registry record first, then legacy bundles dir."""
+    from api.catalog.storage import storage_for_uri
+
+    record = get_descriptor(item_id, version) or {}
+    candidates = [record.get("storage_uri"), f"/app/data/bundles/{item_id}@{version}.tar.gz"]
+    for uri in candidates:
+        if not uri:
+            continue
+        try:
+            # Directory file:// references (local sources) are not bundles
+            if storage_for_uri(uri).exists(uri):
+                return uri
+        except ValueError:
+            continue
+    return None
+
 def get_local_catalog_item_path(item_id: str, version: str) -> str:
     """
     Get path to catalog item, extracting from bundle if necessary.
     
     Priority:
     1. Check if already extracted in catalog_local
-    2. Extract from bundle if exists
+    2. Extract from bundle storage (local or remote) if it exists
     3. Raise error if neither found
     """
+    import shutil
     import tarfile
+    import tempfile
+    from contextlib import closing
+    from api.catalog.access_tracker import EXTRACTED_MARKER, record_access
+    from api.catalog.storage import storage_for_uri
     
     # Check if locally extracted version exists
     local_path = os.path.join(LOCAL_CATALOG_PATH, item_id, version)
     task_file = os.path.join(local_path, "task.py")
+    marker = os.path.join(local_path, EXTRACTED_MARKER)
     
     if os.path.exists(task_file):
+        if os.path.exists(marker):
+            record_access(extracted_path=local_path)
         return local_path
     
     # Check if bundle exists and extract it
-    bundle_path = f"/app/data/bundles/{item_id}@{version}.tar.gz"
-    if os.path.exists(bundle_path):
-        os.makedirs(local_path, exist_ok=True)
-        
-        with tarfile.open(bundle_path, 'r:gz') as tar:
-            tar.extractall(local_path)
+    bundle_uri = _bundle_uri_for(item_id, version)
+    if bundle_uri:
+        # Extract into a staging dir (outside items/, same filesystem) and rename into place,
+        # so concurrent executions and the pre-warmer never see a half-extracted tree
+        staging_root = os.path.join(os.path.dirname(LOCAL_CATALOG_PATH), ".staging")
+        os.makedirs(staging_root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f"{item_id}@{version}.", dir=staging_root)
+        os.chmod(staging, 0o755)
+        try:
+            # Stream mode: remote bundles are extracted without buffering the whole object
+            with closing(storage_for_uri(bundle_uri).open(bundle_uri)) as stream:
+                with tarfile.open(fileobj=stream, mode='r|gz') as tar:
+                    tar.extractall(staging)
+            
+            # Verify extraction worked
+            if not os.path.exists(os.path.join(staging, "task.py")):
+                raise FileNotFoundError(f"task.py not found in bundle {item_id}@{version}")
+            
+            # Marks the tree as disposable for storage GC (source items never carry it)
+            with open(os.path.join(staging, EXTRACTED_MARKER), "w") as f:
+                json.dump({"storage_uri": bundle_uri, "extracted_at": datetime.utcnow().isoformat()}, f)
+            
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            try:
+                os.rename(staging, local_path)
+            except OSError:
+                # Lost a race to another extractor, or a partial local copy exists
+                if not os.path.exists(task_file):
+                    shutil.copytree(staging, local_path, dirs_exist_ok=True)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
         
-        # Verify extraction worked
-        if os.path.exists(task_file):
-            return local_path
-        else:
-            raise FileNotFoundError(f"task.py not found in bundle {item_id}@{version}")
+        record_access(bundle_uri, local_path)
+        return local_path
     
     # Neither local nor bundle found
     raise FileNotFoundError(f"Catalog item {item_id}@{version} not found (checked local and bundles)")
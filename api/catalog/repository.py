@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 from api.common.db import get_db
 from api.catalog.models import CatalogItem, CatalogVersion, StorageObject
+from api.catalog.storage import storage_for_uri
 
 REGISTRY_PATH = "/app/data/catalog_registry.json"
 
@@ -60,6 +61,8 @@ class CatalogRepo:
         is_active: bool,
         labels: Optional[Dict[str, Any]] = None,
         description: Optional[str] = None,
+        sha256: Optional[str] = None,
+        size: Optional[int] = None,
     ) -> Tuple[str, str]:
         # NOTE: JSON write is handled by upsert_version() in registry.py
         # We only handle database writes here to avoid overwriting the JSON file
@@ -79,12 +82,14 @@ class CatalogRepo:
                     self.db.add(ci)
                     self.db.flush()
                 
-                # Calculate file stats if path exists
-                sha = None
-                size = None
-                if os.path.exists(storage_uri):
-                    sha = sha256_file(storage_uri)
-                    size = pathlib.Path(storage_uri).stat().st_size
+                # Calculate blob stats if the bundle exists in storage, unless the caller has them
+                sha = sha256
+                if sha is None or size is None:
+                    storage = storage_for_uri(storage_uri)
+                    blob_stat = storage.stat(storage_uri)
+                    if blob_stat:
+                        sha = sha or storage.sha256(storage_uri)
+                        size = blob_stat["size"]
                 
                 cv = CatalogVersion(
                     catalog_item_id=ci.id, 
@@ -114,6 +119,41 @@ class CatalogRepo:
 
         return (item_id, version)
 
+    # ---- STORAGE OBJECTS (access tracking / GC) ----
+    def touch_storage_objects(self, accessed: Dict[str, Any]) -> int:
+        """Advance last_accessed_at for each uri -> datetime in ``accessed``."""
+        if not self.db_enabled or not accessed:
+            return 0
+        try:
+            rows = self.db.execute(select(StorageObject).where(StorageObject.uri.in_(list(accessed)))).scalars().all()
+            for so in rows:
+                ts = accessed[so.uri]
+                if so.last_accessed_at is None or so.last_accessed_at.replace(tzinfo=None) < ts:
+                    so.last_accessed_at = ts
+            self.db.commit()
+            return len(rows)
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def storage_access_times(self) -> Dict[str, Any]:
+        """uri -> last_accessed_at for every tracked storage object."""
+        if not self.db_enabled:
+            return {}
+        rows = self.db.execute(select(StorageObject.uri, StorageObject.last_accessed_at)).all()
+        return {uri: ts for uri, ts in rows}
+
+    def delete_storage_objects(self, uris) -> None:
+        if not self.db_enabled or not uris:
+            return
+        try:
+            for so in self.db.execute(select(StorageObject).where(StorageObject.uri.in_(list(uris)))).scalars():
+                self.db.delete(so)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
     # ---- READ PATH (admin) ----
     def admin_list_items(self, q: Optional[str] = None, limit: int = 50, offset: int = 0):
         stmt = select(CatalogItem).order_by(CatalogItem.item_id).limit(limit).offset(offset)
@@ -9,7 +9,7 @@ from .registry import (
     sync_registry_with_local, get_sync_status, migrate_legacy_local_storage,
     sync_local_to_registry, sync_registry_to_local, _load, _save, _lock
 )
-from .bundles import load_descriptor_from_dir, pack_dir, write_blob
+from .bundles import delete_bundle, load_descriptor_from_dir, pack_dir, write_blob
 from .validate import validate_manifest, validate_schema
 from ..common.db import SessionLocal
 from .repository import CatalogRepo
@@ -458,6 +458,31 @@ def api_full_sync():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Full sync failed: {str(e)}")
 
+@router.post("/storage/gc")
+async def api_storage_gc(dry_run: bool = False):
+    """Queue a storage GC job (unreferenced blobs, cold extracted trees); also runs on the beat schedule"""
+    import uuid
+    job_id = str(uuid.uuid4())
+
+    try:
+        await enqueue_job(
+            "catalog_storage_gc_task",
+            job_id,
+            payload={
+                "trigger": "manual",
+                "dry_run": dry_run,
+                "requested_at": datetime.utcnow().isoformat(),
+            },
+        )
+
+        return {
+            "success": True,
+            "job_id": job_id,
+            "message": "Storage GC job queued",
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue storage GC job: {str(e)}")
+
 @router.delete("/{item_id}")
 def delete_catalog_item(item_id: str):
     """Delete an entire catalog item (all versions) from registry, database, and storage"""
@@ -481,10 +506,10 @@ def delete_catalog_item(item_id: str):
                 version_data = item_data["versions"][version]
                 storage_uri = version_data.get("storage_uri")
                 
-                if storage_uri and os.path.exists(storage_uri):
+                if storage_uri:
                     try:
-                        os.remove(storage_uri)
-                        deleted_bundles.append(storage_uri)
+                        if delete_bundle(storage_uri):
+                            deleted_bundles.append(storage_uri)
                     except Exception as e:
                         errors.append(f"Failed to delete bundle {storage_uri}: {str(e)}")
                 
@@ -578,10 +603,10 @@ def delete_catalog_version(item_id: str, version: str):
             storage_uri = version_data.get("storage_uri")
             
             # Delete bundle file
-            if storage_uri and os.path.exists(storage_uri):
+            if storage_uri:
                 try:
-                    os.remove(storage_uri)
-                    deleted_bundle = storage_uri
+                    if delete_bundle(storage_uri):
+                        deleted_bundle = storage_uri
                 except Exception as e:
                     errors.append(f"Failed to delete bundle {storage_uri}: {str(e)}")
             
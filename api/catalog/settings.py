@@ -7,5 +7,25 @@ class CatalogSettings(BaseSettings):
     CATALOG_LOCAL_ROOT: str = "/app/catalog_local"    # leave empty if not used
     # Git repos table is in DB; for demo we use a simple JSON list
     GIT_EXECUTE_DIRECT: bool = False  # if True, worker fetches repo@ref on execute
+    # Process pool size used to parse changed bundles during bundle directory sync
+    CATALOG_BUNDLE_SYNC_WORKERS: int = 4
+    # Bundle/blob storage backend: "local" (shared filesystem) or "s3" (S3-compatible object store)
+    CATALOG_STORAGE_BACKEND: str = "local"
+    CATALOG_S3_BUCKET: str = ""
+    CATALOG_S3_PREFIX: str = "catalog/"
+    CATALOG_S3_ENDPOINT_URL: str = ""  # e.g. http://minio:9000; empty uses AWS
+    CATALOG_S3_REGION: str = ""
+    # Access tracking: pending accesses are flushed after this many entries or seconds
+    CATALOG_ACCESS_FLUSH_BATCH: int = 100
+    CATALOG_ACCESS_FLUSH_SECONDS: int = 60
+    # Storage GC: unreferenced blobs younger than the grace period are kept (in-flight imports);
+    # extracted trees not accessed within the TTL are removed. Interval 0 disables the schedule.
+    CATALOG_GC_BLOB_GRACE_SECONDS: int = 60 * 60
+    CATALOG_GC_EXTRACTED_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    CATALOG_GC_INTERVAL_SECONDS: int = 60 * 60 * 6
+    # Workers extract new versions as they are announced and the N most-executed ones at boot
+    CATALOG_PREWARM_ENABLED: bool = True
+    CATALOG_PREWARM_TOP_N: int = 10
+    CATALOG_PREWARM_COMPILE: bool = True  # also byte-compile extracted .py files
 
 catalog_settings = CatalogSettings()
@@ -0,0 +1,396 @@
+"""
+Blob storage backends for catalog bundles.
+
+Storage URIs are backend-qualified: ``file:///app/data/bundles/x@1.0.0.tar.gz`` for the
+local filesystem and ``s3://bucket/prefix/x@1.0.0.tar.gz`` for S3-compatible object stores.
+Bare filesystem paths written by older versions are treated as local URIs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - boto3 is only needed for the s3 backend
+    boto3 = None
+
+from .descriptor_utils import atomic_write
+from .settings import catalog_settings
+
+LOCAL_SCHEME = "file"
+S3_SCHEME = "s3"
+
+
+def parse_uri(uri: str) -> Tuple[str, str]:
+    """Split a storage URI into (scheme, location); bare paths are local."""
+    if "://" not in uri:
+        return LOCAL_SCHEME, uri
+    scheme, location = uri.split("://", 1)
+    return scheme, location
+
+
+def normalize_uri(uri: str) -> str:
+    scheme, location = parse_uri(uri)
+    if scheme == LOCAL_SCHEME:
+        return f"file://{os.path.abspath(location)}"
+    return uri
+
+
+class BlobStorage:
+    """Common interface for bundle storage backends."""
+
+    scheme = ""
+
+    def uri_for(self, key: str) -> str:
+        raise NotImplementedError
+
+    def put(self, uri: str, data: bytes) -> str:
+        raise NotImplementedError
+
+    def open_writer(self, uri: str) -> "BlobWriter":
+        raise NotImplementedError
+
+    def read(self, uri: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        raise NotImplementedError
+
+    def open(self, uri: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def stat(self, uri: str) -> Optional[Dict[str, Any]]:
+        """Return {"size", "mtime_ns"} for an existing blob, else None."""
+        raise NotImplementedError
+
+    def delete(self, uri: str) -> bool:
+        raise NotImplementedError
+
+    def list(self, suffixes: Tuple[str, ...] = ()) -> Iterator[Dict[str, Any]]:
+        """Yield {"key", "uri", "size", "mtime_ns"} for blobs under this backend's root."""
+        raise NotImplementedError
+
+    def write(self, key: str, data: bytes) -> str:
+        return self.put(self.uri_for(key), data)
+
+    def exists(self, uri: str) -> bool:
+        return self.stat(uri) is not None
+
+    def sha256(self, uri: str) -> str:
+        h = hashlib.sha256()
+        with self.open(uri) as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+
+class BlobWriter:
+    """Streaming writer; the blob becomes visible only when the context exits cleanly."""
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+    def write(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        raise NotImplementedError
+
+
+class _LocalWriter(BlobWriter):
+    def __init__(self, uri: str, path: str):
+        super().__init__(uri)
+        self._path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A private temp file per writer, so concurrent writers to one key never interleave
+        fd, self._tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".part",
+                                         dir=os.path.dirname(path))
+        os.chmod(self._tmp, 0o644)
+        self._fh = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._fh.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> None:
+        self._fh.close()
+        os.replace(self._tmp, self._path)
+
+    def abort(self) -> None:
+        self._fh.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+class LocalBlobStorage(BlobStorage):
+    """Blobs stored as files under a local (or volume-mounted) directory."""
+
+    scheme = LOCAL_SCHEME
+
+    def __init__(self, root: str = "/", *, write_func: Optional[Callable[[str, bytes], None]] = None):
+        self.root = os.path.abspath(root)
+        self._write_func = write_func or atomic_write
+
+    @staticmethod
+    def path_for(uri: str) -> str:
+        return parse_uri(uri)[1]
+
+    def uri_for(self, key: str) -> str:
+        return f"file://{os.path.join(self.root, key)}"
+
+    def put(self, uri: str, data: bytes) -> str:
+        path = self.path_for(uri)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_func(path, data)
+        return normalize_uri(uri)
+
+    def open_writer(self, uri: str) -> BlobWriter:
+        return _LocalWriter(normalize_uri(uri), self.path_for(uri))
+
+    def read(self, uri: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        with open(self.path_for(uri), "rb") as f:
+            f.seek(offset)
+            return f.read() if length is None else f.read(length)
+
+    def open(self, uri: str) -> BinaryIO:
+        return open(self.path_for(uri), "rb")
+
+    def stat(self, uri: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(uri)
+        if not os.path.isfile(path):
+            return None
+        st = os.stat(path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def delete(self, uri: str) -> bool:
+        path = self.path_for(uri)
+        if not os.path.isfile(path):
+            return False
+        os.remove(path)
+        return True
+
+    def list(self, suffixes: Tuple[str, ...] = ()) -> Iterator[Dict[str, Any]]:
+        if not os.path.isdir(self.root):
+            return
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_file() or (suffixes and not entry.name.endswith(suffixes)):
+                    continue
+                st = entry.stat()
+                yield {
+                    "key": entry.name,
+                    "uri": self.uri_for(entry.name),
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                }
+
+
+class _S3Writer(BlobWriter):
+    """Multipart upload that buffers up to ``part_size`` bytes per part."""
+
+    def __init__(self, storage: "S3BlobStorage", uri: str):
+        super().__init__(uri)
+        self._storage = storage
+        self._bucket, self._key = storage.bucket_key(uri)
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts = []
+
+    def _flush_part(self) -> None:
+        client = self._storage.client
+        if self._upload_id is None:
+            resp = client.create_multipart_upload(Bucket=self._bucket, Key=self._key)
+            self._upload_id = resp["UploadId"]
+        number = len(self._parts) + 1
+        resp = client.upload_part(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+            PartNumber=number, Body=bytes(self._buffer),
+        )
+        self._parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+        self._buffer.clear()
+
+    def write(self, chunk: bytes) -> None:
+        self._buffer.extend(chunk)
+        self.size += len(chunk)
+        if len(self._buffer) >= self._storage.part_size:
+            self._flush_part()
+
+    def commit(self) -> None:
+        client = self._storage.client
+        if self._upload_id is None:
+            # Small blobs never started a multipart upload
+            client.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer))
+            return
+        if self._buffer:
+            self._flush_part()
+        client.complete_multipart_upload(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            self._storage.client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+
+
+def _is_not_found(exc: Exception) -> bool:
+    code = str(getattr(exc, "response", {}).get("Error", {}).get("Code", ""))
+    return code in {"404", "NoSuchKey", "NotFound"}
+
+
+class S3BlobStorage(BlobStorage):
+    """Blobs stored in an S3-compatible bucket (AWS S3, MinIO, Ceph RGW, ...)."""
+
+    scheme = S3_SCHEME
+    # S3 requires every part but the last to be at least 5 MiB
+    part_size = 8 * 1024 * 1024
+
+    def __init__(self, bucket: str, prefix: str = "", *, client: Any = None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            if boto3 is None:
+                raise RuntimeError("the s3 storage backend requires boto3 (install the 's3' extra)")
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=catalog_settings.CATALOG_S3_ENDPOINT_URL or None,
+                region_name=catalog_settings.CATALOG_S3_REGION or None,
+            )
+        return self._client
+
+    @staticmethod
+    def bucket_key(uri: str) -> Tuple[str, str]:
+        bucket, _, key = parse_uri(uri)[1].partition("/")
+        return bucket, key
+
+    def uri_for(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def put(self, uri: str, data: bytes) -> str:
+        if len(data) > self.part_size:
+            with self.open_writer(uri) as writer:
+                for start in range(0, len(data), self.part_size):
+                    writer.write(data[start:start + self.part_size])
+            return uri
+        bucket, key = self.bucket_key(uri)
+        self.client.put_object(Bucket=bucket, Key=key, Body=data)
+        return uri
+
+    def open_writer(self, uri: str) -> BlobWriter:
+        return _S3Writer(self, uri)
+
+    def read(self, uri: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        bucket, key = self.bucket_key(uri)
+        kwargs: Dict[str, Any] = {"Bucket": bucket, "Key": key}
+        if length is not None:
+            if length <= 0:
+                return b""
+            kwargs["Range"] = f"bytes={offset}-{offset + length - 1}"
+        elif offset:
+            kwargs["Range"] = f"bytes={offset}-"
+        return self.client.get_object(**kwargs)["Body"].read()
+
+    def open(self, uri: str) -> BinaryIO:
+        bucket, key = self.bucket_key(uri)
+        return self.client.get_object(Bucket=bucket, Key=key)["Body"]
+
+    def stat(self, uri: str) -> Optional[Dict[str, Any]]:
+        bucket, key = self.bucket_key(uri)
+        try:
+            head = self.client.head_object(Bucket=bucket, Key=key)
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise
+        return {"size": head["ContentLength"], "mtime_ns": int(head["LastModified"].timestamp() * 1e9)}
+
+    def delete(self, uri: str) -> bool:
+        if not self.exists(uri):
+            return False
+        bucket, key = self.bucket_key(uri)
+        self.client.delete_object(Bucket=bucket, Key=key)
+        return True
+
+    def list(self, suffixes: Tuple[str, ...] = ()) -> Iterator[Dict[str, Any]]:
+        token = None
+        while True:
+            kwargs: Dict[str, Any] = {"Bucket": self.bucket, "Prefix": self.prefix}
+            if token:
+                kwargs["ContinuationToken"] = token
+            resp = self.client.list_objects_v2(**kwargs)
+            for obj in resp.get("Contents", []):
+                key = obj["Key"][len(self.prefix):]
+                if "/" in key or (suffixes and not key.endswith(suffixes)):
+                    continue
+                yield {
+                    "key": key,
+                    "uri": f"s3://{self.bucket}/{obj['Key']}",
+                    "size": obj["Size"],
+                    "mtime_ns": int(obj["LastModified"].timestamp() * 1e9),
+                }
+            if not resp.get("IsTruncated"):
+                return
+            token = resp.get("NextContinuationToken")
+
+
+def get_blob_storage(area: str, local_root: str, *,
+                     write_func: Optional[Callable[[str, bytes], None]] = None) -> BlobStorage:
+    """
+    Storage for new blobs in ``area`` ("blobs" or "bundles"). The local backend keeps
+    each area in its own directory; the s3 backend maps areas to key prefixes.
+    """
+    backend = catalog_settings.CATALOG_STORAGE_BACKEND
+    if backend == "local":
+        return LocalBlobStorage(local_root, write_func=write_func)
+    if backend == S3_SCHEME:
+        if not catalog_settings.CATALOG_S3_BUCKET:
+            raise RuntimeError("CATALOG_S3_BUCKET must be set for the s3 storage backend")
+        return S3BlobStorage(
+            catalog_settings.CATALOG_S3_BUCKET,
+            prefix=f"{catalog_settings.CATALOG_S3_PREFIX}{area}/",
+        )
+    raise ValueError(f"Unknown catalog storage backend '{backend}'")
+
+
+def storage_for_uri(uri: str, *,
+                    write_func: Optional[Callable[[str, bytes], None]] = None) -> BlobStorage:
+    """Backend able to read/write/delete the blob at ``uri``, chosen by the URI scheme."""
+    scheme, location = parse_uri(uri)
+    if scheme == LOCAL_SCHEME:
+        return LocalBlobStorage(os.path.dirname(location) or "/", write_func=write_func)
+    if scheme == S3_SCHEME:
+        return S3BlobStorage(location.partition("/")[0])
+    raise ValueError(f"Unsupported storage URI '{uri}'")
+
+
+__all__ = [
+    "BlobStorage",
+    "BlobWriter",
+    "LocalBlobStorage",
+    "S3BlobStorage",
+    "get_blob_storage",
+    "normalize_uri",
+    "parse_uri",
+    "storage_for_uri",
+]
@@ -0,0 +1,187 @@
+"""Garbage collection of catalog blobs and extracted trees, reconciled against the registry."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from . import registry
+from .access_tracker import EXTRACTED_MARKER, access_tracker
+from .bundle_sync import BUNDLES_DIR
+from .bundles import BUNDLE_SUFFIXES, INDEX_SUFFIX, delete_bundle
+from .settings import catalog_settings
+from .storage import get_blob_storage, normalize_uri
+
+
+def _referenced_uris(data: dict) -> Set[str]:
+    uris = set()
+    for item in data.get("items", {}).values():
+        for record in item.get("versions", {}).values():
+            if record.get("storage_uri"):
+                uris.add(normalize_uri(record["storage_uri"]))
+    return uris
+
+
+def _db_access_times() -> Dict[str, float]:
+    """Bundle uri -> last access (epoch seconds) from StorageObject, when the DB is enabled."""
+    from api.common.db import SessionLocal
+    from .repository import CatalogRepo
+
+    try:
+        with SessionLocal() as db_session:
+            times = CatalogRepo(db=db_session).storage_access_times()
+    except Exception as e:
+        print(f"⚠️ Storage GC could not read access times from the database: {e}")
+        return {}
+    return {
+        normalize_uri(uri): (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+        for uri, ts in times.items() if ts is not None
+    }
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _collect_blobs(report, storages, referenced, access_times, now, grace, dry_run) -> List[str]:
+    deleted_uris = []
+    for storage in storages:
+        for blob in storage.list(BUNDLE_SUFFIXES):
+            report["blobs_scanned"] += 1
+            uri = normalize_uri(blob["uri"])
+            if uri in referenced:
+                continue
+            last_used = max(blob["mtime_ns"] / 1e9, access_times.get(uri, 0))
+            if now - last_used < grace:
+                continue
+            index = storage.stat(blob["uri"] + INDEX_SUFFIX)
+            size = blob["size"] + (index["size"] if index else 0)
+            try:
+                if not dry_run:
+                    delete_bundle(blob["uri"])
+            except Exception as e:
+                report["errors"].append(f"Failed to delete {uri}: {e}")
+                continue
+            deleted_uris.append(uri)
+            report["blobs_deleted"] += 1
+            report["reclaimed_bytes"] += size
+            report["deleted"].append({"uri": uri, "bytes": size, "reason": "unreferenced"})
+
+        # Indexes left behind by bundles removed out of band
+        for index in storage.list((INDEX_SUFFIX,)):
+            bundle_uri = index["uri"][: -len(INDEX_SUFFIX)]
+            if storage.exists(bundle_uri) or now - index["mtime_ns"] / 1e9 < grace:
+                continue
+            if not dry_run:
+                storage.delete(index["uri"])
+            report["reclaimed_bytes"] += index["size"]
+            report["deleted"].append({"uri": index["uri"], "bytes": index["size"], "reason": "orphaned-index"})
+    return deleted_uris
+
+
+def _collect_extracted(report, data, access_times, now, ttl, dry_run) -> None:
+    root = registry.LOCAL_CATALOG_PATH
+    if not os.path.isdir(root):
+        return
+    items = data.get("items", {})
+    for item_id in sorted(os.listdir(root)):
+        item_dir = os.path.join(root, item_id)
+        if not os.path.isdir(item_dir):
+            continue
+        for version in sorted(os.listdir(item_dir)):
+            path = os.path.join(item_dir, version)
+            marker = os.path.join(path, EXTRACTED_MARKER)
+            # Only trees extracted from bundles are disposable; source items have no marker
+            if not os.path.isfile(marker):
+                continue
+            report["extracted_scanned"] += 1
+            record = items.get(item_id, {}).get("versions", {}).get(version)
+            if record is None:
+                reason = "unreferenced"
+            else:
+                last_used = max(os.stat(marker).st_mtime,
+                                access_times.get(normalize_uri(record.get("storage_uri") or ""), 0))
+                if now - last_used < ttl:
+                    continue
+                reason = "cold"
+            size = _tree_size(path)
+            try:
+                if not dry_run:
+                    shutil.rmtree(path)
+            except Exception as e:
+                report["errors"].append(f"Failed to remove {path}: {e}")
+                continue
+            report["extracted_deleted"] += 1
+            report["reclaimed_bytes"] += size
+            report["deleted"].append({"path": path, "bytes": size, "reason": reason})
+
+
+def collect_garbage(
+    *,
+    dry_run: bool = False,
+    bundles_dir: str = BUNDLES_DIR,
+    blob_dir: Optional[str] = None,
+    blob_grace_seconds: Optional[int] = None,
+    extracted_ttl_seconds: Optional[int] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Delete bundle blobs no registry version references (once older than the grace period)
+    and extracted trees that are orphaned or have not been accessed within the TTL.
+    Referenced bundles are never removed. Returns a report including reclaimed bytes.
+    """
+    now = now if now is not None else time.time()
+    grace = catalog_settings.CATALOG_GC_BLOB_GRACE_SECONDS if blob_grace_seconds is None else blob_grace_seconds
+    ttl = catalog_settings.CATALOG_GC_EXTRACTED_TTL_SECONDS if extracted_ttl_seconds is None else extracted_ttl_seconds
+
+    # Make this process's pending accesses visible before deciding what is cold
+    access_tracker.flush()
+
+    report: Dict[str, Any] = {
+        "gc_timestamp": datetime.utcnow().isoformat(),
+        "dry_run": dry_run,
+        "blobs_scanned": 0,
+        "blobs_deleted": 0,
+        "extracted_scanned": 0,
+        "extracted_deleted": 0,
+        "reclaimed_bytes": 0,
+        "deleted": [],
+        "errors": [],
+    }
+
+    data = registry._load()
+    access_times = _db_access_times()
+    storages = [
+        get_blob_storage("bundles", bundles_dir),
+        get_blob_storage("blobs", blob_dir or catalog_settings.CATALOG_BLOB_DIR),
+    ]
+    if storages[0].uri_for("") == storages[1].uri_for(""):
+        storages.pop()
+
+    deleted_uris = _collect_blobs(report, storages, _referenced_uris(data), access_times, now, grace, dry_run)
+    _collect_extracted(report, data, access_times, now, ttl, dry_run)
+
+    if deleted_uris and not dry_run:
+        from api.common.db import SessionLocal
+        from .repository import CatalogRepo
+
+        try:
+            with SessionLocal() as db_session:
+                CatalogRepo(db=db_session).delete_storage_objects(deleted_uris)
+        except Exception as e:
+            report["errors"].append(f"Failed to delete storage objects from database: {e}")
+
+    return report
+
+
+__all__ = ["collect_garbage"]
@@ -15,4 +15,11 @@ async def get_redis() -> Redis:
     return _redis_client
 
 
-__all__ = ["get_redis"]
+async def close_redis() -> None:
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+
+__all__ = ["close_redis", "get_redis"]
@@ -1,22 +1,36 @@
+import asyncio
 import json
 import uuid
 import time
+from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Query, Depends
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Query, Depends, Header
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import redis.asyncio as redis
 
-from .deps import get_redis
+from .deps import close_redis, get_redis
 from .settings import settings
 from .catalog.routes import router as catalog_router
-from .task_queue import enqueue_job
-from worker.job_status import touch_job, fetch_job_metadata
+from .realtime import job_event_stream, manager
+from .task_queue import enqueue_job, enqueue_jobs, shutdown_dispatcher
+from worker.job_status import (
+    touch_job, fetch_job_metadata, fetch_job_summaries, forget_jobs, job_stats, parse_event_id, query_job_ids,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close realtime clients first, then let in-flight Celery publishes finish before Redis goes
+    await manager.close()
+    await asyncio.to_thread(shutdown_dispatcher)
+    await close_redis()
 
 
-app = FastAPI(title="Jobs Dashboard API", version="1.0.0")
+app = FastAPI(title="Jobs Dashboard API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware for demo
 app.add_middleware(
@@ -55,6 +69,7 @@ class JobDetail(BaseModel):
     type: str
     state: str
     progress: float
+    seq: Optional[int] = None
     created_at: str
     updated_at: str
     started_at: Optional[str] = None
@@ -69,6 +84,7 @@ class JobList(BaseModel):
     page: int
     page_size: int
     total: int
+    next_cursor: Optional[str] = None
 
 
 def _normalize_job_meta(raw: Dict[str, Any], job_id: str) -> Dict[str, Any]:
@@ -103,35 +119,6 @@ class ServerProvisionRequest(BaseModel):
     user_id: Optional[str] = "demo_user"
 
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: str):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                print(f"Failed to send to WebSocket client: {e}")
-                # Mark for removal
-                disconnected.append(connection)
-        
-        # Remove disconnected clients
-        for connection in disconnected:
-            if connection in self.active_connections:
-                self.active_connections.remove(connection)
-
-
-manager = ConnectionManager()
 
 @app.post("/jobs", response_model=JobResponse)
 async def create_job(job_data: JobCreate):
@@ -195,54 +182,112 @@ async def create_job(job_data: JobCreate):
 @app.get("/jobs", response_model=JobList)
 async def list_jobs(
     state: Optional[str] = Query(None, description="Filter by state: QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED"),
+    job_type: Optional[str] = Query(None, alias="type", description="Filter by job type"),
+    user_id: Optional[str] = Query(None, description="Filter by the user who started the job"),
+    item_id: Optional[str] = Query(None, description="Filter by catalog item"),
     q: Optional[str] = Query(None, description="Search in job ID or type"),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over page"),
+    order: str = Query("created", pattern="^(created|updated)$",
+                       description="created: newest first, stable while jobs run; updated: most recently active first"),
 ):
     """List jobs with optional filtering and pagination"""
     redis_client = await get_redis()
 
-    # Determine which index to use
-    if state:
-        index_key = f"jobs:index:state:{state}"
-    else:
-        index_key = "jobs:index"
-
-    # Get total count
-    total = await redis_client.zcard(index_key)
-
     # Calculate pagination
     start = (page - 1) * page_size
     end = start + page_size - 1
 
-    # Get job IDs (newest first)
-    job_ids = await redis_client.zrevrange(index_key, start, end)
-
-    jobs = []
-    for raw_job_id in job_ids:
-        job_id = raw_job_id.decode() if isinstance(raw_job_id, bytes) else str(raw_job_id)
-        job_meta, _ = await fetch_job_metadata(redis_client, job_id)
-
-        if not job_meta:
-            continue
+    # Filters are applied in Redis before pagination, so pages are full and total is exact
+    try:
+        job_ids, total, next_cursor = await query_job_ids(
+            redis_client,
+            state=state,
+            job_type=job_type,
+            user_id=user_id,
+            item_id=item_id,
+            q=q,
+            start=start,
+            stop=end,
+            cursor=cursor,
+            order=order,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        job_dict = _normalize_job_meta(job_meta, job_id)
+    # Listing rows carry summary fields only; GET /jobs/{job_id} returns params/result/error
+    summaries = await fetch_job_summaries(redis_client, job_ids)
 
-        if q:
-            text = f"{job_dict.get('id', '')} {job_dict.get('type', '')}".lower()
-            if q.lower() not in text:
-                continue
+    # Ids whose records expired before the reaper trimmed them are dropped on sight
+    missing = [job_id for job_id in job_ids if job_id not in summaries]
+    if missing:
+        await forget_jobs(redis_client, missing)
+        total = max(total - len(missing), 0)
 
-        jobs.append(JobDetail(**job_dict))
+    jobs = [JobDetail(**_normalize_job_meta(job_meta, job_id)) for job_id, job_meta in summaries.items()]
 
     return JobList(
         items=jobs,
         page=page,
         page_size=page_size,
-        total=total
+        total=total,
+        next_cursor=next_cursor,
     )
 
 
+@app.get("/jobs/stats")
+async def get_job_stats():
+    """Jobs per state and type, catalog success rates and run time percentiles.
+
+    Served from counters the job status layer maintains on every state transition, so the cost
+    does not grow with the number of jobs.
+    """
+    redis_client = await get_redis()
+    return await job_stats(redis_client)
+
+
+# Server-Sent Events: same events and resume semantics as /ws/jobs, for CLIs and simple clients
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse_resume_from(last_event_id: Optional[str]) -> Optional[str]:
+    if last_event_id:
+        try:
+            parse_event_id(last_event_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return last_event_id or None
+
+
+@app.get("/jobs/events")
+async def stream_jobs_events(
+    job_type: Optional[str] = Query(None, alias="type"),
+    state: Optional[str] = None,
+    item_id: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream job events as SSE, optionally only those of one type, state or catalog item"""
+    topics = [
+        f"{kind}:{value}"
+        for kind, value in (("type", job_type), ("state", state), ("item", item_id))
+        if value
+    ]
+    events = job_event_stream(manager, topics=topics, last_event_id=_sse_resume_from(last_event_id))
+    return StreamingResponse(events, media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """Stream one job's events as SSE, starting from its current state; ends when the job does"""
+    resume_from = _sse_resume_from(last_event_id)
+    job_meta, _ = await fetch_job_metadata(await get_redis(), job_id)
+    if not job_meta:
+        raise HTTPException(status_code=404, detail="Job not found")
+    events = job_event_stream(manager, job_id=job_id, last_event_id=resume_from)
+    return StreamingResponse(events, media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
 @app.get("/jobs/{job_id}", response_model=JobDetail)
 async def get_job(job_id: str):
     """Get job details by ID"""
@@ -302,43 +347,31 @@ async def retry_job(job_id: str):
 
 @app.websocket("/ws/jobs")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time job updates"""
-    await manager.connect(websocket)
-    redis_client = None
-    pubsub = None
-    
+    """WebSocket endpoint for real-time job updates, fed by the process-wide subscriber.
+
+    ``?batch_ms=`` opts into batched array frames sent at most once per window, and the
+    ``jobs.msgpack.v1`` subprotocol into binary MessagePack frames.
+    """
     try:
-        # Create a dedicated Redis client for pubsub
-        redis_client = redis.from_url(settings.REDIS_URL)
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe("channel:jobs")
-        
-        print(f"WebSocket connected and subscribed to channel:jobs")
-        
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                # Forward message to WebSocket clients
-                data = message["data"]
-                if isinstance(data, bytes):
-                    data = data.decode()
-                print(f"Broadcasting WebSocket message: {data}")
-                await manager.broadcast(data)
-    
+        batch_ms = int(websocket.query_params.get("batch_ms") or 0)
+    except ValueError:
+        batch_ms = 0
+    await manager.connect(websocket, batch_ms=batch_ms, subprotocols=websocket.scope.get("subprotocols"))
+    try:
+        while True:
+            await manager.handle_frame(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
         print("WebSocket disconnected")
-        manager.disconnect(websocket)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
     finally:
-        try:
-            if pubsub:
-                await pubsub.unsubscribe("channel:jobs")
-                await pubsub.close()
-            if redis_client:
-                await redis_client.close()
-        except Exception as e:
-            print(f"Error cleaning up WebSocket resources: {e}")
+        manager.disconnect(websocket)
+
+
+@app.get("/ws/jobs/stats")
+async def websocket_stats():
+    """Connection, queue depth and drop/coalesce counters for this process's /ws/jobs clients"""
+    return manager.stats()
 
 
 @app.post("/dev/seed")
@@ -352,12 +385,11 @@ async def seed_jobs():
         {"report_type": "performance_metrics", "parameters": {"team": "engineering", "sprint": "2024-02"}}
     ]
     
-    job_ids = []
-    for job_data in demo_jobs:
-        job_id = str(uuid.uuid4())
-        await enqueue_job("example_long_task", job_id, payload=job_data)
-        job_ids.append(job_id)
-    
+    redis_client = await get_redis()
+    job_ids = await enqueue_jobs(
+        "example_long_task", demo_jobs, redis_client=redis_client, job_type="example_long_task"
+    )
+
     return {"message": f"Seeded {len(job_ids)} demo jobs", "job_ids": job_ids}
 
 
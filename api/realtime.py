@@ -0,0 +1,747 @@
+"""Real-time fan-out of job events to WebSocket clients.
+
+Each API process runs a single subscriber task on ``channel:jobs`` and hands every message to
+each connected socket exactly once, instead of holding one Redis subscription per socket.
+
+Clients narrow what they receive with subscribe/unsubscribe frames naming topics:
+
+    {"action": "subscribe", "topics": ["job:<id>", "type:<job type>", "state:FAILED", "item:<item id>"]}
+
+A socket that has not subscribed to anything receives every event, as before. After a reconnect,
+``{"action": "resume", "last_event_id": "<id>"}`` replays the events it missed from the job
+event stream before live delivery continues. Events delivered live before the resume frame can
+arrive ahead of older replayed ones, so clients apply each job's events in ``seq`` order.
+
+Connecting with ``/ws/jobs?batch_ms=100`` opts into batching: events are collected for that
+window and sent as one JSON array frame, with each job's events merged into one.
+
+The same manager serves the Server-Sent Events endpoints: each SSE response registers an
+``EventStreamClient`` and is routed, queued and resumed exactly like a socket.
+
+Clients offering the ``jobs.msgpack.v1`` WebSocket subprotocol (and servers with ``msgpack``
+installed) get binary MessagePack frames with short keys and epoch timestamps; JSON text frames
+remain the default.
+
+Sends never block the subscriber: each socket has a bounded queue drained by its own writer
+task. A full queue is coalesced to the latest event per job (clients re-fetch on the ``seq``
+gap), and a socket whose send does not complete within ``WS_SEND_TIMEOUT_SECONDS`` is closed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - only needed for the msgpack subprotocol
+    msgpack = None
+
+from worker.job_status import _TERMINAL_STATES, fetch_job_metadata, parse_event_id, read_job_events
+
+from . import deps
+from .settings import settings
+
+JOBS_CHANNEL = "channel:jobs"
+TOPIC_KINDS = ("job", "type", "state", "item")
+# Job attributes used for routing deltas, which carry only the job id and the changed fields
+JOB_ROUTING_CACHE_SIZE = 10000
+
+
+def _routing_attributes(job: Dict[str, Any]) -> Dict[str, Any]:
+    params = job.get("params") if isinstance(job.get("params"), dict) else {}
+    return {
+        "type": job.get("type"),
+        "state": job.get("state"),
+        "item": job.get("item_id") or params.get("item_id"),
+    }
+
+
+MSGPACK_SUBPROTOCOL = "jobs.msgpack.v1"
+# Short keys for msgpack frames, applied to the event and its job/changes objects (not to the
+# contents of params/result/error). Unlisted keys are kept as they are.
+COMPACT_KEYS = {
+    "type": "t",
+    "seq": "s",
+    "first_seq": "fs",
+    "id": "i",
+    "event_id": "e",
+    "job": "j",
+    "changes": "c",
+    "state": "st",
+    "progress": "p",
+    "params": "pa",
+    "result": "r",
+    "error": "er",
+    "created_at": "ca",
+    "updated_at": "ua",
+    "started_at": "sa",
+    "finished_at": "fa",
+}
+COMPACT_EVENT_TYPES = {"upsert": "u", "delta": "d"}
+_PACKED_CACHE_SIZE = 1024
+
+
+def _epoch(value: Any) -> Any:
+    """ISO timestamps (naive ones are UTC, as the workers write them) as epoch seconds."""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _compact_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        COMPACT_KEYS.get(key, key): _epoch(value) if key.endswith("_at") else value
+        for key, value in fields.items()
+    }
+
+
+def compact_event(event: Any) -> Any:
+    """Shorten an event's keys and turn its ``*_at`` timestamps into epoch seconds."""
+    if not isinstance(event, dict):
+        return event
+    compact = _compact_fields(event)
+    for key in ("job", "changes"):
+        if isinstance(event.get(key), dict):
+            compact[COMPACT_KEYS[key]] = _compact_fields(event[key])
+    if "type" in event:
+        compact["t"] = COMPACT_EVENT_TYPES.get(event["type"], event["type"])
+    return compact
+
+
+def encode_msgpack(message: str) -> bytes:
+    """MessagePack frame for a JSON event (or array of events, when batching)."""
+    data = json.loads(message)
+    if isinstance(data, list):
+        return msgpack.packb([compact_event(event) for event in data])
+    return msgpack.packb(compact_event(data))
+
+
+def merge_job_events(batch: List[Tuple[Optional[str], str]]) -> List[str]:
+    """Collapse a window of queued events to one per job, keeping non-job messages as they are.
+
+    A delta following an upsert is applied to its snapshot; consecutive deltas are combined into
+    one whose ``first_seq`` is the first merged ``seq``, so clients can tell nothing was lost.
+    """
+    merged: "OrderedDict[Any, Any]" = OrderedDict()
+    for position, (job_id, message) in enumerate(batch):
+        if job_id is None:
+            merged[("message", position)] = message
+            continue
+        previous = merged.pop(job_id, None)
+        if previous is None:
+            merged[job_id] = message
+            continue
+        if isinstance(previous, str):
+            previous = json.loads(previous)
+        event = json.loads(message)
+        if event.get("type") == "delta" and previous.get("type") == "upsert":
+            previous["job"].update(event.get("changes") or {})
+            previous["job"]["seq"] = event.get("seq")
+            event = {**previous, "seq": event.get("seq"), "event_id": event.get("event_id", previous.get("event_id"))}
+        elif event.get("type") == "delta" and previous.get("type") == "delta":
+            event = {
+                **event,
+                "first_seq": previous.get("first_seq", previous.get("seq")),
+                "changes": {**(previous.get("changes") or {}), **(event.get("changes") or {})},
+            }
+        merged[job_id] = event
+    return [value if isinstance(value, str) else json.dumps(value) for value in merged.values()]
+
+
+def parse_topic(topic: Any) -> str:
+    """Validate a ``kind:value`` topic string; raises ValueError for anything else."""
+    if not isinstance(topic, str):
+        raise ValueError(f"topic must be a string, got {topic!r}")
+    kind, _, value = topic.partition(":")
+    if kind not in TOPIC_KINDS or not value:
+        raise ValueError(f"invalid topic {topic!r}; expected one of {', '.join(k + ':<value>' for k in TOPIC_KINDS)}")
+    return topic
+
+
+class _ClientQueue:
+    """Messages waiting to be written to one socket, as (job id or None, text) pairs."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pending: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: asyncio.Task | None = None
+        self.batch_window = 0.0
+        self.binary = False
+        # Live events held back while a resume replays the stream, as (job id, text, event id);
+        # bounded like the send queue, past which they are dropped and the client told to resync
+        self.held: List[Tuple[Optional[str], str, Optional[str]]] | None = None
+        self.held_overflow = False
+
+
+class ConnectionManager:
+    """Tracks WebSocket clients and feeds them from one shared pub/sub subscription.
+
+    The subscriber starts with the first client and stops after the last one disconnects.
+    """
+
+    def __init__(
+        self,
+        channel: str = JOBS_CHANNEL,
+        *,
+        redis_factory: Callable[[], Awaitable[Any]] | None = None,
+        retry_delay: float = 1.0,
+        queue_size: int | None = None,
+        send_timeout: float | None = None,
+    ):
+        self.channel = channel
+        self.retry_delay = retry_delay
+        self.queue_size = max(settings.WS_SEND_QUEUE_SIZE if queue_size is None else queue_size, 1)
+        self.send_timeout = settings.WS_SEND_TIMEOUT_SECONDS if send_timeout is None else send_timeout
+        self.metrics: Dict[str, int] = {
+            "received": 0,
+            "sent": 0,
+            "send_errors": 0,
+            "routing_lookups": 0,
+            "replayed": 0,
+            "batches": 0,
+            "merged": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "slow_disconnects": 0,
+        }
+        self._clients: Dict[WebSocket, _ClientQueue] = {}
+        # topic -> sockets subscribed to it, and the reverse for unsubscribe/disconnect
+        self.topic_index: Dict[str, Set[WebSocket]] = {}
+        self.socket_topics: Dict[WebSocket, Set[str]] = {}
+        self._job_routing: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Subscribed topics other than job:<id>; while there are none, events route by id alone
+        self._attribute_topics = 0
+        # job id -> (event, text) waiting on a routing lookup, and the lookups in flight
+        self._unresolved: Dict[str, List[Tuple[Dict[str, Any], str]]] = {}
+        self._resolvers: Set[asyncio.Task] = set()
+        # msgpack frames of recent events, so each is encoded once however many clients get it
+        self._packed: "OrderedDict[str, bytes]" = OrderedDict()
+        self._redis_factory = redis_factory
+        self._subscriber: asyncio.Task | None = None
+        self.subscribed = asyncio.Event()
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients)
+
+    async def connect(self, websocket: WebSocket, *, batch_ms: int = 0, subprotocols: List[str] | None = None):
+        """Accept and register a socket. ``batch_ms`` (capped at WS_MAX_BATCH_MS) opts into
+        batched array frames; the effective window is confirmed in a ``batching`` message.
+        Offering ``MSGPACK_SUBPROTOCOL`` selects binary MessagePack frames."""
+        client = _ClientQueue(websocket)
+        if msgpack is not None and MSGPACK_SUBPROTOCOL in (subprotocols or ()):
+            client.binary = True
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+        else:
+            await websocket.accept()
+        batch_ms = min(max(int(batch_ms or 0), 0), settings.WS_MAX_BATCH_MS)
+        if batch_ms:
+            client.batch_window = batch_ms / 1000
+            client.pending.append((None, json.dumps({"type": "batching", "batch_ms": batch_ms})))
+            client.ready.set()
+        client.writer = asyncio.create_task(self._write(client))
+        self._clients[websocket] = client
+        self.ensure_subscriber()
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client is not None and client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        self.unsubscribe(websocket, list(self.socket_topics.get(websocket, ())))
+        if not self.active_connections:
+            self._stop_subscriber()
+
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> Set[str]:
+        topics = [parse_topic(topic) for topic in topics]
+        subscribed = self.socket_topics.setdefault(websocket, set())
+        for topic in topics:
+            subscribed.add(topic)
+            sockets = self.topic_index.get(topic)
+            if sockets is None:
+                sockets = self.topic_index[topic] = set()
+                if not topic.startswith("job:"):
+                    self._attribute_topics += 1
+            sockets.add(websocket)
+        return subscribed
+
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]) -> Set[str]:
+        subscribed = self.socket_topics.get(websocket, set())
+        for topic in topics:
+            subscribed.discard(topic)
+            sockets = self.topic_index.get(topic)
+            if sockets is not None:
+                sockets.discard(websocket)
+                if not sockets:
+                    del self.topic_index[topic]
+                    if not topic.startswith("job:"):
+                        self._attribute_topics -= 1
+        if not subscribed:
+            self.socket_topics.pop(websocket, None)
+        return subscribed
+
+    async def handle_frame(self, websocket: WebSocket, text: str) -> None:
+        """Apply a client subscribe/unsubscribe/resume frame and acknowledge it."""
+        try:
+            frame = json.loads(text)
+            action = frame.get("action") if isinstance(frame, dict) else None
+            if action == "resume":
+                reply = await self.resume(websocket, frame.get("last_event_id"))
+            else:
+                topics = frame.get("topics", []) if isinstance(frame, dict) else []
+                if action not in ("subscribe", "unsubscribe") or not isinstance(topics, list):
+                    raise ValueError(
+                        'expected {"action": "subscribe" | "unsubscribe", "topics": [...]} '
+                        'or {"action": "resume", "last_event_id": "..."}'
+                    )
+                if action == "subscribe":
+                    current = self.subscribe(websocket, topics)
+                else:
+                    current = self.unsubscribe(websocket, topics)
+                reply = {"type": "subscriptions", "topics": sorted(current)}
+        except ValueError as e:
+            reply = {"type": "error", "error": str(e)}
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, None, json.dumps(reply))
+        else:
+            await websocket.send_text(json.dumps(reply))
+
+    async def resume(self, websocket: WebSocket, last_event_id: Any) -> Dict[str, Any]:
+        """Queue the socket's matching events after ``last_event_id`` from the job event stream.
+
+        Live events arriving meanwhile are held (up to the send queue size) and released
+        afterwards, minus those already replayed, so the client sees each event once and in
+        order. Returns the acknowledgement, sent after the replayed events; ``resync`` tells the
+        client the stream no longer reaches back that far, or that more live events arrived
+        during the replay than could be held, and that it should reload instead.
+
+        Live events delivered before the resume frame arrived are not recalled, so they reach
+        the client ahead of older replayed ones: clients apply events by ``seq`` per job.
+        """
+        client = self._clients.get(websocket)
+        if client is None:
+            raise ValueError("not connected")
+        replayed_up_to = parse_event_id(last_event_id)
+        client.held = []
+        client.held_overflow = False
+        replayed = 0
+        try:
+            events, truncated = await read_job_events(await self._redis(), last_event_id)
+            for event_id, message in events:
+                event = json.loads(message)
+                job_id = event.get("id") or (event.get("job") or {}).get("id")
+                if await self._wants(websocket, event, job_id):
+                    self._enqueue(client, job_id, message)
+                    replayed += 1
+                replayed_up_to = parse_event_id(event_id)
+        finally:
+            held, client.held = client.held, None
+            for job_id, message, event_id in held:
+                if event_id is None or parse_event_id(event_id) > replayed_up_to:
+                    self._enqueue(client, job_id, message)
+        self.metrics["replayed"] += replayed
+        return {"type": "resumed", "replayed": replayed, "resync": truncated or client.held_overflow}
+
+    async def _wants(self, websocket: WebSocket, event: Dict[str, Any], job_id: Optional[str]) -> bool:
+        topics = self.socket_topics.get(websocket)
+        if topics is None:
+            return True
+        if not job_id:
+            return False
+        routing = {"job": job_id}
+        if any(not topic.startswith("job:") for topic in topics):
+            # Replays run on the socket's own task, so a lookup here delays nobody else
+            routing = self._cached_routing(event, remember=False)
+            if routing is None:
+                attributes = await self._lookup_routing(job_id)
+                routing = {"job": job_id, **self._apply_changes(event, attributes or {})}
+        return any(f"{kind}:{value}" in topics for kind, value in routing.items() if value)
+
+    @staticmethod
+    def _apply_changes(event: Dict[str, Any], attributes: Dict[str, Any]) -> Dict[str, Any]:
+        changes = event.get("changes") or {}
+        if "state" in changes:
+            return {**attributes, "state": changes["state"]}
+        return attributes
+
+    def _cached_routing(self, event: Dict[str, Any], *, remember: bool = True) -> Optional[Dict[str, Any]]:
+        """Type/state/item of the job an event is about, from the event itself or the cache;
+        None for a delta about a job that is not cached.
+
+        Replayed events pass ``remember=False`` so they do not overwrite newer cached state.
+        """
+        if event.get("type") == "upsert" and isinstance(event.get("job"), dict):
+            job_id = event["job"].get("id")
+            attributes = _routing_attributes(event["job"])
+        else:
+            job_id = event.get("id")
+            attributes = self._job_routing.get(job_id)
+            if attributes is None:
+                return None
+            attributes = self._apply_changes(event, attributes)
+        if job_id and remember:
+            self._remember(job_id, attributes)
+        return {"job": job_id, **attributes}
+
+    def _remember(self, job_id: str, attributes: Dict[str, Any]) -> None:
+        self._job_routing[job_id] = attributes
+        self._job_routing.move_to_end(job_id)
+        while len(self._job_routing) > JOB_ROUTING_CACHE_SIZE:
+            self._job_routing.popitem(last=False)
+
+    async def _lookup_routing(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self.metrics["routing_lookups"] += 1
+        try:
+            job, _ = await fetch_job_metadata(await self._redis(), job_id)
+        except Exception as e:
+            print(f"Could not look up job {job_id} for routing: {e}")
+            return None
+        return _routing_attributes(job or {})
+
+    async def _resolve(self, job_id: str) -> None:
+        """Look up a job first seen mid-flight, then deliver the events that waited for it."""
+        try:
+            attributes = await self._lookup_routing(job_id)
+            if attributes is not None:
+                self._remember(job_id, attributes)
+        finally:
+            waiting = self._unresolved.pop(job_id, [])
+        for event, message in waiting:
+            self._deliver(job_id, message, event.get("event_id"), self._cached_routing(event) or {"job": job_id})
+
+    def recipients(self, routing: Optional[Dict[str, Any]]) -> List[WebSocket]:
+        """Sockets that should receive an event: unfiltered ones plus those subscribed to one
+        of the job's topics."""
+        recipients = [ws for ws in self._clients if ws not in self.socket_topics]
+        if not self.topic_index or not routing:
+            return recipients
+        matched: Set[WebSocket] = set()
+        for kind, value in routing.items():
+            if value:
+                matched.update(self.topic_index.get(f"{kind}:{value}", ()))
+        recipients.extend(ws for ws in self._clients if ws in matched)
+        return recipients
+
+    async def dispatch(self, message: str) -> None:
+        """Queue a job event once for each socket that should see it.
+
+        Never waits on Redis: a delta for a job whose type/state/item are not cached, while
+        someone subscribes by those, is parked with the job's later events until a background
+        lookup resolves it, so other jobs' events keep flowing.
+        """
+        try:
+            event = json.loads(message)
+        except (TypeError, ValueError):
+            event = None
+        if not isinstance(event, dict):
+            event = None
+        job_id = (event.get("id") or (event.get("job") or {}).get("id")) if event else None
+        routing = {"job": job_id} if job_id else None
+        if job_id and self._attribute_topics:
+            waiting = self._unresolved.get(job_id)
+            if waiting is not None:
+                waiting.append((event, message))
+                return
+            routing = self._cached_routing(event)
+            if routing is None:
+                self._unresolved[job_id] = [(event, message)]
+                task = asyncio.create_task(self._resolve(job_id))
+                self._resolvers.add(task)
+                task.add_done_callback(self._resolvers.discard)
+                return
+        self._deliver(job_id, message, event.get("event_id") if event else None, routing)
+
+    def _deliver(self, job_id: Optional[str], message: str, event_id: Optional[str],
+                 routing: Optional[Dict[str, Any]]) -> None:
+        for websocket in self.recipients(routing):
+            client = self._clients.get(websocket)
+            if client is None:
+                continue
+            if client.held is None:
+                self._enqueue(client, job_id, message)
+            elif client.held_overflow:
+                self.metrics["dropped"] += 1
+            elif len(client.held) >= self.queue_size:
+                self.metrics["dropped"] += len(client.held) + 1
+                client.held.clear()
+                client.held_overflow = True
+            else:
+                client.held.append((job_id, message, event_id))
+
+    async def broadcast(self, message: str):
+        for client in list(self._clients.values()):
+            self._enqueue(client, None, message)
+
+    def _enqueue(self, client: _ClientQueue, job_id: Optional[str], message: str) -> None:
+        if len(client.pending) >= self.queue_size:
+            self._coalesce(client)
+        if len(client.pending) >= self.queue_size:
+            client.pending.popleft()
+            self.metrics["dropped"] += 1
+        client.pending.append((job_id, message))
+        client.ready.set()
+
+    def _coalesce(self, client: _ClientQueue) -> None:
+        """Keep only the newest queued event per job; the client sees a ``seq`` gap and
+        re-fetches the job."""
+        seen: Set[str] = set()
+        kept: List[Tuple[Optional[str], str]] = []
+        for job_id, message in reversed(client.pending):
+            if job_id is not None:
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+            kept.append((job_id, message))
+        self.metrics["coalesced"] += len(client.pending) - len(kept)
+        client.pending = deque(reversed(kept))
+
+    async def _write(self, client: _ClientQueue) -> None:
+        while True:
+            await client.ready.wait()
+            if client.batch_window:
+                await asyncio.sleep(client.batch_window)
+                batch = list(client.pending)
+                client.pending.clear()
+                messages = merge_job_events(batch)
+                self.metrics["merged"] += len(batch) - len(messages)
+                if not await self._send(client, "[" + ",".join(messages) + "]"):
+                    return
+                self.metrics["batches"] += 1
+            while client.pending and not client.batch_window:
+                _, message = client.pending.popleft()
+                if not await self._send(client, message):
+                    return
+            if not client.pending:
+                client.ready.clear()
+
+    def _encode_binary(self, message: str) -> bytes:
+        packed = self._packed.get(message)
+        if packed is None:
+            packed = encode_msgpack(message)
+            self._packed[message] = packed
+            while len(self._packed) > _PACKED_CACHE_SIZE:
+                self._packed.popitem(last=False)
+        return packed
+
+    async def _send(self, client: _ClientQueue, text: str) -> bool:
+        websocket = client.websocket
+        try:
+            if client.binary:
+                send = websocket.send_bytes(self._encode_binary(text))
+            else:
+                send = websocket.send_text(text)
+            await asyncio.wait_for(send, timeout=self.send_timeout)
+            self.metrics["sent"] += 1
+            return True
+        except asyncio.TimeoutError:
+            print(f"WebSocket client stalled for {self.send_timeout}s with {len(client.pending)} queued; disconnecting")
+            self.metrics["slow_disconnects"] += 1
+            await self._drop(websocket, code=1013)
+        except Exception as e:
+            print(f"Failed to send to WebSocket client: {e}")
+            self.metrics["send_errors"] += 1
+            await self._drop(websocket)
+        return False
+
+    async def _drop(self, websocket: WebSocket, code: int = 1011) -> None:
+        self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=1.0)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [len(client.pending) for client in self._clients.values()]
+        return {
+            "connections": len(depths),
+            "subscribed": self.subscribed.is_set(),
+            "queue_size": self.queue_size,
+            "queue_depth": {"total": sum(depths), "max": max(depths, default=0)},
+            "topics": len(self.topic_index),
+            **self.metrics,
+        }
+
+    def ensure_subscriber(self) -> None:
+        if self._subscriber is None or self._subscriber.done():
+            self._subscriber = asyncio.create_task(self._run_subscriber())
+
+    def _stop_subscriber(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            self._subscriber = None
+        self.subscribed.clear()
+
+    async def close(self) -> None:
+        for websocket in list(self._clients):
+            self.disconnect(websocket)
+        for resolver in list(self._resolvers):
+            resolver.cancel()
+        task = self._subscriber
+        self._stop_subscriber()
+        if task is not None:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _redis(self):
+        if self._redis_factory is not None:
+            return await self._redis_factory()
+        return await deps.get_redis()
+
+    async def _run_subscriber(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                redis_client = await self._redis()
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(self.channel)
+                self.subscribed.set()
+                print(f"Subscribed to {self.channel} for {len(self.active_connections)} WebSocket client(s)")
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    self.metrics["received"] += 1
+                    await self.dispatch(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job event subscriber failed ({e}); retrying in {self.retry_delay}s")
+                self.subscribed.clear()
+                await asyncio.sleep(self.retry_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.unsubscribe(self.channel)
+                        await pubsub.aclose()
+                    except Exception as e:
+                        print(f"Error closing job event subscription: {e}")
+
+
+class EventStreamClient:
+    """Stands in for a WebSocket so an SSE response can be registered with the ConnectionManager.
+
+    The manager's writer hands messages over one at a time; a response that stops reading
+    stalls the writer and is dropped like a slow socket.
+    """
+
+    def __init__(self):
+        self.outbox: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=1)
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        await self.outbox.put(message)
+
+    async def close(self, code: int = 1000) -> None:
+        while not self.outbox.empty():
+            self.outbox.get_nowait()
+        self.outbox.put_nowait(None)
+
+
+def format_sse(data: str, *, event: str | None = None, event_id: str | None = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def job_event_stream(
+    connections: ConnectionManager,
+    *,
+    topics: List[str] | None = None,
+    job_id: str | None = None,
+    last_event_id: str | None = None,
+    heartbeat: float | None = None,
+) -> AsyncIterator[str]:
+    """SSE frames for the job events matching ``topics``, or for one job with ``job_id``.
+
+    With ``last_event_id`` the missed events are replayed first; otherwise a single job stream
+    starts with the job's current snapshot. A single job stream ends once the job reaches a
+    terminal state. Comment lines are sent as heartbeats while there is nothing to send.
+    """
+    heartbeat = settings.SSE_HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    client = EventStreamClient()
+    await connections.connect(client)
+    try:
+        topics = [f"job:{job_id}"] if job_id else topics
+        if topics:
+            connections.subscribe(client, topics)
+        try:
+            await asyncio.wait_for(connections.subscribed.wait(), timeout=heartbeat)
+        except asyncio.TimeoutError:
+            pass
+
+        job: Dict[str, Any] = {}
+        if job_id:
+            job, _ = await fetch_job_metadata(await connections._redis(), job_id)
+        seen_seq = 0
+        if last_event_id:
+            ack = await connections.resume(client, last_event_id)
+            if ack["resync"]:
+                yield format_sse(json.dumps(ack), event="resync")
+            if job.get("state") in _TERMINAL_STATES and not ack["replayed"]:
+                return
+        elif job_id:
+            seen_seq = int(job.get("seq") or 0)
+            yield format_sse(json.dumps({"type": "upsert", "seq": seen_seq, "job": job}, default=str), event="upsert")
+            if job.get("state") in _TERMINAL_STATES:
+                return
+
+        while True:
+            try:
+                message = await asyncio.wait_for(client.outbox.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if message is None:
+                return
+            event = json.loads(message)
+            # Published before the snapshot was read
+            if job_id and event.get("seq", 0) <= seen_seq:
+                continue
+            yield format_sse(message, event=event.get("type"), event_id=event.get("event_id"))
+            if job_id and event.get("type") == "upsert" and event["job"].get("state") in _TERMINAL_STATES:
+                return
+    finally:
+        connections.disconnect(client)
+
+
+manager = ConnectionManager()
+
+
+__all__ = [
+    "ConnectionManager",
+    "EventStreamClient",
+    "COMPACT_KEYS",
+    "JOBS_CHANNEL",
+    "MSGPACK_SUBPROTOCOL",
+    "TOPIC_KINDS",
+    "compact_event",
+    "encode_msgpack",
+    "format_sse",
+    "job_event_stream",
+    "manager",
+    "merge_job_events",
+    "parse_topic",
+]
@@ -10,17 +10,28 @@ class Settings(BaseSettings):
     CELERY_TASK_TIME_LIMIT: int = 60 * 30  # 30 minutes
     CELERY_TASK_SOFT_TIME_LIMIT: int = 60 * 25  # 25 minutes
     CELERY_BEAT_SCHEDULE_TZ: str = "UTC"
+    CELERY_DISPATCH_THREADS: int = 4  # threads publishing tasks off the event loop; 0 publishes inline
     CELERY_TASKS: list[str] = [
         "example_long_task",
         "run_catalog_item",
         "import_catalog_item_task",
         "sync_catalog_registry_task",
+        "sync_catalog_bundles_task",
+        "catalog_storage_gc_task",
         "sync_catalog_item",
         "sync_catalog_item_from_git",
         "provision_server_task",
     ]
     JOB_TTL: int = 60 * 60 * 24 * 3  # 3 days
     JOB_STATUS_PREFIX: str = "job:"
+    JOB_PROGRESS_MAX_WRITES_PER_SECOND: float = 4.0  # per job; 0 disables coalescing
+    JOB_QUERY_CACHE_SECONDS: int = 5  # how long filtered /jobs listings are cached in Redis
+    JOB_INDEX_REAP_INTERVAL_SECONDS: int = 60 * 60  # trim expired ids from jobs:index*; 0 disables
+    JOB_EVENT_STREAM_MAXLEN: int = 10000  # approximate cap of jobs:stream for resuming clients; 0 disables
+    WS_SEND_QUEUE_SIZE: int = 256  # queued events per WebSocket client before coalescing
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0  # a client whose send stalls this long is disconnected
+    WS_MAX_BATCH_MS: int = 1000  # upper bound for the batch window a /ws/jobs client may request
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # comment line sent on idle /jobs/*events streams
     
     class Config:
         env_file = ".env"
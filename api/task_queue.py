@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from types import SimpleNamespace
-from typing import Any
+from typing import Any, Callable, Sequence
 
 from .settings import settings
 from worker.celery_tasks import (
+    catalog_storage_gc_task,
     example_long_task,
     import_catalog_item_task,
     provision_server_task,
     run_catalog_item,
+    sync_catalog_bundles_task,
     sync_catalog_item,
     sync_catalog_item_from_git,
     sync_catalog_registry_task,
 )
+from worker.job_status import touch_jobs
 
 
 _CELERY_TASK_MAP = {
@@ -21,11 +30,46 @@ _CELERY_TASK_MAP = {
     "provision_server_task": provision_server_task,
     "import_catalog_item_task": import_catalog_item_task,
     "sync_catalog_registry_task": sync_catalog_registry_task,
+    "sync_catalog_bundles_task": sync_catalog_bundles_task,
+    "catalog_storage_gc_task": catalog_storage_gc_task,
     "sync_catalog_item": sync_catalog_item,
     "sync_catalog_item_from_git": sync_catalog_item_from_git,
 }
 
 
+# Celery's publish is blocking broker I/O; it runs on these threads (sharing Celery's pooled
+# producers) so the event loop keeps serving requests meanwhile
+_dispatcher: ThreadPoolExecutor | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def _get_dispatcher() -> ThreadPoolExecutor:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(
+                max_workers=settings.CELERY_DISPATCH_THREADS,
+                thread_name_prefix="celery-dispatch",
+            )
+        return _dispatcher
+
+
+async def _dispatch(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking broker call on the dispatcher threads (inline when they are disabled)."""
+    if settings.CELERY_DISPATCH_THREADS <= 0:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_dispatcher(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_dispatcher(wait: bool = True) -> None:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.shutdown(wait=wait)
+            _dispatcher = None
+
+
 def _infer_job_id(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
     if args:
         return args[0]
@@ -47,8 +91,79 @@ async def enqueue_job(task_name: str, *args: Any, **kwargs: Any):
         raise ValueError("enqueue_job requires a job_id as the first positional argument or keyword")
 
     celery_task = _get_celery_task(task_name)
-    result = celery_task.delay(*args, **kwargs)
+    result = await _dispatch(celery_task.delay, *args, **kwargs)
     return SimpleNamespace(job_id=job_id or getattr(result, "id", None))
 
 
-__all__ = ["enqueue_job"]
+def _publish_many(celery_task, calls: list[tuple[tuple[Any, ...], dict[str, Any]]], published: list[Any]) -> None:
+    """Publish every call through one pooled producer, i.e. over a single broker connection.
+
+    Each call's first argument (its job id) is appended to ``published`` once it is sent, so a
+    caller can tell how far a failed batch got.
+    """
+    with celery_task.app.producer_or_acquire() as producer:
+        for args, kwargs in calls:
+            celery_task.apply_async(args, kwargs, producer=producer)
+            published.append(args[0])
+
+
+async def enqueue_jobs(
+    task_name: str,
+    payloads: Sequence[dict[str, Any]],
+    *,
+    redis_client,
+    job_type: str,
+) -> list[str]:
+    """Enqueue one ``task_name`` job per payload and create their QUEUED status records.
+
+    The status records are written in one Redis pipeline before the tasks are published in one
+    batch on a dispatcher thread, so a worker that starts a job straight away never has its
+    progress overwritten by the QUEUED record. If publishing fails, the jobs that were not sent
+    are marked FAILED and the error is re-raised. Returns the new job ids, in payload order.
+    """
+    celery_task = _get_celery_task(task_name)
+    if not payloads:
+        return []
+
+    now = datetime.utcnow().isoformat()
+    records = [
+        {
+            "id": str(uuid.uuid4()),
+            "state": "QUEUED",
+            "type": job_type,
+            "progress": 0,
+            "created_at": now,
+            "updated_at": now,
+            "params": payload,
+        }
+        for payload in payloads
+    ]
+    await touch_jobs(redis_client, records)
+
+    published: list[str] = []
+    try:
+        await _dispatch(
+            _publish_many,
+            celery_task,
+            [((record["id"],), {"payload": record["params"]}) for record in records],
+            published,
+        )
+    except Exception as exc:
+        failed_at = datetime.utcnow().isoformat()
+        sent = set(published)
+        await touch_jobs(redis_client, [
+            {
+                **record,
+                "state": "FAILED",
+                "updated_at": failed_at,
+                "finished_at": failed_at,
+                "error": {"error_type": type(exc).__name__, "error_message": f"Failed to enqueue: {exc}"},
+            }
+            for record in records
+            if record["id"] not in sent
+        ])
+        raise
+    return [record["id"] for record in records]
+
+
+__all__ = ["enqueue_job", "enqueue_jobs", "shutdown_dispatcher"]
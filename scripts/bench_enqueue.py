@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark enqueue_job under concurrent submissions: publishing inline on the event loop vs on
+the dispatcher threads.
+
+Submissions arrive at a fixed --rate, as concurrent requests would. Reports submission latency
+(arrival to enqueue_job returning, so time spent waiting for a blocked loop counts) and event
+loop lag (how late a 1 ms ticker wakes up, i.e. how long other requests on the process stall).
+
+By default the broker publish is simulated by a blocking sleep of --rtt-ms; with --broker-url
+tasks are really published (to a queue no worker consumes, so nothing runs).
+
+    python scripts/bench_enqueue.py --rate 1000 --submissions 1000
+    python scripts/bench_enqueue.py --broker-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from api import task_queue
+from api.settings import settings
+from worker import celery_tasks
+from worker.celery_app import celery_app
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+async def measure_loop_lag(lags, interval=0.001):
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - expected, 0.0))
+
+
+async def run(name, threads, args):
+    settings.CELERY_DISPATCH_THREADS = threads
+    task_queue.shutdown_dispatcher()
+    latencies, lags = [], []
+
+    async def submit(i, arrival):
+        await asyncio.sleep(max(arrival - time.perf_counter(), 0))
+        await task_queue.enqueue_job("example_long_task", f"bench-{name}-{i}", payload={"bench": True})
+        latencies.append(time.perf_counter() - arrival)
+
+    ticker = asyncio.create_task(measure_loop_lag(lags))
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await asyncio.gather(*(submit(i, started + i / args.rate) for i in range(args.submissions)))
+    elapsed = time.perf_counter() - started
+    ticker.cancel()
+    task_queue.shutdown_dispatcher()
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "name": name,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "per_s": args.submissions / elapsed,
+        "lag_p99_ms": percentile(lags, 0.99) * 1e3 if lags else 0.0,
+        "lag_max_ms": lags[-1] * 1e3 if lags else 0.0,
+        "lag_mean_ms": statistics.mean(lags) * 1e3 if lags else 0.0,
+    }
+
+
+async def main_async(args):
+    settings.CELERY_TASKS = ["example_long_task"]
+    if args.broker_url:
+        celery_app.conf.broker_url = args.broker_url
+        celery_app.conf.task_default_queue = "bench-enqueue"
+        target = args.broker_url
+    else:
+        def simulated_delay(*_args, **_kwargs):
+            time.sleep(args.rtt_ms / 1000)
+            return SimpleNamespace(id="simulated")
+
+        celery_tasks.example_long_task.delay = simulated_delay
+        target = f"simulated broker ({args.rtt_ms} ms per publish)"
+
+    print(f"⏱️  enqueue_job: {args.submissions} submissions at {args.rate:.0f}/s, {target}")
+    print("=" * 70)
+    results = [
+        await run("inline", 0, args),
+        await run(f"dispatcher x{args.threads}", args.threads, args),
+    ]
+
+    print(f"{'variant':<16}{'p50 ms':>9}{'p99 ms':>9}{'jobs/s':>9}{'loop lag p99':>14}{'max':>9}")
+    for r in results:
+        print(f"{r['name']:<16}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['per_s']:>9.0f}"
+              f"{r['lag_p99_ms']:>14.2f}{r['lag_max_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=800, help="submissions arriving per second")
+    parser.add_argument("--threads", type=int, default=settings.CELERY_DISPATCH_THREADS)
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="simulated publish round trip")
+    parser.add_argument("--broker-url", default=None, help="publish to a real broker instead")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare bytes and encode cost per job update across realtime frame encodings:
+
+  snapshot JSON      full job on every update, as publish_job_update sends it
+  delta JSON         what the job scripts publish now (encoded inside Redis, relayed as-is)
+  snapshot msgpack   the snapshot through the jobs.msgpack.v1 compact encoding
+  delta msgpack      the delta through the jobs.msgpack.v1 compact encoding
+
+Events come from a catalog job driven through touch_job/set_status on fakeredis.
+
+    python scripts/bench_event_encoding.py --updates 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from api.realtime import encode_msgpack
+from worker.job_status import _clean_for_json, fetch_job_metadata, set_status, touch_job
+
+
+async def capture_events(updates):
+    """Run one job through its lifecycle; return the published events and the job's snapshot
+    after each write."""
+    import fakeredis.aioredis
+
+    redis_client = fakeredis.aioredis.FakeRedis()
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    job_id = "bench-encoding"
+    snapshots = []
+    try:
+        await touch_job(redis_client, {
+            "id": job_id,
+            "type": "catalog_execution",
+            "state": "QUEUED",
+            "progress": 0,
+            "created_at": "2024-05-01T12:00:00.000000",
+            "updated_at": "2024-05-01T12:00:00.000000",
+            "params": {"item_id": "backup-config", "version": "1.4.2", "user_id": "ops",
+                       "inputs": {"hosts": ["web-1", "web-2", "db-1"], "retention_days": 30}},
+        })
+        snapshots.append((await fetch_job_metadata(redis_client, job_id))[0])
+        for step in range(1, updates + 1):
+            state = "SUCCEEDED" if step == updates else "RUNNING"
+            extra = {"result": {"archived": 3, "bytes": 48213}} if step == updates else {}
+            await set_status(redis_client, job_id, state, {"progress": step * 100 // updates, **extra})
+            snapshots.append((await fetch_job_metadata(redis_client, job_id))[0])
+
+        events = []
+        while len(events) < len(snapshots):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message:
+                events.append(message["data"].decode())
+        return events, snapshots
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+def measure(name, payloads, encode, rounds):
+    """Mean frame size and per-update encode time of ``encode`` over ``payloads``."""
+    frames = [encode(payload) for payload in payloads]
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for payload in payloads:
+            encode(payload)
+        timings.append((time.perf_counter() - started) / len(payloads))
+    return {
+        "name": name,
+        "bytes": statistics.mean(len(frame) for frame in frames),
+        "encode_us": min(timings) * 1e6,
+    }
+
+
+def main_sync(args):
+    events, snapshots = asyncio.run(capture_events(args.updates))
+    snapshot_json = [json.dumps({"type": "upsert", "job": _clean_for_json(job)}) for job in snapshots]
+
+    results = [
+        measure("snapshot JSON", snapshots,
+                lambda job: json.dumps({"type": "upsert", "job": _clean_for_json(job)}).encode(), args.rounds),
+        measure("delta JSON", events, lambda message: message.encode(), args.rounds),
+        measure("snapshot msgpack", snapshot_json, encode_msgpack, args.rounds),
+        measure("delta msgpack", events, encode_msgpack, args.rounds),
+    ]
+
+    print(f"📦 Frame encodings over {len(events)} updates of one catalog job")
+    print("=" * 70)
+    print(f"{'encoding':<20}{'bytes/update':>14}{'encode µs':>12}{'vs snapshot JSON':>20}")
+    baseline = results[0]["bytes"]
+    for r in results:
+        print(f"{r['name']:<20}{r['bytes']:>14.1f}{r['encode_us']:>12.2f}{baseline / r['bytes']:>19.1f}x")
+    print("\ndelta JSON is produced by the job scripts inside Redis, so the API only relays it; the "
+          "msgpack\nencode cost is paid once per event per API process, not per client.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=100, help="progress updates in the job's lifecycle")
+    parser.add_argument("--rounds", type=int, default=20, help="timing rounds (the fastest is reported)")
+    main_sync(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Load test the realtime path: K WebSocket clients on a running API, M synthetic jobs writing
+progress through the job status scripts into the same Redis.
+
+Reports end-to-end delivery latency (job write -> frame received) percentiles, publish and
+delivery throughput, lost deliveries, and the API process's CPU and resident memory when its
+pid is given (read from /proc, so Linux only).
+
+    uvicorn api.main:app --port 8000 &
+    python scripts/load_test_realtime.py --clients 200 --jobs 50 --updates 40 --rate 1000 \\
+        --api-pid $(pgrep -f "uvicorn api.main:app" | head -1)
+    python scripts/load_test_realtime.py --clients 500 --batch-ms 100 --json results.json
+
+Point --redis-url at the Redis the API uses. Synthetic jobs are removed afterwards, but they
+are counted in the /jobs/stats counters.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from api.settings import settings
+from worker.job_status import forget_jobs, set_status, touch_job
+
+
+class ProcessSampler:
+    """CPU seconds and RSS of one process from /proc, sampled in the background."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.rss_samples = []
+
+    def cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15 of stat; [0] here is field 3
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def run(self, interval=0.25):
+        while True:
+            self.rss_samples.append(self.rss_mb())
+            await asyncio.sleep(interval)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+async def run_client(url, prefix, sent_at, latencies, counts, ready):
+    import websockets
+
+    last_seen = {}
+    async with websockets.connect(url, max_size=None) as ws:
+        ready.release()
+        async for frame in ws:
+            received = time.perf_counter()
+            data = json.loads(frame)
+            for event in data if isinstance(data, list) else [data]:
+                job_id = event.get("id") or (event.get("job") or {}).get("id")
+                if not job_id or not job_id.startswith(prefix):
+                    continue
+                counts["events"] += 1
+                # A snapshot brings the client up to date; a merged delta (batching) covers
+                # every seq from first_seq on. Anything else skipped is a lost update.
+                if event["type"] == "upsert":
+                    first = last_seen.get(job_id, 0) + 1
+                else:
+                    first = event.get("first_seq", event["seq"])
+                last_seen[job_id] = event["seq"]
+                for seq in range(first, event["seq"] + 1):
+                    started = sent_at.get((job_id, seq))
+                    if started is not None:
+                        latencies.append(received - started)
+
+
+async def produce(redis_client, job_ids, updates, rate, sent_at):
+    """Create the jobs, then write ``updates`` progress updates per job at ``rate`` per second
+    in total, finishing each job. Returns the number of events published."""
+    seqs = {}
+    for job_id in job_ids:
+        sent_at[(job_id, 1)] = time.perf_counter()
+        await touch_job(redis_client, {"id": job_id, "type": "load_test", "state": "QUEUED", "progress": 0})
+        seqs[job_id] = 1
+
+    interval = 1.0 / rate if rate > 0 else 0.0
+    started = time.perf_counter()
+    published = len(job_ids)
+    for step in range(1, updates + 1):
+        state = "SUCCEEDED" if step == updates else "RUNNING"
+        for job_id in job_ids:
+            due = started + (published - len(job_ids)) * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            seqs[job_id] += 1
+            sent_at[(job_id, seqs[job_id])] = time.perf_counter()
+            await set_status(redis_client, job_id, state, {"progress": step * 100 // updates})
+            published += 1
+    return published
+
+
+async def main_async(args):
+    import redis.asyncio as redis
+
+    redis_client = redis.from_url(args.redis_url)
+    prefix = f"loadtest-{uuid.uuid4().hex[:8]}-"
+    job_ids = [f"{prefix}{i}" for i in range(args.jobs)]
+    url = args.api_url + (f"?batch_ms={args.batch_ms}" if args.batch_ms else "")
+    sent_at, latencies, counts = {}, [], {"events": 0}
+
+    sampler = ProcessSampler(args.api_pid) if args.api_pid else None
+    sampler_task = asyncio.create_task(sampler.run()) if sampler else None
+
+    print(f"🔌 Connecting {args.clients} clients to {url}")
+    ready = asyncio.Semaphore(0)
+    clients = [
+        asyncio.create_task(run_client(url, prefix, sent_at, latencies, counts, ready))
+        for _ in range(args.clients)
+    ]
+    for _ in range(args.clients):
+        await asyncio.wait_for(ready.acquire(), timeout=30)
+    # Give the API's shared subscriber a moment to attach after the first connection
+    await asyncio.sleep(0.5)
+
+    print(f"🚀 {args.jobs} jobs x {args.updates} updates at {args.rate or 'max'} updates/s")
+    cpu_before = sampler.cpu_seconds() if sampler else None
+    started = time.perf_counter()
+    try:
+        published = await produce(redis_client, job_ids, args.updates, args.rate, sent_at)
+        publish_elapsed = time.perf_counter() - started
+
+        expected = published * args.clients
+        deadline = time.perf_counter() + args.drain_timeout
+        while time.perf_counter() < deadline and len(latencies) < expected:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        cpu_used = sampler.cpu_seconds() - cpu_before if sampler else None
+    finally:
+        for task in clients + ([sampler_task] if sampler_task else []):
+            task.cancel()
+        await asyncio.gather(*clients, *([sampler_task] if sampler_task else []), return_exceptions=True)
+        await forget_jobs(redis_client, job_ids)
+        await redis_client.delete(*(f"{settings.JOB_STATUS_PREFIX}{job_id}" for job_id in job_ids))
+        await redis_client.aclose()
+
+    latencies.sort()
+    result = {
+        "clients": args.clients,
+        "jobs": args.jobs,
+        "batch_ms": args.batch_ms,
+        "published": published,
+        "publish_rate": published / publish_elapsed,
+        "expected_deliveries": expected,
+        "delivered_updates": len(latencies),
+        "events_received": counts["events"],
+        "lost": expected - len(latencies),
+        "delivery_rate": len(latencies) / elapsed,
+        "latency_ms": {
+            name: (percentile(latencies, q) * 1000 if latencies else None)
+            for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        },
+        "latency_mean_ms": statistics.mean(latencies) * 1000 if latencies else None,
+    }
+    if sampler:
+        result["api_cpu_percent"] = 100 * cpu_used / elapsed
+        result["api_rss_mb"] = {"start": sampler.rss_samples[0], "peak": max(sampler.rss_samples)}
+
+    print("=" * 70)
+    print(f"published   {result['published']:>10} events   {result['publish_rate']:>10.0f} /s")
+    print(f"delivered   {result['delivered_updates']:>10} updates  {result['delivery_rate']:>10.0f} /s"
+          f"   (lost {result['lost']})")
+    lat = result["latency_ms"]
+    if latencies:
+        print(f"latency ms  p50 {lat['p50']:.2f}   p95 {lat['p95']:.2f}   p99 {lat['p99']:.2f}   max {lat['max']:.2f}")
+    if sampler:
+        print(f"API process cpu {result['api_cpu_percent']:.0f}%   rss {result['api_rss_mb']['start']:.0f}"
+              f" -> {result['api_rss_mb']['peak']:.0f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent WebSocket clients")
+    parser.add_argument("--jobs", type=int, default=20, help="synthetic jobs")
+    parser.add_argument("--updates", type=int, default=20, help="progress updates per job (the last one finishes it)")
+    parser.add_argument("--rate", type=float, default=500, help="total job updates per second; 0 for as fast as possible")
+    parser.add_argument("--batch-ms", type=int, default=0, help="connect with ?batch_ms= for batched frames")
+    parser.add_argument("--api-url", default="ws://localhost:8000/ws/jobs")
+    parser.add_argument("--redis-url", default=settings.REDIS_URL)
+    parser.add_argument("--api-pid", type=int, default=None, help="API process to sample CPU and memory of")
+    parser.add_argument("--drain-timeout", type=float, default=10.0, help="seconds to wait for outstanding deliveries")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
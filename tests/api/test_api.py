@@ -6,6 +6,7 @@ import fakeredis.aioredis
 from fastapi.testclient import TestClient
 
 from api.settings import settings
+from worker.job_status import set_status
 
 
 def test_create_and_get_job(app_client: TestClient):
@@ -136,6 +137,23 @@ def test_legacy_string_job_visible(app_client: TestClient, fakeredis_server):
     assert any(job["id"] == job_id for job in items)
 
 
+def test_list_jobs_drops_expired_ids(app_client: TestClient, fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(redis_client.zadd("jobs:index", {"expired-job": time.time() + 60}))
+        loop.run_until_complete(redis_client.zadd("jobs:index:state:RUNNING", {"expired-job": time.time()}))
+
+        response = app_client.get("/jobs")
+        assert response.status_code == 200
+        assert all(job["id"] != "expired-job" for job in response.json()["items"])
+
+        assert loop.run_until_complete(redis_client.zscore("jobs:index", "expired-job")) is None
+        assert loop.run_until_complete(redis_client.zscore("jobs:index:state:RUNNING", "expired-job")) is None
+    finally:
+        loop.run_until_complete(redis_client.aclose())
+
+
 def test_catalog_job_appears_in_list(app_client: TestClient):
     payload = {
         "report_type": "catalog",
@@ -163,6 +181,148 @@ def test_catalog_job_appears_in_list(app_client: TestClient):
     assert job_entry["state"] == "QUEUED"
 
 
+def test_list_jobs_filters_by_item_and_user(app_client: TestClient):
+    payload = {
+        "report_type": "catalog",
+        "parameters": {"item_id": "filter-item", "version": "1.0.0", "inputs": {}},
+        "user_id": "filter-user",
+    }
+    job_id = app_client.post("/jobs", json=payload).json()["job_id"]
+
+    response = app_client.get("/jobs", params={"type": "catalog_execution", "item_id": "filter-item",
+                                                "user_id": "filter-user"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 1
+    assert [item["id"] for item in result["items"]] == [job_id]
+
+    response = app_client.get("/jobs", params={"item_id": "filter-item", "user_id": "someone-else"})
+    assert response.json() == {"items": [], "page": 1, "page_size": 20, "total": 0, "next_cursor": None}
+
+
+def test_job_stats_endpoint(app_client: TestClient):
+    app_client.post("/jobs", json={"report_type": "catalog",
+                                   "parameters": {"item_id": "stats-item", "version": "1.0.0", "inputs": {}}})
+
+    response = app_client.get("/jobs/stats")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["states"]["QUEUED"] >= 1
+    assert stats["types"]["catalog_execution"]["QUEUED"] >= 1
+    assert set(stats) == {"states", "types", "catalog_items", "durations", "progress_writes"}
+
+
+def test_job_events_stream_sends_snapshot_and_ends_for_finished_job(app_client: TestClient, fakeredis_server):
+    job_id = app_client.post("/jobs", json={"report_type": "test_report", "parameters": {}}).json()["job_id"]
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(set_status(redis_client, job_id, "SUCCEEDED", {"progress": 100}))
+    finally:
+        loop.run_until_complete(redis_client.aclose())
+
+    response = app_client.get(f"/jobs/{job_id}/events")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    event, data = response.text.strip().split("\n")
+    assert event == "event: upsert"
+    snapshot = json.loads(data.removeprefix("data: "))
+    assert snapshot["job"]["id"] == job_id and snapshot["job"]["state"] == "SUCCEEDED"
+
+    assert app_client.get("/jobs/missing-job/events").status_code == 404
+    assert app_client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": "soon"}).status_code == 400
+
+
+def test_seed_and_tag_webhook_create_queued_jobs(app_client: TestClient):
+    response = app_client.post("/dev/seed")
+    assert response.status_code == 200
+    seeded = response.json()["job_ids"]
+    assert len(seeded) == 5
+
+    response = app_client.post("/catalog/git/webhook/github", json={
+        "ref": "refs/tags/v1.2.0",
+        "repository": {"clone_url": "https://github.com/example/catalog.git"},
+    })
+    assert response.status_code == 200
+    hook = response.json()
+    assert hook["queued"] == 1
+
+    for job_id in seeded + [hook["job_id"]]:
+        job = app_client.get(f"/jobs/{job_id}").json()
+        assert job["state"] == "QUEUED"
+    # The sync worker rewrites the job as git_import, so it is enqueued as one too
+    assert app_client.get(f"/jobs/{hook['job_id']}").json()["type"] == "git_import"
+    assert app_client.get(f"/jobs/{hook['job_id']}").json()["params"] == {
+        "repo_url": "https://github.com/example/catalog.git",
+        "ref": "v1.2.0",
+    }
+
+
+def test_git_import_job_is_indexed_and_counted(app_client: TestClient):
+    before = app_client.get("/jobs/stats").json()["states"]["QUEUED"]
+
+    response = app_client.post("/catalog/git/import", json={
+        "repo_url": "https://github.com/example/catalog.git",
+        "item_name": "ssl-certificate-check",
+        "version": "1.2.1",
+    })
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    assert app_client.get("/jobs/stats").json()["states"]["QUEUED"] == before + 1
+    job = app_client.get(f"/jobs/{job_id}").json()
+    assert (job["state"], job["type"]) == ("QUEUED", "git_import")
+    listed = app_client.get("/jobs", params={"type": "git_import", "state": "QUEUED"}).json()
+    assert job_id in [row["id"] for row in listed["items"]]
+
+
+def test_git_import_job_is_announced_with_a_snapshot(app_client: TestClient, fakeredis_server):
+    redis_client = fakeredis.FakeRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    pubsub.subscribe("channel:jobs")
+    try:
+        response = app_client.post("/catalog/git/import", json={
+            "repo_url": "https://github.com/example/catalog.git",
+            "item_name": "ssl-certificate-check",
+            "branch": "main",
+        })
+        job_id = response.json()["job_id"]
+
+        events = []
+        deadline = time.time() + 2
+        while time.time() < deadline:
+            message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                event = json.loads(message["data"])
+                if (event.get("job") or event).get("id") == job_id:
+                    events.append(event)
+                    break
+        # The dashboard only adds rows for snapshots, so the first event must be one
+        assert events and events[0]["type"] == "upsert"
+        assert events[0]["job"]["state"] == "QUEUED" and events[0]["seq"] == 1
+    finally:
+        pubsub.close()
+        redis_client.close()
+
+
+def test_list_jobs_rows_carry_seq(app_client: TestClient, fakeredis_server):
+    job_id = app_client.post("/dev/seed").json()["job_ids"][0]
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(set_status(redis_client, job_id, "RUNNING", {"progress": 40}))
+    finally:
+        loop.run_until_complete(redis_client.aclose())
+
+    rows = app_client.get("/jobs", params={"page_size": 100}).json()["items"]
+    row = next(row for row in rows if row["id"] == job_id)
+    # The dashboard checks the next delta's seq against this to detect missed updates
+    assert row["seq"] == 2
+    assert app_client.get(f"/jobs/{job_id}").json()["seq"] == 2
+
+
 def test_health_check(app_client: TestClient):
     response = app_client.get("/health")
     assert response.status_code == 200
@@ -170,3 +330,14 @@ def test_health_check(app_client: TestClient):
     result = response.json()
     assert result["status"] == "healthy"
     assert "timestamp" in result
+
+
+def test_shutdown_drains_celery_dispatcher(app_client: TestClient):
+    from api import task_queue
+
+    with TestClient(app_client.app):
+        dispatcher = task_queue._get_dispatcher()
+        done = dispatcher.submit(time.sleep, 0.05)
+
+    assert done.done()
+    assert task_queue._dispatcher is None
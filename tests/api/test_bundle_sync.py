@@ -0,0 +1,106 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from api.catalog import bundle_sync, registry
+from api.catalog.bundles import pack_dir
+
+
+@pytest.fixture
+def registry_path(tmp_path, monkeypatch):
+    path = tmp_path / "catalog_registry.json"
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(path))
+    return path
+
+
+def _write_bundle(bundles_dir, tmp_path, item_id, version, *, title="demo"):
+    src = tmp_path / "src" / f"{item_id}-{version}-{title}"
+    src.mkdir(parents=True)
+    (src / "manifest.yaml").write_text(f"id: {item_id}\nversion: {version}\n")
+    (src / "schema.json").write_text(json.dumps({"type": "object", "title": title}))
+    (src / "task.py").write_text("def run(inputs):\n    return inputs\n")
+    bundle = bundles_dir / f"{item_id}@{version}.tar.gz"
+    bundle.write_bytes(pack_dir(str(src)))
+    return bundle
+
+
+def _statuses(report):
+    return {r["filename"]: r["status"] for r in report["results"]}
+
+
+def test_sync_bundle_directory_detects_changes(tmp_path, registry_path, monkeypatch):
+    bundles_dir = tmp_path / "bundles"
+    bundles_dir.mkdir()
+    first = _write_bundle(bundles_dir, tmp_path, "alpha", "1.0.0")
+    _write_bundle(bundles_dir, tmp_path, "beta", "2.0.0")
+    (bundles_dir / "broken.tar.gz").write_bytes(b"not a bundle")
+
+    saves = []
+    original_save = registry._save
+    monkeypatch.setattr(registry, "_save", lambda data: (saves.append(1), original_save(data)))
+
+    report = bundle_sync.sync_bundle_directory(str(bundles_dir), max_workers=1)
+
+    assert report["total_files"] == 3
+    assert (report["synced"], report["unchanged"], report["errors"]) == (2, 0, 1)
+    assert len(saves) == 1
+    stored = json.loads(registry_path.read_text())["items"]["alpha"]["versions"]["1.0.0"]
+    assert stored["storage_uri"] == f"file://{first}"
+    assert stored["bundle_stat"]["sha256"]
+
+    report = bundle_sync.sync_bundle_directory(str(bundles_dir), max_workers=1)
+    assert _statuses(report) == {
+        "alpha@1.0.0.tar.gz": "unchanged",
+        "beta@2.0.0.tar.gz": "unchanged",
+        "broken.tar.gz": "error",
+    }
+
+    # Touched but identical content is matched by digest instead of re-parsed
+    st = first.stat()
+    os.utime(first, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    report = bundle_sync.sync_bundle_directory(str(bundles_dir), max_workers=1)
+    assert _statuses(report)["alpha@1.0.0.tar.gz"] == "unchanged"
+
+    _write_bundle(bundles_dir, tmp_path, "alpha", "1.0.0", title="changed")
+    report = bundle_sync.sync_bundle_directory(str(bundles_dir), max_workers=1)
+    assert _statuses(report)["alpha@1.0.0.tar.gz"] == "synced"
+    stored = json.loads(registry_path.read_text())["items"]["alpha"]["versions"]["1.0.0"]
+    assert stored["schema"]["title"] == "changed"
+
+
+def test_sync_bundle_directory_uses_process_pool(tmp_path, registry_path):
+    bundles_dir = tmp_path / "bundles"
+    bundles_dir.mkdir()
+    for i in range(3):
+        _write_bundle(bundles_dir, tmp_path, f"item-{i}", "1.0.0")
+
+    pools = []
+
+    def executor_factory(max_workers):
+        pools.append(max_workers)
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    report = bundle_sync.sync_bundle_directory(
+        str(bundles_dir), max_workers=2, executor_factory=executor_factory
+    )
+
+    assert pools == [2]
+    assert report["synced"] == 3
+    assert set(json.loads(registry_path.read_text())["items"]) == {"item-0", "item-1", "item-2"}
+
+
+def test_sync_bundle_directory_missing_dir(tmp_path, registry_path):
+    report = bundle_sync.sync_bundle_directory(str(tmp_path / "missing"))
+    assert report["total_files"] == 0
+    assert report["message"] == "No bundles directory found"
+
+
+def test_default_executor_spawns_pool_processes():
+    executor = bundle_sync._default_executor(2)
+    try:
+        assert executor._mp_context.get_start_method() == "spawn"
+    finally:
+        executor.shutdown()
+    assert bundle_sync._default_executor(1) is None
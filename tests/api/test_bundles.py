@@ -0,0 +1,152 @@
+import hashlib
+import io
+import json
+import tarfile
+
+import pytest
+
+from api.catalog import bundles
+from api.catalog.bundles import (
+    load_bundle_index,
+    load_descriptor_from_bundle,
+    pack_dir,
+    write_bundle_index,
+)
+
+
+def _make_item(root, *, schema_map=None):
+    root.mkdir(parents=True, exist_ok=True)
+    schema = {"type": "object"}
+    if schema_map:
+        schema["x-schema-map"] = schema_map
+    (root / "manifest.yaml").write_text("id: demo-item\nname: Demo\nversion: 1.0.0\n")
+    (root / "schema.json").write_text(json.dumps(schema))
+    (root / "ui.json").write_text(json.dumps({"ui:order": ["*"]}))
+    (root / "task.py").write_text("def run(inputs):\n    return inputs\n" + "# padding\n" * 2000)
+    return root
+
+
+def test_pack_dir_writes_descriptors_first(tmp_path):
+    item = _make_item(tmp_path / "item", schema_map={"delete": "delete.json"})
+    (item / "delete.json").write_text(json.dumps({"type": "object", "title": "delete"}))
+
+    data = pack_dir(str(item))
+
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        names = [m.name for m in tar.getmembers() if m.isfile()]
+
+    assert names[:4] == ["./manifest.yaml", "./schema.json", "./ui.json", "./delete.json"]
+    assert sorted(names) == sorted(set(names))
+    assert "./task.py" in names
+
+
+def test_load_descriptor_from_bundle_bytes(tmp_path):
+    item = _make_item(tmp_path / "item", schema_map={"delete": "delete.json"})
+    (item / "delete.json").write_text(json.dumps({"title": "delete"}))
+
+    manifest, schema, ui, additional = load_descriptor_from_bundle(pack_dir(str(item)))
+
+    assert manifest["id"] == "demo-item"
+    assert schema["type"] == "object"
+    assert ui == {"ui:order": ["*"]}
+    assert additional == {"delete.json": {"title": "delete"}}
+
+
+def test_load_descriptor_from_bundle_nested_layout(tmp_path):
+    repo = tmp_path / "repo"
+    _make_item(repo / "items" / "demo-item")
+
+    manifest, _, _, _ = load_descriptor_from_bundle(pack_dir(str(repo)))
+
+    assert manifest["version"] == "1.0.0"
+
+
+def test_load_descriptor_from_bundle_requires_schema(tmp_path):
+    item = tmp_path / "item"
+    item.mkdir()
+    (item / "manifest.yaml").write_text("id: demo-item\nversion: 1.0.0\n")
+
+    with pytest.raises(ValueError, match="schema.json"):
+        load_descriptor_from_bundle(pack_dir(str(item)))
+
+
+def test_indexed_bundle_is_read_without_tar_walk(tmp_path, monkeypatch):
+    item = _make_item(tmp_path / "item")
+    data = pack_dir(str(item))
+    bundle_path = tmp_path / "demo-item@1.0.0.tar.gz"
+    bundle_path.write_bytes(data)
+    write_bundle_index(str(bundle_path), data)
+
+    index = load_bundle_index(str(bundle_path))
+    assert set(index["members"]) >= {"manifest.yaml", "schema.json", "ui.json", "task.py"}
+
+    def no_tar(*args, **kwargs):
+        raise AssertionError("indexed bundles must not be opened as tar archives")
+
+    monkeypatch.setattr(bundles.tarfile, "open", no_tar)
+    manifest, _, ui, _ = load_descriptor_from_bundle(str(bundle_path))
+
+    assert manifest["id"] == "demo-item"
+    assert ui == {"ui:order": ["*"]}
+
+
+def test_stale_index_is_ignored(tmp_path):
+    item = _make_item(tmp_path / "item")
+    data = pack_dir(str(item))
+    bundle_path = tmp_path / "demo-item@1.0.0.tar.gz"
+    bundle_path.write_bytes(data)
+    write_bundle_index(str(bundle_path), data)
+
+    bundle_path.write_bytes(data + b"\0" * 512)
+
+    assert load_bundle_index(str(bundle_path)) is None
+
+
+def test_import_bundle_accepts_manifest_with_only_name(tmp_path, monkeypatch, app_client):
+    from api.catalog import bundle_routes, registry
+
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(tmp_path / "catalog_registry.json"))
+    monkeypatch.setattr(bundle_routes, "BUNDLES_DIR", str(tmp_path / "bundles"))
+    item = tmp_path / "item"
+    item.mkdir()
+    (item / "manifest.yaml").write_text("name: named-only\nversion: 1.0.0\n")
+    (item / "schema.json").write_text(json.dumps({"type": "object"}))
+
+    response = app_client.post(
+        "/catalog/bundle/import",
+        files={"file": ("named-only.tar.gz", pack_dir(str(item)), "application/gzip")},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["item_id"] == "named-only"
+    assert registry.get_descriptor("named-only", "1.0.0")
+
+
+def test_import_bundle_passes_digest_to_database_write(tmp_path, monkeypatch, app_client):
+    from api.catalog import bundle_routes, registry
+
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(tmp_path / "catalog_registry.json"))
+    monkeypatch.setattr(bundle_routes, "BUNDLES_DIR", str(tmp_path / "bundles"))
+    registered = []
+
+    class RecordingRepo:
+        def __init__(self, db):
+            pass
+
+        def register_version(self, **kwargs):
+            registered.append(kwargs)
+
+    monkeypatch.setattr(registry, "CatalogRepo", RecordingRepo)
+    item = tmp_path / "item"
+    item.mkdir()
+    (item / "manifest.yaml").write_text("id: digest-item\nversion: 1.0.0\n")
+    (item / "schema.json").write_text(json.dumps({"type": "object"}))
+    data = pack_dir(str(item))
+
+    response = app_client.post(
+        "/catalog/bundle/import", files={"file": ("digest-item.tar.gz", data, "application/gzip")}
+    )
+
+    assert response.status_code == 200
+    assert registered[0]["sha256"] == hashlib.sha256(data).hexdigest()
+    assert registered[0]["size"] == len(data)
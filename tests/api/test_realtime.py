@@ -0,0 +1,425 @@
+import asyncio
+import json
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from api.realtime import (
+    JOBS_CHANNEL,
+    MSGPACK_SUBPROTOCOL,
+    ConnectionManager,
+    compact_event,
+    job_event_stream,
+    merge_job_events,
+)
+from worker.job_status import set_status, touch_job
+
+
+pytestmark = pytest.mark.anyio("asyncio")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeSocket:
+    def __init__(self):
+        self.accepted = False
+        self.closed = None
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        self.accepted = True
+        self.subprotocol = subprotocol
+
+    async def close(self, code=1000):
+        self.closed = code
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("clients", [1, 5, 25])
+async def test_fan_out_is_linear_in_clients_with_one_subscription(clients):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    sockets = [FakeSocket() for _ in range(clients)]
+    try:
+        for socket in sockets:
+            await manager.connect(socket)
+        await asyncio.wait_for(manager.subscribed.wait(), timeout=5)
+        assert await redis_client.pubsub_numsub(JOBS_CHANNEL) == [(JOBS_CHANNEL.encode(), 1)]
+
+        messages = 10
+        for i in range(messages):
+            await redis_client.publish(JOBS_CHANNEL, json.dumps({"type": "delta", "seq": i}))
+        await _wait_for(lambda: manager.metrics["sent"] == clients * messages)
+
+        assert manager.metrics["received"] == messages
+        assert all(socket.accepted for socket in sockets)
+        assert all([json.loads(m)["seq"] for m in socket.sent] == list(range(messages)) for socket in sockets)
+
+        for socket in sockets:
+            manager.disconnect(socket)
+        assert manager.active_connections == []
+        assert not manager.subscribed.is_set()
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+async def test_failed_send_drops_only_that_client():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    class BrokenSocket(FakeSocket):
+        async def send_text(self, message):
+            raise RuntimeError("gone")
+
+    manager = ConnectionManager(redis_factory=factory)
+    healthy, broken = FakeSocket(), BrokenSocket()
+    try:
+        await manager.connect(healthy)
+        await manager.connect(broken)
+        await manager.broadcast("hello")
+        await _wait_for(lambda: manager.active_connections == [healthy])
+        await _wait_for(lambda: healthy.sent == ["hello"])
+        assert manager.metrics["send_errors"] == 1
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+async def test_topic_subscriptions_route_only_relevant_events():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    everything, one_job, reports, failures, item = (FakeSocket() for _ in range(5))
+    try:
+        # Created before anyone listens: its deltas need one routing lookup
+        await touch_job(redis_client, {"id": "early", "type": "report", "state": "RUNNING"})
+
+        for socket in (everything, one_job, reports, failures, item):
+            await manager.connect(socket)
+        await manager.handle_frame(one_job, json.dumps({"action": "subscribe", "topics": ["job:a"]}))
+        await manager.handle_frame(reports, json.dumps({"action": "subscribe", "topics": ["type:report"]}))
+        await manager.handle_frame(failures, json.dumps({"action": "subscribe", "topics": ["state:FAILED"]}))
+        await manager.handle_frame(item, json.dumps({"action": "subscribe", "topics": ["item:cat-1", "job:zzz"]}))
+        await manager.handle_frame(item, json.dumps({"action": "unsubscribe", "topics": ["job:zzz"]}))
+        await _wait_for(lambda: len(item.sent) == 2)
+        assert json.loads(item.sent.pop()) == {"type": "subscriptions", "topics": ["item:cat-1"]}
+        for socket in (one_job, reports, failures, item):
+            socket.sent.clear()
+        await asyncio.wait_for(manager.subscribed.wait(), timeout=5)
+
+        await touch_job(redis_client, {"id": "a", "type": "catalog", "state": "QUEUED", "params": {"item_id": "cat-1"}})
+        await touch_job(redis_client, {"id": "b", "type": "report", "state": "QUEUED"})
+        await set_status(redis_client, "a", "RUNNING", {"progress": 10})
+        await set_status(redis_client, "b", "FAILED", {"error": "boom"})
+        await set_status(redis_client, "early", "RUNNING", {"progress": 50})
+        await _wait_for(lambda: manager.metrics["received"] == 5)
+
+        def seen(socket):
+            return [(e.get("id") or e["job"]["id"], e["type"]) for e in map(json.loads, socket.sent)]
+
+        assert len(everything.sent) == 5
+        assert seen(one_job) == [("a", "upsert"), ("a", "delta")]
+        assert seen(reports) == [("b", "upsert"), ("b", "upsert"), ("early", "delta")]
+        assert seen(failures) == [("b", "upsert")]
+        assert seen(item) == [("a", "upsert"), ("a", "delta")]
+        assert manager.metrics["routing_lookups"] == 1
+
+        manager.disconnect(reports)
+        assert "type:report" not in manager.topic_index
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+async def test_routing_lookup_does_not_hold_up_other_jobs(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_fetch(_redis_client, job_id):
+        await release.wait()
+        return {"id": job_id, "type": "report", "state": "RUNNING"}, "hash"
+
+    async def factory():
+        return None
+
+    monkeypatch.setattr("api.realtime.fetch_job_metadata", slow_fetch)
+    manager = ConnectionManager(redis_factory=factory)
+    reports = FakeSocket()
+    try:
+        await manager.connect(reports)
+        await manager.handle_frame(reports, json.dumps({"action": "subscribe", "topics": ["type:report"]}))
+        await _wait_for(lambda: len(reports.sent) == 1)
+        reports.sent.clear()
+
+        def delta(job_id, seq):
+            return json.dumps({"type": "delta", "id": job_id, "seq": seq, "changes": {"progress": seq}})
+
+        await manager.dispatch(delta("unknown", 2))
+        await manager.dispatch(json.dumps({"type": "upsert", "seq": 1, "job": {"id": "known", "type": "report"}}))
+        await manager.dispatch(delta("unknown", 3))
+        await _wait_for(lambda: len(reports.sent) == 1)
+        assert json.loads(reports.sent[0])["job"]["id"] == "known"
+
+        release.set()
+        await _wait_for(lambda: len(reports.sent) == 3)
+        assert [json.loads(m)["seq"] for m in reports.sent[1:]] == [2, 3]
+        assert manager.metrics["routing_lookups"] == 1
+    finally:
+        await manager.close()
+
+
+async def test_invalid_subscription_frame_is_rejected():
+    manager = ConnectionManager()
+    socket = FakeSocket()
+    await manager.handle_frame(socket, json.dumps({"action": "subscribe", "topics": ["colour:red"]}))
+    await manager.handle_frame(socket, "not json")
+    assert [json.loads(m)["type"] for m in socket.sent] == ["error", "error"]
+    assert manager.topic_index == {} and manager.socket_topics == {}
+
+
+async def test_stalled_client_is_coalesced_then_disconnected_without_delaying_others():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    class StalledSocket(FakeSocket):
+        async def send_text(self, message):
+            await asyncio.Event().wait()
+
+    manager = ConnectionManager(redis_factory=factory, queue_size=4, send_timeout=0.5)
+    fast, stalled = FakeSocket(), StalledSocket()
+    try:
+        await manager.connect(fast)
+        await manager.connect(stalled)
+        for seq in range(1, 11):
+            for job_id in ("a", "b"):
+                await manager.dispatch(json.dumps({"type": "delta", "id": job_id, "seq": seq, "changes": {}}))
+                # Each event reaches the fast client well inside the stalled one's send timeout
+                await _wait_for(lambda: len(fast.sent) == seq * 2 - (job_id == "a"), timeout=0.1)
+
+            # The stalled socket's queue stays bounded and keeps the newest event of each job
+        queued = [(e["id"], e["seq"]) for e in (json.loads(m) for _, m in manager._clients[stalled].pending)]
+        assert ("a", 10) in queued and ("b", 10) in queued
+        stats = manager.stats()
+        assert stats["queue_depth"]["max"] <= 4
+        assert stats["coalesced"] > 0 and stats["dropped"] == 0
+
+        await _wait_for(lambda: manager.active_connections == [fast])
+        assert stalled.closed == 1013
+        assert manager.metrics["slow_disconnects"] == 1
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+async def test_resume_replays_only_the_missed_matching_events():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    first = FakeSocket()
+    try:
+        await manager.connect(first)
+        await asyncio.wait_for(manager.subscribed.wait(), timeout=5)
+        await touch_job(redis_client, {"id": "mine", "type": "report", "state": "QUEUED"})
+        await _wait_for(lambda: len(first.sent) == 1)
+        last_seen = json.loads(first.sent[-1])["event_id"]
+        manager.disconnect(first)
+
+        # Missed while disconnected
+        await set_status(redis_client, "mine", "RUNNING", {"progress": 10})
+        await touch_job(redis_client, {"id": "other", "type": "report", "state": "QUEUED"})
+        await set_status(redis_client, "mine", "SUCCEEDED", {"progress": 100})
+
+        again = FakeSocket()
+        await manager.connect(again)
+        await manager.handle_frame(again, json.dumps({"action": "subscribe", "topics": ["job:mine"]}))
+        await manager.handle_frame(again, json.dumps({"action": "resume", "last_event_id": last_seen}))
+        await _wait_for(lambda: len(again.sent) == 4)
+
+        replies = [json.loads(message) for message in again.sent]
+        assert [(e["type"], e["seq"]) for e in replies[1:3]] == [("delta", 2), ("upsert", 3)]
+        assert replies[3] == {"type": "resumed", "replayed": 2, "resync": False}
+
+        await manager.handle_frame(again, json.dumps({"action": "resume", "last_event_id": "later"}))
+        await _wait_for(lambda: len(again.sent) == 5)
+        assert json.loads(again.sent[-1])["type"] == "error"
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+async def test_resume_overflowing_live_events_asks_for_resync(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_read(_redis_client, after, **_kwargs):
+        await release.wait()
+        return [], False
+
+    async def factory():
+        return None
+
+    monkeypatch.setattr("api.realtime.read_job_events", slow_read)
+    manager = ConnectionManager(redis_factory=factory, queue_size=2)
+    socket = FakeSocket()
+    try:
+        await manager.connect(socket)
+        resuming = asyncio.create_task(manager.handle_frame(
+            socket, json.dumps({"action": "resume", "last_event_id": "1-0"})
+        ))
+        await asyncio.sleep(0)
+        for seq in range(1, 5):
+            await manager.dispatch(json.dumps({"type": "delta", "id": "busy", "seq": seq, "changes": {}}))
+        assert manager._clients[socket].held == []
+
+        release.set()
+        await resuming
+        await manager.dispatch(json.dumps({"type": "delta", "id": "busy", "seq": 5, "changes": {}}))
+        await _wait_for(lambda: len(socket.sent) == 2)
+
+        assert json.loads(socket.sent[0]) == {"type": "resumed", "replayed": 0, "resync": True}
+        assert json.loads(socket.sent[1])["seq"] == 5
+        assert manager.metrics["dropped"] == 4
+    finally:
+        await manager.close()
+
+
+async def test_job_event_stream_follows_one_job_until_it_finishes():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    try:
+        await touch_job(redis_client, {"id": "sse", "type": "report", "state": "QUEUED"})
+        stream = job_event_stream(manager, job_id="sse", heartbeat=0.2)
+
+        snapshot = await anext(stream)
+        assert snapshot.startswith("event: upsert\ndata: ")
+        assert json.loads(snapshot.split("data: ", 1)[1])["job"]["state"] == "QUEUED"
+        assert await anext(stream) == ": heartbeat\n\n"
+
+        await touch_job(redis_client, {"id": "noise", "type": "report", "state": "QUEUED"})
+        await set_status(redis_client, "sse", "RUNNING", {"progress": 50})
+        await set_status(redis_client, "sse", "SUCCEEDED", {"progress": 100})
+        frames = [frame async for frame in stream]
+
+        assert [frame.split("\n")[1] for frame in frames] == ["event: delta", "event: upsert"]
+        assert all(frame.startswith("id: ") for frame in frames)
+        assert manager.active_connections == []
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+def test_merge_job_events_keeps_one_event_per_job():
+    def delta(seq, **changes):
+        return ("a", json.dumps({"type": "delta", "id": "a", "seq": seq, "event_id": f"1-{seq}", "changes": changes}))
+
+    snapshot = ("b", json.dumps({"type": "upsert", "seq": 1, "job": {"id": "b", "state": "QUEUED", "seq": 1}}))
+    b_delta = ("b", json.dumps({"type": "delta", "id": "b", "seq": 2, "changes": {"state": "RUNNING"}}))
+    ack = (None, json.dumps({"type": "subscriptions", "topics": []}))
+
+    merged = [json.loads(m) for m in merge_job_events([delta(4, progress=10), snapshot, ack,
+                                                       delta(5, progress=20, state="RUNNING"), b_delta])]
+
+    assert merged == [
+        {"type": "subscriptions", "topics": []},
+        {"type": "delta", "id": "a", "seq": 5, "first_seq": 4, "event_id": "1-5",
+         "changes": {"progress": 20, "state": "RUNNING"}},
+        {"type": "upsert", "seq": 2, "event_id": None, "job": {"id": "b", "state": "RUNNING", "seq": 2}},
+    ]
+
+
+async def test_batching_sends_one_array_frame_per_window():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    batched, plain = FakeSocket(), FakeSocket()
+    try:
+        await manager.connect(batched, batch_ms=100)
+        await manager.connect(plain)
+        for seq in range(1, 51):
+            await manager.dispatch(json.dumps({"type": "delta", "id": f"job-{seq % 2}", "seq": seq, "changes": {"progress": seq}}))
+            await asyncio.sleep(0)
+        await _wait_for(lambda: len(batched.sent) >= 1 and len(plain.sent) == 50)
+
+        assert len(batched.sent) == 1
+        frame = json.loads(batched.sent[0])
+        assert frame[0] == {"type": "batching", "batch_ms": 100}
+        assert sorted((e["id"], e["seq"], e["changes"]["progress"]) for e in frame[1:]) == [
+            ("job-0", 50, 50), ("job-1", 49, 49)]
+        assert manager.metrics["merged"] == 48
+    finally:
+        await manager.close()
+        await redis_client.aclose()
+
+
+def test_compact_event_shortens_keys_and_timestamps():
+    event = {"type": "delta", "id": "a", "seq": 3, "event_id": "1-0",
+             "changes": {"progress": 40, "updated_at": "2024-01-01T00:00:01.500000", "params": {"updated_at": "x"}}}
+
+    assert compact_event(event) == {"t": "d", "i": "a", "s": 3, "e": "1-0",
+                                    "c": {"p": 40, "ua": 1704067201.5, "pa": {"updated_at": "x"}}}
+
+
+async def test_msgpack_subprotocol_gets_binary_frames_encoded_once():
+    msgpack = pytest.importorskip("msgpack")
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+    async def factory():
+        return redis_client
+
+    manager = ConnectionManager(redis_factory=factory)
+    binary = [FakeSocket() for _ in range(3)]
+    text = FakeSocket()
+    try:
+        for socket in binary:
+            await manager.connect(socket, subprotocols=["jobs.json", MSGPACK_SUBPROTOCOL])
+        await manager.connect(text, subprotocols=["jobs.json"])
+        message = json.dumps({"type": "delta", "id": "a", "seq": 2, "changes": {"progress": 5}})
+        await manager.dispatch(message)
+        await _wait_for(lambda: all(socket.sent for socket in binary + [text]))
+
+        assert [socket.subprotocol for socket in binary] == [MSGPACK_SUBPROTOCOL] * 3
+        assert text.subprotocol is None and text.sent == [message]
+        frames = [socket.sent[0] for socket in binary]
+        assert frames[0] is frames[1] is frames[2]
+        assert msgpack.unpackb(frames[0]) == {"t": "d", "i": "a", "s": 2, "c": {"p": 5}}
+        assert len(frames[0]) < len(message) / 2
+    finally:
+        await manager.close()
+        await redis_client.aclose()
@@ -0,0 +1,197 @@
+import json
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from api.catalog import bundles, registry, storage
+from api.catalog.bundles import delete_bundle, load_descriptor_from_bundle, pack_dir, read_blob, write_blob
+from api.catalog.settings import catalog_settings
+from api.catalog.storage import LocalBlobStorage, S3BlobStorage
+
+
+class _NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            chunk, self._data = self._data, b""
+        else:
+            chunk, self._data = self._data[:n], self._data[n:]
+        return chunk
+
+    def close(self):
+        pass
+
+
+class FakeS3Client:
+    """In-process stand-in for the subset of the S3 API used by S3BlobStorage."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.ranges = []
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = (bytes(Body), datetime.now(timezone.utc))
+
+    def get_object(self, Bucket, Key, Range=None):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        data = self.objects[(Bucket, Key)][0]
+        self.ranges.append((Key, Range))
+        if Range:
+            start, _, end = Range[len("bytes="):].partition("-")
+            data = data[int(start):int(end) + 1] if end else data[int(start):]
+        return {"Body": _Body(data)}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        data, modified = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(data), "LastModified": modified}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        contents = [
+            {"Key": key, "Size": len(data), "LastModified": modified}
+            for (bucket, key), (data, modified) in sorted(self.objects.items())
+            if bucket == Bucket and key.startswith(Prefix)
+        ]
+        return {"Contents": contents, "IsTruncated": False}
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        data = b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"])
+        self.put_object(Bucket, Key, data)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3Client()
+    monkeypatch.setattr(storage, "boto3", SimpleNamespace(client=lambda *args, **kwargs: client))
+    monkeypatch.setattr(catalog_settings, "CATALOG_STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(catalog_settings, "CATALOG_S3_BUCKET", "catalog-test")
+    return client
+
+
+def _item_bundle(tmp_path):
+    item = tmp_path / "item"
+    item.mkdir()
+    (item / "manifest.yaml").write_text("id: demo-item\nversion: 1.0.0\n")
+    (item / "schema.json").write_text(json.dumps({"type": "object"}))
+    # Incompressible padding so the descriptors sit in a small prefix of the object
+    (item / "task.py").write_text("def run(inputs):\n    return inputs\n# " + os.urandom(16384).hex())
+    return pack_dir(str(item))
+
+
+def test_local_storage_roundtrip(tmp_path):
+    local = LocalBlobStorage(str(tmp_path / "blobs"))
+
+    uri = local.write("a.tar.gz", b"0123456789")
+
+    assert uri == f"file://{tmp_path}/blobs/a.tar.gz"
+    assert local.read(uri, 2, 3) == b"234"
+    assert local.stat(uri)["size"] == 10
+    assert [b["key"] for b in local.list((".tar.gz",))] == ["a.tar.gz"]
+    # Bare paths written before URIs were backend-qualified still resolve
+    assert local.exists(str(tmp_path / "blobs" / "a.tar.gz"))
+    assert local.delete(uri) and not local.exists(uri)
+
+
+def test_concurrent_local_writers_to_one_key_do_not_interleave(tmp_path):
+    local = LocalBlobStorage(str(tmp_path / "blobs"))
+    uri = local.uri_for("same.tar.gz")
+
+    first = local.open_writer(uri)
+    first.write(b"first-")
+    second = local.open_writer(uri)
+    second.write(b"second-")
+    first.write(b"done")
+    first.commit()
+    assert local.read(uri) == b"first-done"
+
+    second.write(b"done")
+    second.commit()
+    assert local.read(uri) == b"second-done"
+
+    aborted = local.open_writer(uri)
+    aborted.write(b"partial")
+    aborted.abort()
+    assert local.read(uri) == b"second-done"
+    assert os.listdir(tmp_path / "blobs") == ["same.tar.gz"]
+
+
+def test_s3_streaming_writer_uses_multipart_and_aborts_on_error(s3):
+    blob_storage = S3BlobStorage("catalog-test", "bundles/")
+    blob_storage.part_size = 4
+    uri = blob_storage.uri_for("big.tar.gz")
+
+    with blob_storage.open_writer(uri) as writer:
+        for chunk in (b"abc", b"defg", b"hij"):
+            writer.write(chunk)
+
+    assert blob_storage.read(uri) == b"abcdefghij"
+    assert blob_storage.read(uri, 3, 4) == b"defg"
+
+    with pytest.raises(RuntimeError):
+        with blob_storage.open_writer(blob_storage.uri_for("partial.tar.gz")) as writer:
+            writer.write(b"0123456789")
+            raise RuntimeError("upload interrupted")
+
+    assert not blob_storage.exists(blob_storage.uri_for("partial.tar.gz"))
+    assert s3.uploads == {}
+
+
+def test_s3_bundle_descriptors_use_ranged_reads(tmp_path, s3):
+    data = _item_bundle(tmp_path)
+
+    uri = write_blob("demo-item", "1.0.0", data)
+
+    assert uri == "s3://catalog-test/catalog/blobs/demo-item@1.0.0.tar.gz"
+    s3.ranges.clear()
+    manifest, schema, _, _ = load_descriptor_from_bundle(uri)
+    assert manifest["id"] == "demo-item" and schema == {"type": "object"}
+
+    bundle_reads = [r for key, r in s3.ranges if key.endswith(".tar.gz")]
+    assert bundle_reads and all(bundle_reads)
+    fetched = sum(int(r.split("-")[1]) - int(r[len("bytes="):].split("-")[0]) + 1 for r in bundle_reads)
+    assert fetched < len(data) // 2
+
+    assert read_blob(uri) == data
+    assert delete_bundle(uri)
+    assert s3.objects == {}
+
+
+def test_extracts_bundle_from_remote_storage(tmp_path, s3, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(tmp_path / "catalog_registry.json"))
+    monkeypatch.setattr(registry, "LOCAL_CATALOG_PATH", str(tmp_path / "items"))
+    uri = write_blob("demo-item", "1.0.0", _item_bundle(tmp_path))
+    registry.upsert_version("demo-item", "1.0.0", {"id": "demo-item", "version": "1.0.0"},
+                            {"type": "object"}, None, uri, {"source": "test"})
+
+    path = registry.get_local_catalog_item_path("demo-item", "1.0.0")
+
+    assert (tmp_path / "items" / "demo-item" / "1.0.0" / "task.py").exists()
+    assert path == str(tmp_path / "items" / "demo-item" / "1.0.0")
+    assert bundles.load_bundle_index(uri)["bundle_size"] == len(read_blob(uri))
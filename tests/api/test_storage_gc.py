@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+import pytest
+
+from api.catalog import registry, storage_gc
+from api.catalog.access_tracker import EXTRACTED_MARKER, AccessTracker, access_tracker
+from api.catalog.bundles import pack_dir, write_bundle_index
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def catalog_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(tmp_path / "catalog_registry.json"))
+    monkeypatch.setattr(registry, "LOCAL_CATALOG_PATH", str(tmp_path / "items"))
+    bundles_dir = tmp_path / "bundles"
+    bundles_dir.mkdir()
+    return tmp_path, bundles_dir
+
+
+def _bundle(tmp_path, bundles_dir, item_id, version, *, age=0.0):
+    src = tmp_path / "src" / f"{item_id}-{version}"
+    src.mkdir(parents=True)
+    (src / "manifest.yaml").write_text(f"id: {item_id}\nversion: {version}\n")
+    (src / "schema.json").write_text(json.dumps({"type": "object"}))
+    (src / "task.py").write_text("def run(inputs):\n    return inputs\n")
+    path = bundles_dir / f"{item_id}@{version}.tar.gz"
+    path.write_bytes(pack_dir(str(src)))
+    write_bundle_index(str(path))
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+        os.utime(str(path) + ".index.json", (past, past))
+    return path
+
+
+def _register(item_id, version, bundle_path):
+    registry.upsert_version(item_id, version, {"id": item_id, "version": version},
+                            {"type": "object"}, None, f"file://{bundle_path}", {"source": "test"})
+
+
+def _run_gc(tmp_path, bundles_dir, **kwargs):
+    return storage_gc.collect_garbage(
+        bundles_dir=str(bundles_dir), blob_dir=str(tmp_path / "blobs"),
+        blob_grace_seconds=60, extracted_ttl_seconds=DAY, **kwargs,
+    )
+
+
+def test_gc_removes_unreferenced_blobs_and_cold_trees(catalog_dirs):
+    tmp_path, bundles_dir = catalog_dirs
+    live = _bundle(tmp_path, bundles_dir, "live", "1.0.0", age=10 * DAY)
+    orphan = _bundle(tmp_path, bundles_dir, "orphan", "1.0.0", age=10 * DAY)
+    in_flight = _bundle(tmp_path, bundles_dir, "in-flight", "1.0.0")
+    cold = _bundle(tmp_path, bundles_dir, "cold", "1.0.0", age=10 * DAY)
+    _register("live", "1.0.0", live)
+    _register("cold", "1.0.0", cold)
+
+    warm_path = registry.get_local_catalog_item_path("live", "1.0.0")
+    cold_path = registry.get_local_catalog_item_path("cold", "1.0.0")
+    access_tracker.flush()
+    past = time.time() - 2 * DAY
+    os.utime(os.path.join(cold_path, EXTRACTED_MARKER), (past, past))
+    # Hand-maintained source items carry no marker and are never collected
+    source = tmp_path / "items" / "source" / "1.0.0"
+    source.mkdir(parents=True)
+    (source / "task.py").write_text("def run(inputs):\n    return inputs\n")
+
+    report = _run_gc(tmp_path, bundles_dir, dry_run=True)
+    assert report["blobs_deleted"] == 1 and report["extracted_deleted"] == 1
+    assert orphan.exists() and os.path.isdir(cold_path)
+
+    report = _run_gc(tmp_path, bundles_dir)
+
+    assert not orphan.exists() and not os.path.exists(str(orphan) + ".index.json")
+    assert live.exists() and in_flight.exists() and cold.exists()
+    assert not os.path.exists(cold_path)
+    assert os.path.isdir(warm_path) and source.is_dir()
+    assert {d.get("reason") for d in report["deleted"]} == {"unreferenced", "cold"}
+    assert report["reclaimed_bytes"] == sum(d["bytes"] for d in report["deleted"]) > 0
+
+
+def test_access_tracker_batches_flushes(tmp_path):
+    flushes = []
+    clock = [0.0]
+    tracker = AccessTracker(batch_size=3, interval=60,
+                            flush_func=lambda bundles, markers: flushes.append((bundles, markers)),
+                            clock=lambda: clock[0])
+
+    tracker.record("/data/a.tar.gz")
+    tracker.record("/data/a.tar.gz")
+    tracker.record("/data/b.tar.gz")
+    assert flushes == []
+
+    tracker.record(extracted_path=str(tmp_path / "item"))
+    assert len(flushes) == 1
+    bundles, markers = flushes[0]
+    assert set(bundles) == {"file:///data/a.tar.gz", "file:///data/b.tar.gz"}
+    assert list(markers) == [str(tmp_path / "item" / EXTRACTED_MARKER)]
+
+    clock[0] = 61
+    tracker.record("/data/c.tar.gz")
+    assert len(flushes) == 2
+
+
+def test_storage_gc_endpoint_queues_job(app_client):
+    response = app_client.post("/catalog/storage/gc", params={"dry_run": True})
+
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    assert response.json()["job_id"]
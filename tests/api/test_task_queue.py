@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 from types import SimpleNamespace
 
 import pytest
@@ -72,4 +75,126 @@ async def test_enqueue_job_rejects_disabled_task(monkeypatch):
 
 async def test_enqueue_job_rejects_unknown_task():
     with pytest.raises(ValueError):
-        await enqueue_job("unknown_task", "job-789", payload={})
\ No newline at end of file
+        await enqueue_job("unknown_task", "job-789", payload={})
+
+async def test_enqueue_job_publishes_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def slow_delay(job_id, payload):
+        threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return SimpleNamespace(id="celery-id")
+
+    monkeypatch.setattr("worker.celery_tasks.example_long_task.delay", slow_delay)
+    monkeypatch.setattr(settings, "CELERY_TASKS", ["example_long_task"])
+    monkeypatch.setattr(settings, "CELERY_DISPATCH_THREADS", 4)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        results = await asyncio.gather(*(enqueue_job("example_long_task", f"job-{i}", payload={}) for i in range(4)))
+    finally:
+        ticking.cancel()
+
+    assert [r.job_id for r in results] == [f"job-{i}" for i in range(4)]
+    assert all(name.startswith("celery-dispatch") for name in threads)
+    # The loop kept running while the four 200 ms publishes were in flight
+    assert ticks >= 5
+
+
+async def test_enqueue_jobs_publishes_over_one_producer_and_writes_statuses(monkeypatch):
+    import fakeredis.aioredis
+
+    from api.task_queue import enqueue_jobs
+    from worker import celery_tasks
+    from worker.job_status import fetch_job_metadata
+
+    server = fakeredis.FakeServer()
+    # Reads the job hashes as the dispatcher thread publishes
+    sync_redis = fakeredis.FakeRedis(server=server)
+    producers, published = [], []
+
+    class FakeProducer:
+        def __enter__(self):
+            producers.append(self)
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def fake_apply_async(args=None, kwargs=None, producer=None, **options):
+        published.append((args, kwargs, producer))
+        # The QUEUED record is in place before any worker can see the task
+        assert sync_redis.hget(f"{settings.JOB_STATUS_PREFIX}{args[0]}", "state") == b"QUEUED"
+        return SimpleNamespace(id=args[0])
+
+    monkeypatch.setattr(celery_tasks.example_long_task.app, "producer_or_acquire", lambda: FakeProducer())
+    monkeypatch.setattr(celery_tasks.example_long_task, "apply_async", fake_apply_async)
+    monkeypatch.setattr(settings, "CELERY_TASKS", ["example_long_task"])
+
+    redis_client = fakeredis.aioredis.FakeRedis(server=server)
+    payloads = [{"n": i} for i in range(3)]
+    try:
+        job_ids = await enqueue_jobs(
+            "example_long_task", payloads, redis_client=redis_client, job_type="example_long_task"
+        )
+
+        assert len(set(job_ids)) == 3
+        assert len(producers) == 1
+        assert [(args, kwargs) for args, kwargs, _ in published] == [
+            ((job_id,), {"payload": payload}) for job_id, payload in zip(job_ids, payloads)
+        ]
+        assert all(producer is producers[0] for _, _, producer in published)
+        for job_id, payload in zip(job_ids, payloads):
+            metadata, _ = await fetch_job_metadata(redis_client, job_id)
+            assert metadata["state"] == "QUEUED"
+            assert metadata["type"] == "example_long_task"
+            assert metadata["params"] == payload
+    finally:
+        await redis_client.aclose()
+
+
+async def test_enqueue_jobs_marks_unpublished_jobs_failed(monkeypatch):
+    import fakeredis.aioredis
+
+    from api.task_queue import enqueue_jobs
+    from worker import celery_tasks
+    from worker.job_status import fetch_job_metadata, job_stats
+
+    sent = []
+
+    def flaky_apply_async(args=None, kwargs=None, producer=None, **options):
+        if sent:
+            raise ConnectionError("broker went away")
+        sent.append(args[0])
+        return SimpleNamespace(id=args[0])
+
+    monkeypatch.setattr(celery_tasks.example_long_task, "apply_async", flaky_apply_async)
+    monkeypatch.setattr(settings, "CELERY_TASKS", ["example_long_task"])
+
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        with pytest.raises(ConnectionError):
+            await enqueue_jobs(
+                "example_long_task", [{"n": i} for i in range(3)],
+                redis_client=redis_client, job_type="example_long_task",
+            )
+
+        states = {}
+        for key in await redis_client.keys(f"{settings.JOB_STATUS_PREFIX}*"):
+            job_id = key.decode()[len(settings.JOB_STATUS_PREFIX):]
+            metadata, _ = await fetch_job_metadata(redis_client, job_id)
+            states[job_id] = metadata["state"]
+        assert states.pop(sent[0]) == "QUEUED"
+        assert list(states.values()) == ["FAILED", "FAILED"]
+        stats = await job_stats(redis_client)
+        assert stats["states"]["QUEUED"] == 1 and stats["states"]["FAILED"] == 2
+    finally:
+        await redis_client.aclose()
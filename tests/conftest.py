@@ -28,6 +28,7 @@ def app_client(fakeredis_server, celery_eager_app, monkeypatch):
 
     deps_module._redis_client = None
     deps_module.get_redis = override_get_redis
+    app.dependency_overrides[original_deps_get_redis] = override_get_redis
     if original_main_get_redis is not None:
         main_module.get_redis = override_get_redis
 
@@ -40,17 +41,26 @@ def app_client(fakeredis_server, celery_eager_app, monkeypatch):
 
         return _fake_delay
 
+    def make_fake_apply_async(task_name: str):
+        def _fake_apply_async(args=None, kwargs=None, **options):
+            return make_fake_delay(task_name)(*(args or ()), **(kwargs or {}))
+
+        return _fake_apply_async
+
     for task_name in (
         "example_long_task",
         "run_catalog_item",
         "provision_server_task",
         "import_catalog_item_task",
         "sync_catalog_registry_task",
+        "sync_catalog_bundles_task",
+        "catalog_storage_gc_task",
         "sync_catalog_item",
         "sync_catalog_item_from_git",
     ):
         task = getattr(celery_tasks_module, task_name)
         monkeypatch.setattr(task, "delay", make_fake_delay(task_name))
+        monkeypatch.setattr(task, "apply_async", make_fake_apply_async(task_name))
 
     client = TestClient(app)
     try:
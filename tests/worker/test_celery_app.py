@@ -23,6 +23,20 @@ def test_celery_app_module_configured():
     assert celery_app.conf.accept_content == ["json"]
 
 
+def test_celery_beat_schedules_job_index_reaper():
+    entry = celery_app.conf.beat_schedule["reap-job-indexes"]
+    assert entry["task"] == "reap_job_indexes_task"
+    assert entry["schedule"] == float(settings.JOB_INDEX_REAP_INTERVAL_SECONDS)
+
+
+def test_arq_cron_follows_reap_interval():
+    from worker.worker_settings import _cron_every
+
+    assert _cron_every(15) == {"second": {0, 15, 30, 45}}
+    assert _cron_every(600) == {"minute": {0, 10, 20, 30, 40, 50}, "second": 0}
+    assert _cron_every(6 * 3600) == {"hour": {0, 6, 12, 18}, "minute": 0, "second": 0}
+
+
 def test_create_celery_app_returns_new_instance():
     new_app = create_celery_app()
     try:
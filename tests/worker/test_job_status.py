@@ -0,0 +1,557 @@
+import asyncio
+import json
+import time
+
+import fakeredis.aioredis
+import pytest
+
+from api.settings import settings
+from worker.job_status import (
+    JOB_EVENT_STREAM,
+    ProgressWriter,
+    fetch_job_metadata,
+    fetch_job_summaries,
+    job_stats,
+    parse_event_id,
+    query_job_ids,
+    read_job_events,
+    reap_job_indexes,
+    set_status,
+    touch_job,
+    touch_jobs,
+)
+
+
+pytestmark = pytest.mark.anyio("asyncio")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class _CountingRedis(fakeredis.aioredis.FakeRedis):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return await super().execute_command(*args, **options)
+
+
+async def test_touch_job_is_one_round_trip(fakeredis_server):
+    redis_client = _CountingRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    job = {
+        "id": "touch-once",
+        "type": "example",
+        "state": "QUEUED",
+        "progress": 0,
+        "params": {"inputs": {"a": 1}},
+        "result": None,
+    }
+    try:
+        await touch_job(redis_client, job)
+        redis_client.commands.clear()
+
+        job.update(state="RUNNING", progress=40)
+        await touch_job(redis_client, job)
+
+        assert redis_client.commands == ["EVALSHA"]
+        metadata, key_type = await fetch_job_metadata(redis_client, "touch-once")
+        assert key_type == "hash"
+        assert metadata["state"] == "RUNNING"
+        assert metadata["progress"] == 40.0
+        assert metadata["params"] == {"inputs": {"a": 1}}
+        assert "result" not in metadata
+
+        assert await redis_client.zscore("jobs:index:state:RUNNING", "touch-once") is not None
+        assert await redis_client.zscore("jobs:index:state:QUEUED", "touch-once") is None
+        assert await redis_client.zscore("jobs:index", "touch-once") is not None
+        ttl = await redis_client.ttl(f"{settings.JOB_STATUS_PREFIX}touch-once")
+        assert 0 < ttl <= settings.JOB_TTL
+
+        messages = []
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                messages.append(json.loads(message["data"]))
+        snapshot, delta = messages
+        assert parse_event_id(snapshot["event_id"]) < parse_event_id(delta.pop("event_id"))
+        assert snapshot["type"] == "upsert" and snapshot["seq"] == 1
+        assert snapshot["job"]["state"] == "QUEUED" and snapshot["job"]["params"] == {"inputs": {"a": 1}}
+        assert delta == {"type": "delta", "id": "touch-once", "seq": 2,
+                         "changes": {"state": "RUNNING", "progress": 40}}
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_touch_job_loads_script_on_cold_server():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        await redis_client.script_flush()
+        await touch_job(redis_client, {"id": "cold-server", "state": "QUEUED"})
+
+        metadata, _ = await fetch_job_metadata(redis_client, "cold-server")
+        assert metadata["state"] == "QUEUED"
+    finally:
+        await redis_client.aclose()
+
+
+async def test_touch_jobs_writes_every_job_on_cold_server():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    job_ids = [f"bulk-{i}" for i in range(3)]
+    try:
+        await redis_client.script_flush()
+        await touch_jobs(redis_client, [
+            {"id": job_id, "type": "bulk", "state": "QUEUED", "params": {"n": i}}
+            for i, job_id in enumerate(job_ids)
+        ])
+
+        for i, job_id in enumerate(job_ids):
+            metadata, _ = await fetch_job_metadata(redis_client, job_id)
+            assert metadata["state"] == "QUEUED"
+            assert metadata["params"] == {"n": i}
+        indexed, total, _ = await query_job_ids(redis_client, state="QUEUED", job_type="bulk")
+        assert sorted(indexed) == job_ids and total == 3
+
+        published = []
+        while len(published) < len(job_ids):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message:
+                published.append(json.loads(message["data"])["job"]["id"])
+        assert published == job_ids
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_set_status_merges_fields_server_side(fakeredis_server):
+    redis_client = _CountingRedis(server=fakeredis_server)
+    job_key = f"{settings.JOB_STATUS_PREFIX}merge-job"
+    try:
+        await touch_job(redis_client, {"id": "merge-job", "type": "example", "state": "QUEUED",
+                                       "params": {"inputs": {"a": 1}}})
+        running = await set_status(redis_client, "merge-job", "RUNNING", {"progress": 10})
+        redis_client.commands.clear()
+
+        # A second writer touching a different field does not clobber the first
+        await set_status(redis_client, "merge-job", "RUNNING", {"message": "halfway"})
+        assert redis_client.commands == ["EVALSHA"]
+        done = await set_status(redis_client, "merge-job", "SUCCEEDED", {"result": {"ok": True}})
+
+        assert done["progress"] == 10.0 and done["message"] == "halfway"
+        assert done["params"] == {"inputs": {"a": 1}} and done["result"] == {"ok": True}
+        assert done["started_at"] == running["started_at"]
+        assert done["finished_at"] >= done["started_at"]
+        assert await redis_client.zscore("jobs:index:state:SUCCEEDED", "merge-job") is not None
+        assert await redis_client.zscore("jobs:index:state:RUNNING", "merge-job") is None
+        assert await redis_client.ttl(job_key) > 0
+    finally:
+        await redis_client.aclose()
+
+
+async def test_set_status_converts_legacy_string_record(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    job_key = f"{settings.JOB_STATUS_PREFIX}legacy-job"
+    try:
+        await redis_client.set(job_key, json.dumps({"id": "legacy-job", "type": "example", "state": "QUEUED",
+                                                    "params": {"tags": []}, "progress": 0}))
+
+        await set_status(redis_client, "legacy-job", "RUNNING", {"progress": 25})
+
+        metadata, key_type = await fetch_job_metadata(redis_client, "legacy-job")
+        assert key_type == "hash"
+        assert metadata["type"] == "example" and metadata["progress"] == 25.0
+        assert metadata["params"] == {"tags": []}
+
+        messages = []
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                messages.append(json.loads(message["data"]))
+        assert len(messages) == 1
+        assert messages[0]["job"]["state"] == "RUNNING"
+        assert messages[0]["job"]["progress"] == 25
+        assert messages[0]["job"]["params"] == {"tags": []}
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_progress_writer_coalesces_updates_within_window(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    clock = [100.0]
+    writer = ProgressWriter(redis_client, "progress-job", max_writes_per_second=4, clock=lambda: clock[0])
+    try:
+        before = (await job_stats(redis_client))["progress_writes"]
+        assert await writer.update("RUNNING", {"progress": 5}) is True
+        for step in range(1, 10):
+            clock[0] += 0.01
+            assert await writer.update("RUNNING", {"progress": 5 + step, "message": f"step {step}"}) is False
+
+        metadata, _ = await fetch_job_metadata(redis_client, "progress-job")
+        assert metadata["progress"] == 5.0 and "message" not in metadata
+
+        clock[0] += 0.25
+        assert await writer.update("RUNNING", {"progress": 50}) is True
+        metadata, _ = await fetch_job_metadata(redis_client, "progress-job")
+        assert metadata["progress"] == 50.0 and metadata["message"] == "step 9"
+
+        clock[0] += 0.01
+        await writer.update("RUNNING", {"progress": 60})
+        assert await writer.update("SUCCEEDED", {"result": {"ok": True}}) is True
+        metadata, _ = await fetch_job_metadata(redis_client, "progress-job")
+        assert metadata["state"] == "SUCCEEDED" and metadata["progress"] == 60.0
+
+        assert (writer.written, writer.suppressed) == (3, 10)
+        after = (await job_stats(redis_client))["progress_writes"]
+        assert after["written"] - before["written"] == 3
+        assert after["suppressed"] - before["suppressed"] == 10
+    finally:
+        await redis_client.aclose()
+
+
+async def test_progress_writer_flushes_trailing_update(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    writer = ProgressWriter(redis_client, "trailing-job", max_writes_per_second=20)
+    try:
+        await writer.update("RUNNING", {"progress": 10})
+        assert await writer.update("RUNNING", {"progress": 20}) is False
+
+        await asyncio.sleep(0.2)
+        metadata, _ = await fetch_job_metadata(redis_client, "trailing-job")
+        assert metadata["progress"] == 20.0
+        assert writer.written == 2
+    finally:
+        await redis_client.aclose()
+
+
+async def test_job_events_send_deltas_between_snapshots(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    big_inputs = {"hosts": [f"host-{i}.example.com" for i in range(200)]}
+    try:
+        await touch_job(redis_client, {"id": "delta-job", "type": "example", "state": "QUEUED",
+                                       "params": {"inputs": big_inputs}})
+        for progress in (10, 20, 30):
+            await set_status(redis_client, "delta-job", "RUNNING", {"progress": progress, "message": "working"})
+        await set_status(redis_client, "delta-job", "SUCCEEDED", {"progress": 100, "result": {"ok": True}})
+
+        raw = []
+        for _ in range(20):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                raw.append(message["data"])
+        events = [json.loads(data) for data in raw]
+
+        assert [e["type"] for e in events] == ["upsert", "delta", "delta", "delta", "upsert"]
+        assert [e["seq"] for e in events] == [1, 2, 3, 4, 5]
+        first, _, third = events[1:4]
+        assert first["changes"]["state"] == "RUNNING" and "started_at" in first["changes"]
+        # Unchanged fields (the message) are not repeated
+        assert set(third["changes"]) == {"progress", "updated_at"}
+        assert all(len(data) < 300 for data in raw[1:4])
+        assert events[4]["job"]["params"]["inputs"] == big_inputs
+        assert events[4]["job"]["result"] == {"ok": True}
+        assert events[4]["job"]["seq"] == 5
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_job_events_skip_empty_writes_and_internal_fields(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    job = {"id": "quiet-job", "type": "example", "state": "QUEUED"}
+    try:
+        await touch_job(redis_client, job)
+        await touch_job(redis_client, job)
+        await set_status(redis_client, "quiet-job", "RUNNING", {"progress": 0.00001})
+        await set_status(redis_client, "quiet-job", "SUCCEEDED", {"progress": 100})
+
+        events = []
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                events.append(json.loads(message["data"]))
+
+        assert [(e["type"], e["seq"]) for e in events] == [("upsert", 1), ("delta", 2), ("upsert", 3)]
+        assert events[1]["changes"]["progress"] == 0.00001
+        assert "started_ts" not in events[2]["job"]
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_fetch_job_summaries_skips_heavy_fields(fakeredis_server):
+    redis_client = _CountingRedis(server=fakeredis_server)
+    try:
+        await touch_job(redis_client, {"id": "summary-hash", "type": "example", "state": "SUCCEEDED",
+                                       "progress": 100, "result": {"rows": list(range(1000))}})
+        await redis_client.set(f"{settings.JOB_STATUS_PREFIX}summary-legacy",
+                               json.dumps({"id": "summary-legacy", "type": "legacy", "state": "FAILED",
+                                           "error": {"error_message": "boom"}}))
+        redis_client.commands.clear()
+
+        summaries = await fetch_job_summaries(redis_client, ["summary-legacy", "summary-missing", "summary-hash"])
+
+        assert list(summaries) == ["summary-legacy", "summary-hash"]
+        assert summaries["summary-hash"]["progress"] == 100.0
+        assert summaries["summary-hash"]["state"] == "SUCCEEDED"
+        assert "result" not in summaries["summary-hash"]
+        assert summaries["summary-legacy"] == {"id": "summary-legacy", "type": "legacy", "state": "FAILED"}
+        assert redis_client.commands.count("HGETALL") == 0
+    finally:
+        await redis_client.aclose()
+
+
+async def test_query_job_ids_filters_before_paginating():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        for i in range(12):
+            await touch_job(redis_client, {
+                "id": f"facet-{i:02d}",
+                "type": "catalog_execution" if i % 2 else "provision_server",
+                "state": "SUCCEEDED" if i % 3 == 0 else "RUNNING",
+                "params": {"user_id": "alice" if i < 6 else "bob", "item_id": "backup-config" if i % 4 == 1 else None},
+            })
+
+        ids, total, _ = await query_job_ids(redis_client, job_type="catalog_execution", start=0, stop=2)
+        assert total == 6 and ids == ["facet-11", "facet-09", "facet-07"]
+        ids, total, _ = await query_job_ids(redis_client, job_type="catalog_execution", start=3, stop=5)
+        assert ids == ["facet-05", "facet-03", "facet-01"]
+
+        ids, total, _ = await query_job_ids(redis_client, state="SUCCEEDED", user_id="bob")
+        assert (ids, total) == (["facet-09", "facet-06"], 2)
+
+        ids, total, _ = await query_job_ids(redis_client, item_id="backup-config", user_id="alice")
+        assert (ids, total) == (["facet-05", "facet-01"], 2)
+
+        ids, total, _ = await query_job_ids(redis_client, q="PROVISION", user_id="alice")
+        assert (ids, total) == (["facet-04", "facet-02", "facet-00"], 3)
+        ids, total, _ = await query_job_ids(redis_client, q="t-1", job_type="catalog_execution")
+        assert (ids, total) == (["facet-11"], 1)
+    finally:
+        await redis_client.aclose()
+
+
+async def test_reaper_trims_expired_index_members():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    now = 1_000_000.0
+    try:
+        await touch_job(redis_client, {"id": "fresh", "type": "kept", "state": "RUNNING"})
+        await touch_job(redis_client, {"id": "stale", "type": "gone", "state": "FAILED",
+                                       "params": {"user_id": "alice"}})
+        await touch_job(redis_client, {"id": "stale-2", "type": "kept", "state": "FAILED"})
+        # Last writes more than a TTL ago: those records have expired
+        await redis_client.zadd("jobs:index:updated", {"stale": now - 100, "stale-2": now - 60, "fresh": now - 5})
+        await redis_client.delete(f"{settings.JOB_STATUS_PREFIX}stale", f"{settings.JOB_STATUS_PREFIX}stale-2")
+
+        report = await reap_job_indexes(redis_client, now=now, ttl=50, batch_size=1)
+
+        assert report["total_trimmed"] == 9
+        assert report["trimmed"] == {
+            "jobs:index": 2,
+            "jobs:index:updated": 2,
+            "jobs:index:state:FAILED": 2,
+            "jobs:index:type:gone": 1,
+            "jobs:index:type:kept": 1,
+            "jobs:index:user:alice": 1,
+        }
+        assert report["facets_dropped"] == 2
+        assert await redis_client.zrange("jobs:index", 0, -1) == [b"fresh"]
+        assert await redis_client.smembers("jobs:index:facets") == {b"jobs:index:type:kept"}
+        # The expired jobs no longer count towards the current states
+        stats = await job_stats(redis_client)
+        assert stats["states"]["FAILED"] == 0 and stats["states"]["RUNNING"] == 1
+        assert stats["types"]["kept"] == {"RUNNING": 1, "FAILED": 0}
+    finally:
+        await redis_client.aclose()
+
+
+async def test_reaper_backfills_ids_indexed_before_the_updated_index():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    now = time.time()
+    try:
+        # Indexed by an older release: in jobs:index and a state index, never in jobs:index:updated
+        await redis_client.zadd("jobs:index", {"old-expired": now - 100, "old-live": now - 90})
+        await redis_client.zadd("jobs:index:state:RUNNING", {"old-expired": now - 100, "old-live": now - 90})
+        await redis_client.hset(f"{settings.JOB_STATUS_PREFIX}old-live", mapping={"id": "old-live", "state": "RUNNING"})
+        await redis_client.expire(f"{settings.JOB_STATUS_PREFIX}old-live", 30)
+
+        report = await reap_job_indexes(redis_client, now=now, ttl=50, batch_size=1)
+
+        assert report["backfilled"] == 2
+        assert await redis_client.zrange("jobs:index", 0, -1) == [b"old-live"]
+        assert await redis_client.zrange("jobs:index:state:RUNNING", 0, -1) == [b"old-live"]
+        assert await redis_client.zscore("jobs:index:updated", "old-live") >= now - 50
+
+        assert (await reap_job_indexes(redis_client, now=now, ttl=50))["backfilled"] == 0
+    finally:
+        await redis_client.aclose()
+
+
+async def test_reaper_keeps_records_written_since_their_index_score():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    now = time.time()
+    try:
+        await touch_job(redis_client, {"id": "still-live", "type": "kept", "state": "QUEUED"})
+        await redis_client.zadd("jobs:index:updated", {"still-live": now - 100})
+
+        report = await reap_job_indexes(redis_client, now=now, ttl=50, batch_size=1)
+
+        assert report["total_trimmed"] == 0
+        assert await redis_client.zrange("jobs:index:state:QUEUED", 0, -1) == [b"still-live"]
+        assert await redis_client.zscore("jobs:index:updated", "still-live") >= now - 50
+        assert (await job_stats(redis_client))["states"]["QUEUED"] == 1
+    finally:
+        await redis_client.aclose()
+
+
+async def test_creation_index_does_not_reorder_while_jobs_run():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        for job_id in ("order-a", "order-b", "order-c"):
+            await touch_job(redis_client, {"id": job_id, "type": "example", "state": "QUEUED"})
+        created = await redis_client.zscore("jobs:index", "order-a")
+
+        await set_status(redis_client, "order-a", "RUNNING", {"progress": 10})
+        await set_status(redis_client, "order-a", "RUNNING", {"progress": 20})
+
+        assert await redis_client.zscore("jobs:index", "order-a") == created
+        assert await redis_client.zscore("jobs:index:state:RUNNING", "order-a") == created
+        assert await redis_client.zscore("jobs:index:state:QUEUED", "order-a") is None
+
+        ids, _, _ = await query_job_ids(redis_client)
+        assert ids == ["order-c", "order-b", "order-a"]
+        ids, _, _ = await query_job_ids(redis_client, order="updated")
+        assert ids == ["order-a", "order-c", "order-b"]
+        ids, total, _ = await query_job_ids(redis_client, order="updated", state="QUEUED")
+        assert (ids, total) == (["order-c", "order-b"], 2)
+    finally:
+        await redis_client.aclose()
+
+
+async def test_cursor_pages_stay_stable_while_jobs_arrive():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        for i in range(7):
+            await touch_job(redis_client, {"id": f"cursor-{i}", "type": "example", "state": "QUEUED"})
+        # Same-score members are ordered by id and must not be skipped or repeated
+        await redis_client.zadd("jobs:index", {"cursor-3": 500.0, "cursor-4": 500.0, "cursor-5": 500.0})
+
+        first, total, cursor = await query_job_ids(redis_client, start=0, stop=2)
+        assert first == ["cursor-6", "cursor-2", "cursor-1"] and total == 7 and cursor
+
+        await touch_job(redis_client, {"id": "cursor-new", "type": "example", "state": "QUEUED"})
+
+        seen = list(first)
+        while cursor:
+            page, total, cursor = await query_job_ids(redis_client, start=0, stop=2, cursor=cursor)
+            seen.extend(page)
+        assert total == 8
+        assert seen == ["cursor-6", "cursor-2", "cursor-1", "cursor-0", "cursor-5", "cursor-4", "cursor-3"]
+
+        with pytest.raises(ValueError):
+            await query_job_ids(redis_client, cursor="not-a-cursor")
+    finally:
+        await redis_client.aclose()
+
+
+async def test_job_stats_follow_state_transitions():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    catalog_params = {"item_id": "backup-config", "version": "1.0.0", "inputs": {}}
+    try:
+        await touch_job(redis_client, {"id": "stats-a", "type": "example_long_task", "state": "QUEUED"})
+        await touch_job(redis_client, {"id": "stats-b", "type": "catalog_execution", "state": "QUEUED",
+                                       "params": catalog_params})
+        await touch_job(redis_client, {"id": "stats-c", "type": "catalog_execution", "state": "QUEUED",
+                                       "params": catalog_params})
+        await touch_job(redis_client, {"id": "stats-d", "type": "example_long_task", "state": "QUEUED"})
+
+        for job_id in ("stats-a", "stats-b", "stats-c"):
+            await set_status(redis_client, job_id, "RUNNING", {"progress": 10})
+            await set_status(redis_client, job_id, "RUNNING", {"progress": 50})
+        await redis_client.hset(f"{settings.JOB_STATUS_PREFIX}stats-a", "started_ts", time.time() - 45)
+        await set_status(redis_client, "stats-a", "SUCCEEDED")
+        await set_status(redis_client, "stats-b", "FAILED", {"error": {"error_message": "boom"}})
+        # Workers still on touch_job count the same way
+        await touch_job(redis_client, {"id": "stats-c", "type": "catalog_execution", "state": "SUCCEEDED",
+                                       "params": catalog_params})
+
+        stats = await job_stats(redis_client)
+
+        assert stats["states"] == {"QUEUED": 1, "RUNNING": 0, "SUCCEEDED": 2, "FAILED": 1, "CANCELLED": 0}
+        assert stats["types"]["example_long_task"] == {"QUEUED": 1, "RUNNING": 0, "SUCCEEDED": 1}
+        assert stats["types"]["catalog_execution"] == {"QUEUED": 0, "RUNNING": 0, "SUCCEEDED": 1, "FAILED": 1}
+        assert stats["catalog_items"] == {"backup-config@1.0.0": {"succeeded": 1, "failed": 1, "success_rate": 0.5}}
+        assert stats["durations"]["all"]["count"] == 3
+        assert stats["durations"]["all"]["p50_seconds"] == 0.5
+        assert stats["durations"]["all"]["p95_seconds"] == 60.0
+        assert stats["durations"]["example_long_task"]["p50_seconds"] == 60.0
+    finally:
+        await redis_client.aclose()
+
+
+async def test_job_stats_move_with_a_type_change():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        await touch_job(redis_client, {"id": "retyped", "type": "git_webhook", "state": "QUEUED"})
+        await touch_job(redis_client, {"id": "retyped", "type": "git_import", "state": "RUNNING"})
+        await touch_job(redis_client, {"id": "retyped", "type": "git_import", "state": "SUCCEEDED"})
+
+        stats = await job_stats(redis_client)
+        assert stats["types"]["git_webhook"] == {"QUEUED": 0}
+        assert stats["types"]["git_import"] == {"RUNNING": 0, "SUCCEEDED": 1}
+
+        # A type change without a state change moves the count too
+        await touch_job(redis_client, {"id": "retyped", "type": "git_sync", "state": "SUCCEEDED"})
+        stats = await job_stats(redis_client)
+        assert stats["types"]["git_import"]["SUCCEEDED"] == 0
+        assert stats["types"]["git_sync"] == {"SUCCEEDED": 1}
+        assert stats["states"]["SUCCEEDED"] == 1
+    finally:
+        await redis_client.aclose()
+
+
+async def test_job_events_resume_from_stream_after_last_seen_id():
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe("channel:jobs")
+    try:
+        await touch_job(redis_client, {"id": "resume", "type": "example", "state": "QUEUED"})
+        for progress in (10, 20, 30):
+            await set_status(redis_client, "resume", "RUNNING", {"progress": progress})
+
+        published = []
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                published.append(message["data"].decode())
+        assert await redis_client.xlen(JOB_EVENT_STREAM) == 4
+
+        # A client that saw the first two events gets exactly the two it missed, as published
+        last_seen = json.loads(published[1])["event_id"]
+        events, truncated = await read_job_events(redis_client, last_seen, count=1)
+        assert not truncated
+        assert [message for _, message in events] == published[2:]
+        assert [json.loads(message)["seq"] for _, message in events] == [3, 4]
+
+        assert await read_job_events(redis_client, events[-1][0]) == ([], False)
+        # An id older than the oldest retained entry may have missed trimmed events: re-sync
+        assert (await read_job_events(redis_client, "0-1"))[1] is True
+        with pytest.raises(ValueError):
+            await read_job_events(redis_client, "yesterday")
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
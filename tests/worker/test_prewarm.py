@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+
+import fakeredis.aioredis
+import pytest
+
+from api.catalog import registry
+from api.catalog.bundles import pack_dir, write_bundle_index
+from api.catalog.events import CATALOG_CHANNEL, publish_version_available, record_execution
+from api.catalog.settings import catalog_settings
+from worker import catalog_execute
+from worker.catalog_bundle_sync import run_sync_catalog_bundles_job
+from worker.catalog_execute import run_catalog_execution_job
+from worker.job_status import fetch_job_metadata
+from worker.prewarm import run_prewarmer
+
+
+pytestmark = pytest.mark.anyio("asyncio")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(tmp_path / "catalog_registry.json"))
+    monkeypatch.setattr(registry, "LOCAL_CATALOG_PATH", str(tmp_path / "local" / "items"))
+    bundles_dir = tmp_path / "bundles"
+    bundles_dir.mkdir()
+
+    def add_version(item_id, version):
+        src = tmp_path / "src" / f"{item_id}-{version}"
+        src.mkdir(parents=True)
+        (src / "manifest.yaml").write_text(f"id: {item_id}\nversion: {version}\n")
+        (src / "schema.json").write_text(json.dumps({"type": "object"}))
+        (src / "task.py").write_text("def run(inputs):\n    return inputs\n")
+        bundle = bundles_dir / f"{item_id}@{version}.tar.gz"
+        bundle.write_bytes(pack_dir(str(src)))
+        write_bundle_index(str(bundle))
+        registry.upsert_version(item_id, version, {"id": item_id, "version": version},
+                                {"type": "object"}, None, f"file://{bundle}", {"source": "test"})
+        return tmp_path / "local" / "items" / item_id / version
+
+    return add_version
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+async def test_prewarmer_warms_top_versions_then_announced_ones(catalog, fakeredis_server, monkeypatch):
+    hot = catalog("hot-item", "1.0.0")
+    cold = catalog("cold-item", "1.0.0")
+    fresh = catalog("fresh-item", "2.0.0")
+
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    await redis_client.delete("catalog:exec_counts")
+    for _ in range(3):
+        await record_execution(redis_client, "hot-item", "1.0.0")
+    await record_execution(redis_client, "cold-item", "1.0.0")
+
+    monkeypatch.setattr(catalog_settings, "CATALOG_PREWARM_TOP_N", 1)
+    ready = asyncio.Event()
+    task = asyncio.create_task(run_prewarmer(redis_client, ready=ready))
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=5)
+        assert (hot / "task.py").exists()
+        assert os.path.isdir(hot / "__pycache__")
+        assert not cold.exists()
+
+        await publish_version_available(redis_client, "fresh-item", "2.0.0", source="test")
+        await _wait_for(lambda: (fresh / "task.py").exists())
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await redis_client.aclose()
+
+
+async def test_bundle_sync_job_announces_synced_versions(fakeredis_server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis_server)
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(CATALOG_CHANNEL)
+
+    def fake_sync(_bundles_dir):
+        return {"results": [
+            {"filename": "a@1.0.0.tar.gz", "item_id": "a", "version": "1.0.0", "status": "synced"},
+            {"filename": "b@1.0.0.tar.gz", "item_id": "b", "version": "1.0.0", "status": "unchanged"},
+        ]}
+
+    try:
+        await run_sync_catalog_bundles_job(redis_client, "bundle-sync-events", {}, sync_func=fake_sync)
+
+        events = []
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                events.append(json.loads(message["data"]))
+        assert [(e["type"], e["item_id"]) for e in events] == [("version_available", "a")]
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
+
+
+async def test_execution_count_failure_does_not_fail_the_job(catalog, monkeypatch):
+    catalog("counted-item", "1.0.0")
+
+    async def broken_record_execution(*_args):
+        raise ConnectionError("redis went away")
+
+    monkeypatch.setattr(catalog_execute, "record_execution", broken_record_execution)
+    redis_client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        result = await run_catalog_execution_job(redis_client, "count-fails", "counted-item", "1.0.0", {"a": 1})
+
+        assert result == {"a": 1}
+        metadata, _ = await fetch_job_metadata(redis_client, "count-fails")
+        assert metadata["state"] == "SUCCEEDED"
+    finally:
+        await redis_client.aclose()
@@ -3,9 +3,13 @@ export const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:80
 export const api = {
   async fetchJobs(params: {
     state?: string;
+    type?: string;
+    user_id?: string;
+    item_id?: string;
     q?: string;
     page?: number;
     page_size?: number;
+    cursor?: string;
   } = {}) {
     const searchParams = new URLSearchParams();
     Object.entries(params).forEach(([key, value]) => {
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { Job, JobList } from '../../../types';
 import { api } from '../../../api';
 import JobTable from './JobTable';
@@ -16,6 +16,9 @@ const JobsDashboard = () => {
     q: '',
   });
 
+  // Keyset cursors per page number, so paging stays stable while new jobs arrive
+  const pageCursors = useRef<Record<number, string>>({});
+
   const fetchJobs = useCallback(async () => {
     try {
       console.log('Fetching jobs with filters:', filters, 'page:', page);
@@ -25,8 +28,12 @@ const JobsDashboard = () => {
         ...filters,
         page,
         page_size: pageSize,
+        cursor: pageCursors.current[page],
       });
       console.log('Jobs fetched successfully:', data);
+      if (data.next_cursor) {
+        pageCursors.current[page + 1] = data.next_cursor;
+      }
       setJobs(data.items);
       setTotal(data.total);
     } catch (err) {
@@ -47,7 +54,7 @@ const JobsDashboard = () => {
       
       websocket.onmessage = (event) => {
         try {
-          const update = JSON.parse(event.data);
+          const update: import('../../../types').JobUpdateEvent = JSON.parse(event.data);
           if (update.type === 'upsert' && update.job) {
             setJobs((prevJobs: Job[]) => {
               const updatedJobs = [...prevJobs];
@@ -60,6 +67,24 @@ const JobsDashboard = () => {
                 updatedJobs.unshift(update.job);
               }
               
+              return updatedJobs;
+            });
+          } else if (update.type === 'delta') {
+            setJobs((prevJobs: Job[]) => {
+              const existingIndex = prevJobs.findIndex(job => job.id === update.id);
+              if (existingIndex < 0) {
+                return prevJobs;
+              }
+              const current = prevJobs[existingIndex];
+              if (current.seq !== undefined && update.seq !== current.seq + 1) {
+                // Missed an update: replace the row with the full job
+                api.fetchJob(update.id).then((job: Job) => {
+                  setJobs(jobs => jobs.map(j => (j.id === job.id ? job : j)));
+                });
+                return prevJobs;
+              }
+              const updatedJobs = [...prevJobs];
+              updatedJobs[existingIndex] = { ...current, ...update.changes, seq: update.seq };
               return updatedJobs;
             });
           }
@@ -97,6 +122,7 @@ const JobsDashboard = () => {
   };
 
   const handleFiltersChange = (newFilters: { state: string; q: string }) => {
+    pageCursors.current = {};
     setFilters(newFilters);
     setPage(1); // Reset to first page when filters change
   };
@@ -10,13 +10,23 @@ export interface Job {
   params?: Record<string, any>;
   result?: Record<string, any>;
   error?: Record<string, any>;
+  seq?: number;
 }
 
+// channel:jobs events: full snapshots on creation and terminal states, deltas in between.
+// `seq` increases by one per job update; a gap means an update was missed. `event_id` is the
+// jobs:stream id to resume from after a reconnect. Batched connections merge a job's deltas
+// into one covering `first_seq`..`seq`.
+export type JobUpdateEvent =
+  | { type: 'upsert'; seq: number; event_id?: string; job: Job }
+  | { type: 'delta'; id: string; seq: number; first_seq?: number; event_id?: string; changes: Partial<Job> };
+
 export interface JobList {
   items: Job[];
   page: number;
   page_size: number;
   total: number;
+  next_cursor?: string | null;
 }
 
 export interface JobCreate {
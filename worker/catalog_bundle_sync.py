@@ -0,0 +1,98 @@
+"""Shared helpers for bundle directory synchronization jobs."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from api.catalog.bundle_sync import BUNDLES_DIR, sync_bundle_directory
+from api.catalog.events import publish_version_available
+from worker.job_status import touch_job
+
+
+async def run_sync_catalog_bundles_job(
+    redis_client,
+    job_id: str,
+    payload: Dict[str, Any] | None = None,
+    *,
+    now: Callable[[], datetime] | None = None,
+    sync_func: Callable[..., Dict[str, Any]] | None = None,
+) -> Dict[str, Any]:
+    """Shared async implementation for syncing the bundles directory into the registry."""
+
+    now = now or datetime.utcnow
+    sync_func = sync_func or sync_bundle_directory
+    payload = payload or {}
+
+    def timestamp() -> str:
+        return now().isoformat()
+
+    job_meta: Dict[str, Any] = {
+        "id": job_id,
+        "type": "sync_catalog_bundles",
+        "state": "QUEUED",
+        "progress": 0,
+        "created_at": timestamp(),
+        "updated_at": timestamp(),
+        "started_at": None,
+        "finished_at": None,
+        "params": payload,
+        "result": None,
+        "error": None,
+        "current_step": "Queued",
+    }
+    await touch_job(redis_client, job_meta)
+
+    async def update_job(**updates: Any) -> None:
+        job_meta.update(updates)
+        job_meta["updated_at"] = timestamp()
+        await touch_job(redis_client, job_meta)
+
+    try:
+        await update_job(
+            state="RUNNING",
+            started_at=timestamp(),
+            progress=10,
+            current_step="Scanning bundles directory",
+        )
+
+        # Parsing runs in a process pool; keep the event loop free while it does
+        report = await asyncio.to_thread(sync_func, payload.get("bundles_dir") or BUNDLES_DIR)
+        for synced in report.get("results", []):
+            if synced["status"] == "synced":
+                await publish_version_available(
+                    redis_client, synced["item_id"], synced["version"], source="bundle-sync"
+                )
+
+        result = {
+            "message": "Bundle sync completed",
+            "sync_report": report,
+            "completed_at": timestamp(),
+        }
+
+        await update_job(
+            state="SUCCEEDED",
+            progress=100,
+            current_step="Completed",
+            finished_at=timestamp(),
+            result=result,
+        )
+        return result
+
+    except Exception as exc:
+        error_info = {
+            "error_type": type(exc).__name__,
+            "error_message": str(exc),
+            "timestamp": timestamp(),
+        }
+        await update_job(
+            state="FAILED",
+            current_step="Failed",
+            finished_at=timestamp(),
+            error=error_info,
+        )
+        raise
+
+
+__all__ = ["run_sync_catalog_bundles_job"]
@@ -9,9 +9,10 @@ from typing import Any, Dict
 
 from jsonschema.exceptions import ValidationError
 
+from api.catalog.events import record_execution
 from api.catalog.registry import get_descriptor, get_local_catalog_item_path
 from api.catalog.validate import validate_inputs
-from worker.job_status import set_status, touch_job
+from worker.job_status import ProgressWriter, touch_job
 
 
 def _load_task(task_path: str):
@@ -60,17 +61,16 @@ async def run_catalog_execution_job(
         "error": None,
     }
     await touch_job(redis_client, job_meta)
+    progress_writer = ProgressWriter(redis_client, job_id)
 
     async def progress_callback(progress: int, message: str | None = None):
         payload = {"progress": progress}
         if message:
             payload["message"] = message
-        await set_status(redis_client, job_id, "RUNNING", payload)
+        await progress_writer.update("RUNNING", payload)
 
     try:
-        await set_status(
-            redis_client,
-            job_id,
+        await progress_writer.update(
             "RUNNING",
             {"progress": 5, "message": "Starting task execution"},
         )
@@ -78,6 +78,11 @@ async def run_catalog_execution_job(
         descriptor = get_descriptor(item_id, version)
         if not descriptor:
             raise FileNotFoundError(f"Descriptor not found for {item_id}@{version}")
+        # Execution counts pick the versions workers pre-warm at boot; advisory, so best effort
+        try:
+            await record_execution(redis_client, item_id, version)
+        except Exception as exc:
+            print(f"⚠️ Failed to record execution of {item_id}@{version}: {exc}")
 
         schema = descriptor["schema"]
         validate_inputs(schema, inputs)
@@ -95,9 +100,7 @@ async def run_catalog_execution_job(
         if asyncio.iscoroutine(result):
             result = await result
 
-        await set_status(
-            redis_client,
-            job_id,
+        await progress_writer.update(
             "SUCCEEDED",
             {
                 "result": result,
@@ -114,14 +117,14 @@ async def run_catalog_execution_job(
         }
         if exc.path:
             error_payload["error_path"] = list(exc.path)
-        await set_status(redis_client, job_id, "FAILED", {"error": error_payload})
+        await progress_writer.update("FAILED", {"error": error_payload})
         raise
     except Exception as exc:
         error_payload = {
             "error_type": type(exc).__name__,
             "error_message": str(exc),
         }
-        await set_status(redis_client, job_id, "FAILED", {"error": error_payload})
+        await progress_writer.update("FAILED", {"error": error_payload})
         raise
 
 
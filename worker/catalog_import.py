@@ -10,6 +10,7 @@ from typing import Any, Callable, Dict
 import yaml
 
 from api.catalog.bundles import pack_dir, write_blob
+from api.catalog.events import publish_version_available
 from api.catalog.registry import upsert_version
 from api.catalog.validate import validate_manifest, validate_schema
 from worker.job_status import touch_job
@@ -122,6 +123,7 @@ async def run_import_catalog_item_job(
             "local_path": item_local_dir,
         }
         upsert_version(item_id, version, manifest, schema, ui_schema, storage_uri, metadata)
+        await publish_version_available(redis_client, item_id, version, storage_uri=storage_uri, source=source)
 
         result = {
             "message": "Catalog item imported successfully",
@@ -0,0 +1,92 @@
+"""Shared helpers for catalog storage garbage collection jobs."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from api.catalog.storage_gc import collect_garbage
+from worker.job_status import touch_job
+
+
+async def run_catalog_storage_gc_job(
+    redis_client,
+    job_id: str,
+    payload: Dict[str, Any] | None = None,
+    *,
+    now: Callable[[], datetime] | None = None,
+    gc_func: Callable[..., Dict[str, Any]] | None = None,
+) -> Dict[str, Any]:
+    """Shared async implementation for reclaiming unreferenced blobs and cold extracted trees."""
+
+    now = now or datetime.utcnow
+    gc_func = gc_func or collect_garbage
+    payload = payload or {}
+
+    def timestamp() -> str:
+        return now().isoformat()
+
+    job_meta: Dict[str, Any] = {
+        "id": job_id,
+        "type": "catalog_storage_gc",
+        "state": "QUEUED",
+        "progress": 0,
+        "created_at": timestamp(),
+        "updated_at": timestamp(),
+        "started_at": None,
+        "finished_at": None,
+        "params": payload,
+        "result": None,
+        "error": None,
+        "current_step": "Queued",
+    }
+    await touch_job(redis_client, job_meta)
+
+    async def update_job(**updates: Any) -> None:
+        job_meta.update(updates)
+        job_meta["updated_at"] = timestamp()
+        await touch_job(redis_client, job_meta)
+
+    try:
+        await update_job(
+            state="RUNNING",
+            started_at=timestamp(),
+            progress=10,
+            current_step="Reconciling storage with registry",
+        )
+
+        report = await asyncio.to_thread(gc_func, dry_run=bool(payload.get("dry_run")))
+
+        result = {
+            "message": "Storage GC completed",
+            "reclaimed_bytes": report["reclaimed_bytes"],
+            "gc_report": report,
+            "completed_at": timestamp(),
+        }
+
+        await update_job(
+            state="SUCCEEDED",
+            progress=100,
+            current_step="Completed",
+            finished_at=timestamp(),
+            result=result,
+        )
+        return result
+
+    except Exception as exc:
+        error_info = {
+            "error_type": type(exc).__name__,
+            "error_message": str(exc),
+            "timestamp": timestamp(),
+        }
+        await update_job(
+            state="FAILED",
+            current_step="Failed",
+            finished_at=timestamp(),
+            error=error_info,
+        )
+        raise
+
+
+__all__ = ["run_catalog_storage_gc_job"]
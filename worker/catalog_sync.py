@@ -5,6 +5,7 @@ from typing import Tuple
 from api.catalog.bundles import pack_dir, load_descriptor_from_dir, write_blob
 from api.catalog.validate import validate_manifest, validate_schema
 from api.catalog.registry import upsert_version
+from api.catalog.events import publish_version_available
 
 def parse_tag(tag: str) -> Tuple[str, str]:
     if "@" not in tag:
@@ -38,4 +39,4 @@ async def sync_catalog_item(ctx, repo_url: str, ref: str, subdir: str = "items")
             storage_uri=storage_uri,
             source={"repo": repo_url, "ref": ref, "path": f"{subdir}/{item_id}"}
         )
-        # optional: publish a registry event via Redis pub/sub if you want UI auto-refresh
+        await publish_version_available(ctx["redis"], item_id, version, storage_uri=storage_uri, source="git-sync")
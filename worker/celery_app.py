@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from celery import Celery
 
+from api.catalog.settings import catalog_settings
 from api.settings import settings
 
 
@@ -28,12 +29,25 @@ def create_celery_app() -> Celery:
         accept_content=["json"],
     )
 
+    beat_schedule = {}
+    if catalog_settings.CATALOG_GC_INTERVAL_SECONDS > 0:
+        beat_schedule["catalog-storage-gc"] = {
+            "task": "catalog_storage_gc_task",
+            "schedule": float(catalog_settings.CATALOG_GC_INTERVAL_SECONDS),
+        }
+    if settings.JOB_INDEX_REAP_INTERVAL_SECONDS > 0:
+        beat_schedule["reap-job-indexes"] = {
+            "task": "reap_job_indexes_task",
+            "schedule": float(settings.JOB_INDEX_REAP_INTERVAL_SECONDS),
+        }
+    app.conf.beat_schedule = beat_schedule
+
     return app
 
 
 celery_app = create_celery_app()
 
-# Import task modules so Celery registers them on import.
-from . import celery_tasks  # noqa: E402,F401
+# Import task modules so Celery registers them on import (and signal handlers connect).
+from . import celery_tasks, prewarm  # noqa: E402,F401
 
 __all__ = ["celery_app", "create_celery_app"]
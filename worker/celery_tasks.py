@@ -3,16 +3,20 @@
 from __future__ import annotations
 
 import asyncio
+import uuid
 from typing import Any, Awaitable, Callable, Dict
 
 import redis.asyncio as redis
 
 from api.settings import settings
 from .celery_app import celery_app
+from .catalog_bundle_sync import run_sync_catalog_bundles_job
 from .catalog_execute import run_catalog_execution_job
 from .catalog_import import run_import_catalog_item_job
 from .catalog_registry import run_sync_catalog_registry_job
+from .catalog_storage_gc import run_catalog_storage_gc_job
 from .example_long import run_example_long_task
+from .job_status import reap_job_indexes
 from .provision_server import run_provision_server_task
 from .sync_catalog_item import run_sync_catalog_item_from_git
 
@@ -111,6 +115,45 @@ def sync_catalog_registry_task(job_id: str, payload: Dict[str, Any]) -> None:
     asyncio.run(_run_registry_sync(job_id, payload))
 
 
+async def _run_bundle_sync(job_id: str, payload: Dict[str, Any]) -> None:
+    await _run_with_redis(run_sync_catalog_bundles_job, job_id, payload)
+
+
+@celery_app.task(name="sync_catalog_bundles_task")
+def sync_catalog_bundles_task(job_id: str, payload: Dict[str, Any]) -> None:
+    """Celery wrapper around bundle directory synchronization job."""
+
+    asyncio.run(_run_bundle_sync(job_id, payload))
+
+
+async def _run_storage_gc(job_id: str, payload: Dict[str, Any]) -> None:
+    await _run_with_redis(run_catalog_storage_gc_job, job_id, payload)
+
+
+@celery_app.task(name="catalog_storage_gc_task")
+def catalog_storage_gc_task(job_id: str | None = None, payload: Dict[str, Any] | None = None) -> None:
+    """Celery wrapper around storage GC; beat runs it without a job id."""
+
+    job_id = job_id or f"storage-gc-{uuid.uuid4()}"
+    asyncio.run(_run_storage_gc(job_id, payload or {"trigger": "schedule"}))
+
+
+async def _reap_job_indexes() -> Dict[str, Any]:
+    redis_client = redis.from_url(settings.REDIS_URL)
+    try:
+        return await reap_job_indexes(redis_client)
+    finally:
+        await redis_client.aclose()
+
+
+@celery_app.task(name="reap_job_indexes_task")
+def reap_job_indexes_task() -> Dict[str, Any]:
+    """Beat task trimming expired job ids from the jobs:index sorted sets."""
+    report = asyncio.run(_reap_job_indexes())
+    print(f"🧹 Job index reaper trimmed {report['total_trimmed']} expired ids")
+    return report
+
+
 async def _run_sync_catalog_job(job_id: str, payload: Dict[str, Any]) -> None:
     await _run_with_redis(run_sync_catalog_item_from_git, job_id, payload)
 
@@ -134,6 +177,9 @@ __all__ = [
     "run_catalog_item",
     "import_catalog_item_task",
     "sync_catalog_registry_task",
+    "sync_catalog_bundles_task",
+    "catalog_storage_gc_task",
+    "reap_job_indexes_task",
     "sync_catalog_item",
     "sync_catalog_item_from_git",
 ]
@@ -6,7 +6,7 @@ import asyncio
 from datetime import datetime
 from typing import Any, Dict
 
-from .job_status import touch_job
+from .job_status import ProgressWriter, touch_job
 
 
 async def run_example_long_task(redis_client, job_id: str, payload: Dict[str, Any], sleep_func=asyncio.sleep) -> None:
@@ -26,22 +26,14 @@ async def run_example_long_task(redis_client, job_id: str, payload: Dict[str, An
     }
     await touch_job(redis_client, job_meta)
 
+    progress_writer = ProgressWriter(redis_client, job_id)
+
     try:
-        job_meta.update({
-            "state": "RUNNING",
-            "started_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        })
-        await touch_job(redis_client, job_meta)
+        await progress_writer.update("RUNNING")
 
         for i in range(1, 6):
             await sleep_func(1)
-            progress = (i / 5) * 100
-            job_meta.update({
-                "progress": progress,
-                "updated_at": datetime.utcnow().isoformat(),
-            })
-            await touch_job(redis_client, job_meta)
+            await progress_writer.update("RUNNING", {"progress": (i / 5) * 100})
 
         result = {
             "message": "Task completed successfully",
@@ -49,15 +41,7 @@ async def run_example_long_task(redis_client, job_id: str, payload: Dict[str, An
             "report_type": payload.get("report_type", "default"),
             "completion_time": datetime.utcnow().isoformat(),
         }
-
-        job_meta.update({
-            "state": "SUCCEEDED",
-            "progress": 100,
-            "finished_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "result": result,
-        })
-        await touch_job(redis_client, job_meta)
+        await progress_writer.update("SUCCEEDED", {"progress": 100, "result": result})
 
     except Exception as exc:
         error_info = {
@@ -65,13 +49,7 @@ async def run_example_long_task(redis_client, job_id: str, payload: Dict[str, An
             "error_message": str(exc),
             "timestamp": datetime.utcnow().isoformat(),
         }
-        job_meta.update({
-            "state": "FAILED",
-            "finished_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "error": error_info,
-        })
-        await touch_job(redis_client, job_meta)
+        await progress_writer.update("FAILED", {"error": error_info})
         raise
 
 
@@ -2,20 +2,41 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
 import json
 import time
 from datetime import datetime
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
 try:
-    from redis.exceptions import ResponseError
+    from redis.exceptions import NoScriptError, ResponseError
 except ImportError:  # pragma: no cover - redis not installed in some environments
-    ResponseError = Exception
+    NoScriptError = ResponseError = Exception
 
 from api.settings import settings
 
 _JSON_FIELDS = {"params", "result", "error"}
 _STATE_INDEXES = ["QUEUED", "RUNNING", "SUCCEEDED", "FAILED", "CANCELLED"]
+_TERMINAL_STATES = {"SUCCEEDED", "FAILED", "CANCELLED"}
+# Fields needed to render a job listing row; heavy fields (params/result/error) are left out
+# Facet indexes (jobs:index:type:<type>, :user:<id>, :item:<id>) are scored by creation time and
+# listed in JOB_FACET_REGISTRY; filtered listings intersect them with jobs:index or a state index
+JOB_FACET_PREFIX = "jobs:index:"
+# jobs:index and jobs:index:state:* are ordered by creation; this one by most recent write
+JOB_UPDATED_INDEX = "jobs:index:updated"
+JOB_FACET_REGISTRY = "jobs:index:facets"
+JOB_QUERY_PREFIX = "jobs:query:"
+# Incrementally maintained by the job scripts on state transitions, read by job_stats()
+JOB_STATS_KEY = "jobs:stats"
+JOB_DURATIONS_KEY = "jobs:stats:durations"
+# Upper bounds (seconds) of the run time histogram buckets; a final bucket catches the rest
+JOB_DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 4 * 3600)
+JOB_SUMMARY_FIELDS = ("id", "type", "state", "progress", "seq", "created_at", "updated_at", "started_at", "finished_at")
+# Every published job event is also appended here, capped at JOB_EVENT_STREAM_MAXLEN entries, so
+# clients can resume from the last event_id they saw
+JOB_EVENT_STREAM = "jobs:stream"
 
 
 def _clean_for_json(obj: Any) -> Any:
@@ -46,6 +67,11 @@ def _decode_job_hash(raw: Dict[Any, Any]) -> Dict[str, Any]:
                 decoded[key_str] = float(value_obj)
             except (TypeError, ValueError):
                 decoded[key_str] = 0.0
+        elif key_str == "seq":
+            try:
+                decoded[key_str] = int(value_obj)
+            except (TypeError, ValueError):
+                decoded[key_str] = 0
         else:
             decoded[key_str] = value_obj
     return decoded
@@ -80,75 +106,896 @@ async def fetch_job_metadata(redis_client, job_id: str) -> Tuple[Dict[str, Any],
     return {}, "none"
 
 
+async def fetch_job_summaries(redis_client, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return the listing fields of many jobs, keyed by id, in one pipelined round trip.
+
+    Legacy string records are picked up with a second round trip only when present; ids whose
+    records have expired are omitted.
+    """
+    if not job_ids:
+        return {}
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hmget(f"{settings.JOB_STATUS_PREFIX}{job_id}", *JOB_SUMMARY_FIELDS)
+        rows = await pipe.execute(raise_on_error=False)
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    legacy_ids = []
+    for job_id, row in zip(job_ids, rows):
+        if isinstance(row, ResponseError):
+            legacy_ids.append(job_id)
+        elif any(value is not None for value in row):
+            summaries[job_id] = _decode_job_hash({
+                field: value for field, value in zip(JOB_SUMMARY_FIELDS, row) if value is not None
+            })
+
+    if legacy_ids:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for job_id in legacy_ids:
+                pipe.get(f"{settings.JOB_STATUS_PREFIX}{job_id}")
+            raws = await pipe.execute(raise_on_error=False)
+        for job_id, raw in zip(legacy_ids, raws):
+            decoded = _decode_job_string(raw) if raw and not isinstance(raw, ResponseError) else {}
+            if decoded:
+                summaries[job_id] = {field: decoded[field] for field in JOB_SUMMARY_FIELDS if field in decoded}
+
+    return {job_id: summaries[job_id] for job_id in job_ids if job_id in summaries}
+
+
+def _glob_escape(text: str) -> str:
+    return "".join(f"\\{ch}" if ch in "*?[]\\" else ch for ch in text)
+
+
+async def _search_index_key(redis_client, base_key: str, q: str) -> str:
+    """Cached zset of jobs in ``base_key`` whose id or type contains ``q`` (case-insensitive)."""
+    needle = q.lower()
+    key = f"{JOB_QUERY_PREFIX}q:{hashlib.sha1(f'{base_key}|{needle}'.encode()).hexdigest()}"
+    if await redis_client.exists(key):
+        return key
+
+    matching_ids = {}
+    async for member, _score in redis_client.zscan_iter(base_key, match=f"*{_glob_escape(needle)}*", count=1000):
+        matching_ids[member] = 0
+    type_prefix = f"{JOB_FACET_PREFIX}type:"
+    type_keys = []
+    for raw in await redis_client.smembers(JOB_FACET_REGISTRY):
+        facet_key = raw.decode() if isinstance(raw, bytes) else raw
+        if facet_key.startswith(type_prefix) and needle in facet_key[len(type_prefix):].lower():
+            type_keys.append(facet_key)
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        if matching_ids:
+            pipe.zadd(key, matching_ids)
+        if type_keys:
+            pipe.zunionstore(key, [key, *type_keys])
+        pipe.expire(key, max(settings.JOB_QUERY_CACHE_SECONDS, 1))
+        await pipe.execute()
+    return key
+
+
+def encode_job_cursor(score: float, job_id: str) -> str:
+    """Opaque keyset cursor pointing just past ``job_id`` in a listing ordered by (score, id) desc."""
+    raw = json.dumps([score, job_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_job_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of :func:`encode_job_cursor`; raises ``ValueError`` for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, job_id = json.loads(raw)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(score, (int, float)) or isinstance(score, bool) or not isinstance(job_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return float(score), job_id
+
+
+def _member(raw: Any) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
+
+
+async def _page_after(redis_client, key: str, cursor: str, limit: int) -> Tuple[List[Tuple[str, float]], int]:
+    score, last_id = decode_job_cursor(cursor)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zcard(key)
+        # Members sharing the cursor's score sort by id (descending); anything scored lower follows
+        pipe.zrevrangebyscore(key, repr(score), repr(score))
+        pipe.zrevrangebyscore(key, f"({score!r}", "-inf", start=0, num=limit + 1, withscores=True)
+        total, same_score, lower = await pipe.execute()
+    entries = [(member, score) for member in map(_member, same_score) if member < last_id]
+    entries.extend((_member(member), member_score) for member, member_score in lower)
+    return entries[:limit + 1], total
+
+
+async def query_job_ids(
+    redis_client,
+    *,
+    state: str | None = None,
+    job_type: str | None = None,
+    user_id: str | None = None,
+    item_id: str | None = None,
+    q: str | None = None,
+    start: int = 0,
+    stop: int = -1,
+    cursor: str | None = None,
+    order: str = "created",
+) -> Tuple[List[str], int, str | None]:
+    """Return one page of job ids matching the filters, the total, and a cursor for the page after
+    it (``None`` on the last page). ``order`` is ``"created"`` (newest first, stable while jobs
+    run) or ``"updated"`` (most recently written first, the "active now" view).
+
+    Pages are selected by offset (``start``/``stop``) or, when ``cursor`` is given, by keyset:
+    the ``stop - start + 1`` jobs ordered after the cursor's (score, id), which stays stable
+    while new jobs arrive. Filters are resolved in Redis: the state (or global) index is
+    intersected with the facet indexes, and the result is cached for ``JOB_QUERY_CACHE_SECONDS``
+    so consecutive pages see a consistent snapshot.
+    """
+    if order not in ("created", "updated"):
+        raise ValueError(f"Unknown order: {order!r}")
+    state_key = f"jobs:index:state:{state}" if state else None
+    filter_keys = [
+        f"{JOB_FACET_PREFIX}{facet}:{value}"
+        for facet, value in (("type", job_type), ("user", user_id), ("item", item_id)) if value
+    ]
+    if order == "updated":
+        base_key = JOB_UPDATED_INDEX
+        if state_key:
+            filter_keys.insert(0, state_key)
+    else:
+        base_key = state_key or "jobs:index"
+    if q:
+        filter_keys.append(await _search_index_key(redis_client, base_key, q))
+
+    key = base_key
+    if filter_keys:
+        key = f"{JOB_QUERY_PREFIX}{hashlib.sha1('|'.join([base_key, *filter_keys]).encode()).hexdigest()}"
+        if not await redis_client.exists(key):
+            # Filters weigh 0 so the result keeps the base index's scores, and therefore its order
+            weights = {base_key: 1, **{filter_key: 0 for filter_key in filter_keys}}
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.zinterstore(key, weights)
+                pipe.expire(key, max(settings.JOB_QUERY_CACHE_SECONDS, 1))
+                await pipe.execute()
+
+    if cursor is not None:
+        limit = stop - start + 1
+        entries, total = await _page_after(redis_client, key, cursor, limit)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+    else:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zcard(key)
+            pipe.zrevrange(key, start, stop, withscores=True)
+            total, raw_entries = await pipe.execute()
+        entries = [(_member(member), score) for member, score in raw_entries]
+        has_more = stop >= 0 and start + len(entries) < total
+
+    next_cursor = encode_job_cursor(entries[-1][1], entries[-1][0]) if has_more and entries else None
+    return [job_id for job_id, _score in entries], total, next_cursor
+
+
+def _index_keys(facet_keys: List[str]) -> List[str]:
+    return ["jobs:index", JOB_UPDATED_INDEX, *(f"jobs:index:state:{state}" for state in _STATE_INDEXES), *facet_keys]
+
+
+async def _facet_keys(redis_client) -> List[str]:
+    return sorted(_member(raw) for raw in await redis_client.smembers(JOB_FACET_REGISTRY))
+
+
+async def _drop_jobs(redis_client, job_ids: List[str], index_keys: List[str], *, floor: float = 0.0) -> List[int]:
+    """Run _DROP_JOBS over ``job_ids``; returns how many ids left each of ``index_keys``."""
+    return await _DROP_JOBS(
+        redis_client,
+        [JOB_STATS_KEY, *index_keys],
+        [settings.JOB_STATUS_PREFIX, time.time(), settings.JOB_TTL, floor, *job_ids],
+    )
+
+
+async def forget_jobs(redis_client, job_ids: List[str]) -> None:
+    """Drop ids whose job records have expired from every index, releasing their state counts."""
+    if not job_ids:
+        return
+    await _drop_jobs(redis_client, job_ids, _index_keys(await _facet_keys(redis_client)))
+
+
+async def _backfill_updated_index(redis_client, batch_size: int) -> int:
+    """Score ids missing from jobs:index:updated at their creation time; returns how many."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zcard("jobs:index")
+        pipe.zcard(JOB_UPDATED_INDEX)
+        indexed, updated = await pipe.execute()
+    if indexed <= updated:
+        return 0
+
+    backfilled = 0
+    for start in range(0, indexed, batch_size):
+        entries = await redis_client.zrange("jobs:index", start, start + batch_size - 1, withscores=True)
+        if not entries:
+            break
+        scores = await redis_client.zmscore(JOB_UPDATED_INDEX, [member for member, _score in entries])
+        missing = {member: score for (member, score), updated_score in zip(entries, scores) if updated_score is None}
+        if missing:
+            backfilled += await redis_client.zadd(JOB_UPDATED_INDEX, missing, nx=True)
+    return backfilled
+
+
+async def reap_job_indexes(
+    redis_client,
+    *,
+    now: float | None = None,
+    ttl: int | None = None,
+    batch_size: int = 1000,
+) -> Dict[str, Any]:
+    """Remove jobs whose records have expired from every index.
+
+    Every write refreshes the record's TTL and re-scores it in jobs:index:updated, so members
+    scored there before ``now - ttl`` should be gone; those whose records are indeed gone are
+    dropped from the creation-ordered, state and facet indexes in batches, and the state counts
+    they held in jobs:stats are released. Facet indexes emptied on the way leave the registry.
+    Ids in jobs:index that were never scored in jobs:index:updated (indexed before it existed)
+    are first added to it at their creation score, so they are checked too.
+    """
+    now = time.time() if now is None else now
+    cutoff = now - (settings.JOB_TTL if ttl is None else ttl)
+    backfilled = await _backfill_updated_index(redis_client, batch_size)
+    facet_keys = await _facet_keys(redis_client)
+    index_keys = _index_keys(facet_keys)
+    trimmed = dict.fromkeys(index_keys, 0)
+
+    while True:
+        expired = await redis_client.zrangebyscore(JOB_UPDATED_INDEX, "-inf", f"({cutoff}", start=0, num=batch_size)
+        if not expired:
+            break
+        # Live records among them are re-scored at or after the cutoff, so every batch makes progress
+        removed = await _drop_jobs(redis_client, [_member(job_id) for job_id in expired], index_keys, floor=cutoff)
+        for key, count in zip(index_keys, removed):
+            trimmed[key] += count
+
+    empty_facets = []
+    if facet_keys:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in facet_keys:
+                pipe.exists(key)
+            empty_facets = [key for key, exists in zip(facet_keys, await pipe.execute()) if not exists]
+    if empty_facets:
+        await redis_client.srem(JOB_FACET_REGISTRY, *empty_facets)
+
+    return {
+        "reaped_at": datetime.utcfromtimestamp(now).isoformat(),
+        "cutoff": cutoff,
+        "trimmed": {key: count for key, count in trimmed.items() if count},
+        "total_trimmed": sum(trimmed.values()),
+        "facets_dropped": len(empty_facets),
+        "backfilled": backfilled,
+    }
+
+
+def _histogram_percentile(buckets: Dict[int, int], count: int, quantile: float) -> float | None:
+    """Upper bound of the bucket holding the quantile (the largest bound for the overflow bucket)."""
+    if count <= 0:
+        return None
+    rank = quantile * count
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen >= rank:
+            return float(JOB_DURATION_BUCKETS[min(index, len(JOB_DURATION_BUCKETS) - 1)])
+    return float(JOB_DURATION_BUCKETS[-1])
+
+
+async def job_stats(redis_client) -> Dict[str, Any]:
+    """Aggregate job statistics from the counters kept by the job scripts, without reading any job.
+
+    State and type/state counts cover jobs still retained (the reaper releases expired ones);
+    catalog outcomes, run time histograms and ProgressWriter write counts are all-time totals.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(JOB_STATS_KEY)
+        pipe.hgetall(JOB_DURATIONS_KEY)
+        raw_stats, raw_durations = await pipe.execute()
+
+    states: Dict[str, int] = {state: 0 for state in _STATE_INDEXES}
+    types: Dict[str, Dict[str, int]] = {}
+    items: Dict[str, Dict[str, Any]] = {}
+    progress_writes = {"written": 0, "suppressed": 0}
+    for raw_field, raw_value in raw_stats.items():
+        field, value = _member(raw_field), int(raw_value)
+        kind, _, rest = field.partition(":")
+        if kind == "state":
+            states[rest] = value
+        elif kind == "type":
+            job_type, _, state = rest.rpartition(":")
+            types.setdefault(job_type, {})[state] = value
+        elif kind == "item":
+            ref, _, state = rest.rpartition(":")
+            items.setdefault(ref, {"succeeded": 0, "failed": 0})[state.lower()] = value
+        elif kind == "progress":
+            progress_writes[rest] = value
+    for outcome in items.values():
+        finished = outcome["succeeded"] + outcome["failed"]
+        outcome["success_rate"] = outcome["succeeded"] / finished if finished else None
+
+    histograms: Dict[str, Dict[str, Any]] = {}
+    for raw_field, raw_value in raw_durations.items():
+        scope, _, slot = _member(raw_field).rpartition(":")
+        entry = histograms.setdefault(scope, {"buckets": {}, "count": 0, "sum": 0.0})
+        if slot == "count":
+            entry["count"] = int(raw_value)
+        elif slot == "sum":
+            entry["sum"] = float(raw_value)
+        else:
+            entry["buckets"][int(slot)] = int(raw_value)
+    durations = {
+        "all" if scope == "*" else scope: {
+            "count": entry["count"],
+            "mean_seconds": entry["sum"] / entry["count"] if entry["count"] else None,
+            "p50_seconds": _histogram_percentile(entry["buckets"], entry["count"], 0.50),
+            "p95_seconds": _histogram_percentile(entry["buckets"], entry["count"], 0.95),
+        }
+        for scope, entry in histograms.items()
+    }
+
+    return {
+        "states": states,
+        "types": types,
+        "catalog_items": items,
+        "durations": durations,
+        "progress_writes": progress_writes,
+    }
+
+
+def parse_event_id(event_id: str) -> Tuple[int, int]:
+    """Split a stream id (``<ms>-<seq>``, or just ``<ms>``) for ordering; raises ValueError."""
+    ms, _, seq = str(event_id).partition("-")
+    try:
+        parsed = (int(ms), int(seq or 0))
+    except ValueError:
+        raise ValueError(f"invalid event id {event_id!r}") from None
+    if parsed[0] < 0 or parsed[1] < 0:
+        raise ValueError(f"invalid event id {event_id!r}")
+    return parsed
+
+
+def with_event_id(event_id: str, message: str) -> str:
+    """Splice ``event_id`` into a JSON event object, as the job scripts do when publishing."""
+    return '{"event_id":"' + event_id + '",' + message[1:]
+
+
+async def read_job_events(redis_client, after: str, *, count: int = 500) -> Tuple[List[Tuple[str, str]], bool]:
+    """Events appended to the job event stream after ``after``, oldest first.
+
+    Returns ``(events, truncated)`` where each event is ``(event_id, message)`` with the id
+    spliced into the message, and ``truncated`` is True when entries following ``after`` may
+    already have been trimmed away (the caller should re-sync from the REST API instead).
+    """
+    after_id = parse_event_id(after)
+    events: List[Tuple[str, str]] = []
+    cursor = "{}-{}".format(*after_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.xrange(JOB_EVENT_STREAM, "-", "+", count=1)
+        pipe.xrange(JOB_EVENT_STREAM, f"({cursor}", "+", count=count)
+        oldest, batch = await pipe.execute()
+    truncated = bool(oldest) and parse_event_id(_member(oldest[0][0])) > after_id
+    while batch:
+        for raw_id, fields in batch:
+            event_id = _member(raw_id)
+            message = _member(fields.get(b"event") or fields.get("event") or b"{}")
+            events.append((event_id, with_event_id(event_id, message)))
+        if len(batch) < count:
+            break
+        batch = await redis_client.xrange(JOB_EVENT_STREAM, f"({events[-1][0]}", "+", count=count)
+    return events, truncated
+
+
 async def publish_job_update(redis_client, job_meta: Dict[str, Any]) -> None:
+    """Broadcast a full snapshot of ``job_meta``; regular writes publish deltas via touch_job/set_status."""
     payload = {"type": "upsert", "job": _clean_for_json(job_meta)}
     await redis_client.publish("channel:jobs", json.dumps(payload))
 
 
-async def touch_job(redis_client, job_meta: Dict[str, Any]) -> None:
-    job_id = job_meta["id"]
-    job_key = f"{settings.JOB_STATUS_PREFIX}{job_id}"
-
-    hash_data = {}
-    for key, value in job_meta.items():
+class _LuaScript:
+    """Server-side script run with EVALSHA, falling back to EVAL (which caches it) on a cold server."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    async def __call__(self, redis_client, keys: List[str], args: List[Any]) -> Any:
+        try:
+            return await redis_client.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return await redis_client.eval(self.source, len(keys), *keys, *args)
+
+    async def call_many(self, redis_client, calls: List[Tuple[List[str], List[Any]]]) -> List[Any]:
+        """Run the script once per ``(keys, args)`` pair, in order, in one pipelined round trip."""
+        if not calls:
+            return []
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for keys, args in calls:
+                pipe.evalsha(self.sha, len(keys), *keys, *args)
+            results = await pipe.execute(raise_on_error=False)
+        if any(isinstance(result, NoScriptError) for result in results):
+            # Cold server: every call missed, so send the source with each (EVAL caches it)
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for keys, args in calls:
+                    pipe.eval(self.source, len(keys), *keys, *args)
+                results = await pipe.execute(raise_on_error=False)
+        for result in results:
+            if isinstance(result, ResponseError):
+                raise result
+        return results
+
+
+# Shared prelude for the job scripts. Fields are written only when their value changes, and each
+# write bumps the job's ``seq`` and publishes on ARGV[4]: a full snapshot ("upsert") when the job
+# is created or reaches a terminal state, otherwise a "delta" carrying just the changed fields.
+# JSON fields are spliced into messages verbatim rather than re-encoded. Events are also appended
+# to the capped job event stream (unless ARGV[7] is 0) and published with their stream id.
+_JOB_EVENTS_LUA = """
+local JOB, STATS, DURATIONS, STREAM, CREATED_INDEX, UPDATED_INDEX, STATE_INDEX = 1, 2, 3, 4, 5, 6, 7
+local json_fields = {params = true, result = true, error = true}
+local numeric_fields = {progress = true, seq = true}
+local internal_fields = {started_ts = true}
+local terminal_states = {SUCCEEDED = true, FAILED = true, CANCELLED = true}
+local duration_buckets = __DURATION_BUCKETS__
+
+local function encode_object(flat)
+  local parts = {}
+  for i = 1, #flat, 2 do
+    local field, value = flat[i], flat[i + 1]
+    if not internal_fields[field] then
+      local encoded
+      local number = numeric_fields[field] and tonumber(value)
+      if json_fields[field] and pcall(cjson.decode, value) then
+        encoded = value
+      elseif number and number == number and number ~= math.huge and number ~= -math.huge then
+        encoded = cjson.encode(number)
+      else
+        encoded = cjson.encode(value)
+      end
+      parts[#parts + 1] = cjson.encode(field) .. ':' .. encoded
+    end
+  end
+  return '{' .. table.concat(parts, ',') .. '}'
+end
+
+local function write_changes(key, flat, changed)
+  if #flat == 0 then
+    return changed
+  end
+  local names = {}
+  for i = 1, #flat, 2 do
+    names[#names + 1] = flat[i]
+  end
+  local current = redis.call('HMGET', key, unpack(names))
+  local updates = {}
+  for i = 1, #flat, 2 do
+    if current[(i + 1) / 2] ~= flat[i + 1] then
+      updates[#updates + 1] = flat[i]
+      updates[#updates + 1] = flat[i + 1]
+      changed[#changed + 1] = flat[i]
+      changed[#changed + 1] = flat[i + 1]
+    end
+  end
+  if #updates > 0 then
+    redis.call('HSET', key, unpack(updates))
+  end
+  return changed
+end
+
+-- A write that changed nothing is not an event: no seq bump, nothing published.
+local function publish_update(key, job_id, channel, state, created, changed, stream_maxlen)
+  if not created and #changed == 0 then
+    return
+  end
+  local seq = redis.call('HINCRBY', key, 'seq', 1)
+  local message
+  if created or terminal_states[state] then
+    message = '{"type":"upsert","seq":' .. seq .. ',"job":' .. encode_object(redis.call('HGETALL', key)) .. '}'
+  else
+    message = '{"type":"delta","id":' .. cjson.encode(job_id) .. ',"seq":' .. seq
+      .. ',"changes":' .. encode_object(changed) .. '}'
+  end
+  if tonumber(stream_maxlen) > 0 then
+    local event_id = redis.call('XADD', KEYS[STREAM], 'MAXLEN', '~', stream_maxlen, '*', 'event', message)
+    message = '{"event_id":"' .. event_id .. '",' .. string.sub(message, 2)
+  end
+  redis.call('PUBLISH', channel, message)
+end
+
+-- jobs:index and the state indexes are scored by creation time, written once per job (and per
+-- state change); only jobs:index:updated is re-scored on every write.
+local function move_indexes(job_id, score, last_state_key)
+  redis.call('ZADD', KEYS[CREATED_INDEX], 'NX', score, job_id)
+  redis.call('ZADD', KEYS[UPDATED_INDEX], score, job_id)
+  local created_score = redis.call('ZSCORE', KEYS[CREATED_INDEX], job_id)
+  if redis.call('ZADD', KEYS[STATE_INDEX], 'NX', created_score, job_id) == 1 then
+    for i = STATE_INDEX + 1, last_state_key do
+      redis.call('ZREM', KEYS[i], job_id)
+    end
+  end
+  return created_score
+end
+
+local function decrement_stat(field)
+  if redis.call('HINCRBY', KEYS[STATS], field, -1) < 0 then
+    redis.call('HSET', KEYS[STATS], field, 0)
+  end
+end
+
+-- Keep jobs:stats (jobs per state and per type/state, catalog outcomes per item@version) and the
+-- run time histograms in jobs:stats:durations current on every state transition. The job was
+-- counted under previous_type (read before this write), which a write may change.
+local function record_transition(previous_state, previous_type, state, now)
+  local job_type = redis.call('HGET', KEYS[JOB], 'type') or 'unknown'
+  previous_type = previous_type or 'unknown'
+  if previous_state ~= state then
+    if previous_state then
+      decrement_stat('state:' .. previous_state)
+    end
+    redis.call('HINCRBY', KEYS[STATS], 'state:' .. state, 1)
+  end
+  if previous_state ~= state or previous_type ~= job_type then
+    if previous_state then
+      decrement_stat('type:' .. previous_type .. ':' .. previous_state)
+    end
+    redis.call('HINCRBY', KEYS[STATS], 'type:' .. job_type .. ':' .. state, 1)
+  end
+  if previous_state == state then
+    return
+  end
+
+  if state == 'RUNNING' then
+    redis.call('HSETNX', KEYS[JOB], 'started_ts', now)
+  elseif terminal_states[state] then
+    local started = tonumber(redis.call('HGET', KEYS[JOB], 'started_ts'))
+    if started then
+      local elapsed = tonumber(now) - started
+      local bucket = #duration_buckets
+      for i, bound in ipairs(duration_buckets) do
+        if elapsed <= bound then
+          bucket = i - 1
+          break
+        end
+      end
+      for _, scope in ipairs({'*', job_type}) do
+        redis.call('HINCRBY', KEYS[DURATIONS], scope .. ':' .. bucket, 1)
+        redis.call('HINCRBY', KEYS[DURATIONS], scope .. ':count', 1)
+        redis.call('HINCRBYFLOAT', KEYS[DURATIONS], scope .. ':sum', elapsed)
+      end
+    end
+    local ok, params = pcall(cjson.decode, redis.call('HGET', KEYS[JOB], 'params') or 'null')
+    if ok and type(params) == 'table' and type(params.item_id) == 'string' and state ~= 'CANCELLED' then
+      local version = type(params.version) == 'string' and params.version or ''
+      redis.call('HINCRBY', KEYS[STATS], 'item:' .. params.item_id .. '@' .. version .. ':' .. state, 1)
+    end
+  end
+end
+"""
+
+
+_JOB_EVENTS_LUA = _JOB_EVENTS_LUA.replace(
+    "__DURATION_BUCKETS__", "{" + ", ".join(repr(float(bound)) for bound in JOB_DURATION_BUCKETS) + "}"
+)
+
+
+# KEYS: job hash, jobs:stats, jobs:stats:durations, jobs:stream, jobs:index, jobs:index:updated,
+#       index of the job's state, every other state index, the facet registry, then the job's
+#       facet indexes (type/user/item)
+# ARGV: job id, score, ttl, channel, state, number of facet indexes, stream max length, then hash
+#       field/value pairs
+_TOUCH_JOB = _LuaScript(_JOB_EVENTS_LUA + """
+local facet_count = tonumber(ARGV[6])
+local registry = #KEYS - facet_count
+local previous_state, previous_type = unpack(redis.call('HMGET', KEYS[JOB], 'state', 'type'))
+local created = redis.call('EXISTS', KEYS[JOB]) == 0
+local changed = write_changes(KEYS[JOB], {unpack(ARGV, 8)}, {})
+record_transition(previous_state, previous_type, ARGV[5], ARGV[2])
+local created_score = move_indexes(ARGV[1], ARGV[2], registry - 1)
+for i = registry + 1, #KEYS do
+  redis.call('ZADD', KEYS[i], 'NX', created_score, ARGV[1])
+  redis.call('SADD', KEYS[registry], KEYS[i])
+end
+redis.call('EXPIRE', KEYS[JOB], ARGV[3])
+publish_update(KEYS[JOB], ARGV[1], ARGV[4], ARGV[5], created, changed, ARGV[7])
+return 1
+""")
+
+
+# KEYS: jobs:stats, jobs:index, jobs:index:updated, the state indexes, then the facet indexes
+# ARGV: job status key prefix, now, job ttl, score floor, then job ids
+# Ids whose record is gone are removed from every index, and the state and type/state counts
+# they held in jobs:stats are released. Ids whose record still exists are kept and re-scored in
+# jobs:index:updated at their last write (estimated from the TTL left), no lower than the floor.
+# Returns the number of ids removed from each index, in KEYS order from jobs:index on.
+_DROP_JOBS = _LuaScript("""
+local STATS, UPDATED = 1, 3
+local state_prefix, type_prefix = 'jobs:index:state:', 'jobs:index:type:'
+
+local function decrement_stat(field)
+  if redis.call('HINCRBY', KEYS[STATS], field, -1) < 0 then
+    redis.call('HSET', KEYS[STATS], field, 0)
+  end
+end
+
+local removed = {}
+for i = 2, #KEYS do
+  removed[i - 1] = 0
+end
+for a = 5, #ARGV do
+  local job_id = ARGV[a]
+  local remaining = redis.call('TTL', ARGV[1] .. job_id)
+  if remaining == -2 then
+    local state, job_type
+    for i = 2, #KEYS do
+      if redis.call('ZREM', KEYS[i], job_id) == 1 then
+        removed[i - 1] = removed[i - 1] + 1
+        if string.sub(KEYS[i], 1, #state_prefix) == state_prefix then
+          state = string.sub(KEYS[i], #state_prefix + 1)
+        elseif string.sub(KEYS[i], 1, #type_prefix) == type_prefix then
+          job_type = string.sub(KEYS[i], #type_prefix + 1)
+        end
+      end
+    end
+    if state then
+      decrement_stat('state:' .. state)
+      decrement_stat('type:' .. (job_type or 'unknown') .. ':' .. state)
+    end
+  else
+    local last_write = tonumber(ARGV[2])
+    if remaining >= 0 then
+      last_write = last_write - (tonumber(ARGV[3]) - remaining)
+    end
+    redis.call('ZADD', KEYS[UPDATED], 'XX', math.max(last_write, tonumber(ARGV[4])), job_id)
+  end
+end
+return removed
+""")
+
+def _encode_fields(mapping: Dict[str, Any]) -> List[str]:
+    """Flatten a job mapping into HSET field/value arguments, skipping ``None`` values."""
+    fields: List[str] = []
+    for key, value in mapping.items():
         if value is None:
             continue
-        if key in _JSON_FIELDS:
-            hash_data[key] = json.dumps(value)
-        else:
-            hash_data[key] = str(value)
-
-    if hash_data:
-        await redis_client.hset(job_key, mapping=hash_data)
-
-    timestamp = time.time()
-    await redis_client.zadd("jobs:index", {job_id: timestamp})
+        fields.append(key)
+        fields.append(json.dumps(value) if key in _JSON_FIELDS else str(value))
+    return fields
+
+
+def job_facet_index_keys(job_meta: Dict[str, Any]) -> List[str]:
+    """Secondary indexes a job belongs to: its type, and the user/catalog item it was run for."""
+    params = job_meta.get("params") if isinstance(job_meta.get("params"), dict) else {}
+    facets = {
+        "type": job_meta.get("type"),
+        "user": job_meta.get("user_id") or params.get("user_id"),
+        "item": job_meta.get("item_id") or params.get("item_id"),
+    }
+    return [f"{JOB_FACET_PREFIX}{facet}:{value}" for facet, value in facets.items() if value]
 
-    state = job_meta.get("state", "UNKNOWN")
-    await redis_client.zadd(f"jobs:index:state:{state}", {job_id: timestamp})
-    for other_state in _STATE_INDEXES:
-        if other_state != state:
-            await redis_client.zrem(f"jobs:index:state:{other_state}", job_id)
 
-    await redis_client.expire(job_key, settings.JOB_TTL)
-    await publish_job_update(redis_client, job_meta)
+def _job_keys(job_key: str, state: str) -> List[str]:
+    keys = [
+        job_key, JOB_STATS_KEY, JOB_DURATIONS_KEY, JOB_EVENT_STREAM,
+        "jobs:index", JOB_UPDATED_INDEX, f"jobs:index:state:{state}",
+    ]
+    keys.extend(f"jobs:index:state:{other}" for other in _STATE_INDEXES if other != state)
+    return keys
 
 
-async def set_status(redis_client, job_id: str, state: str, additional_data: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    """Merge existing job metadata, update state, and persist to Redis."""
+def _touch_job_call(job_meta: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    job_id = job_meta["id"]
     job_key = f"{settings.JOB_STATUS_PREFIX}{job_id}"
-    existing_data, key_type = await fetch_job_metadata(redis_client, job_id)
-
-    if key_type == "string":
-        await redis_client.delete(job_key)
+    state = job_meta.get("state", "UNKNOWN")
+    facet_keys = job_facet_index_keys(job_meta)
+    return (
+        [*_job_keys(job_key, state), JOB_FACET_REGISTRY, *facet_keys],
+        [
+            job_id, time.time(), settings.JOB_TTL, "channel:jobs", state, len(facet_keys),
+            settings.JOB_EVENT_STREAM_MAXLEN, *_encode_fields(job_meta),
+        ],
+    )
 
-    job_meta: Dict[str, Any] = {
-        "id": job_id,
-        "state": state,
-        "updated_at": datetime.utcnow().isoformat(),
-    }
 
-    if existing_data:
-        for key, value in existing_data.items():
-            if key == "state":
-                continue
-            job_meta[key] = value
+async def touch_job(redis_client, job_meta: Dict[str, Any]) -> None:
+    """Write the job hash, update its indexes, refresh its TTL and publish, in one round trip."""
+    await _TOUCH_JOB(redis_client, *_touch_job_call(job_meta))
+
+
+async def touch_jobs(redis_client, jobs: List[Dict[str, Any]]) -> None:
+    """``touch_job`` for many jobs, pipelined into one round trip."""
+    await _TOUCH_JOB.call_many(redis_client, [_touch_job_call(job_meta) for job_meta in jobs])
+
+
+# KEYS: job hash, jobs:stats, jobs:stats:durations, jobs:stream, jobs:index, jobs:index:updated,
+#       index of the job's state, then every other state index
+# ARGV: job id, score, ttl, channel, state, timestamp, stream max length, then changed
+#       field/value pairs
+# Legacy string records are converted to a hash first. Returns the merged job as a flat
+# field/value list.
+_SET_STATUS = _LuaScript(_JOB_EVENTS_LUA + """
+local key_type = redis.call('TYPE', KEYS[JOB])
+key_type = key_type.ok or key_type
+local created = key_type ~= 'hash'
+if key_type == 'string' then
+  local ok, legacy = pcall(cjson.decode, redis.call('GET', KEYS[JOB]))
+  redis.call('DEL', KEYS[JOB])
+  if ok and type(legacy) == 'table' then
+    for field, value in pairs(legacy) do
+      if type(value) == 'table' then
+        redis.call('HSET', KEYS[JOB], field, cjson.encode(value))
+      elseif value ~= cjson.null then
+        redis.call('HSET', KEYS[JOB], field, tostring(value))
+      end
+    end
+  end
+end
+
+-- Converted legacy records were never counted, so they do not leave a state in the stats
+local previous_state = not created and redis.call('HGET', KEYS[JOB], 'state')
+local previous_type = redis.call('HGET', KEYS[JOB], 'type')
+local changed = write_changes(KEYS[JOB], {'id', ARGV[1], 'state', ARGV[5], 'updated_at', ARGV[6], unpack(ARGV, 8)}, {})
+record_transition(previous_state, previous_type, ARGV[5], ARGV[2])
+local transition_field
+if ARGV[5] == 'RUNNING' then
+  transition_field = 'started_at'
+elseif ARGV[5] == 'SUCCEEDED' or ARGV[5] == 'FAILED' then
+  transition_field = 'finished_at'
+end
+if transition_field and redis.call('HSETNX', KEYS[JOB], transition_field, ARGV[6]) == 1 then
+  changed[#changed + 1] = transition_field
+  changed[#changed + 1] = ARGV[6]
+end
+
+move_indexes(ARGV[1], ARGV[2], #KEYS)
+redis.call('EXPIRE', KEYS[JOB], ARGV[3])
+publish_update(KEYS[JOB], ARGV[1], ARGV[4], ARGV[5], created, changed, ARGV[7])
+return redis.call('HGETALL', KEYS[JOB])
+""")
 
-    if additional_data:
-        job_meta.update(additional_data)
 
-    if state == "RUNNING" and "started_at" not in job_meta:
-        job_meta["started_at"] = datetime.utcnow().isoformat()
-    elif state in {"SUCCEEDED", "FAILED"} and "finished_at" not in job_meta:
-        job_meta["finished_at"] = datetime.utcnow().isoformat()
+async def set_status(redis_client, job_id: str, state: str, additional_data: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Merge ``additional_data`` into the job server-side, update its state and publish the result.
 
-    await touch_job(redis_client, job_meta)
-    return job_meta
+    Only the given fields are written, so concurrent updates to different fields do not clobber
+    each other; ``started_at``/``finished_at`` are set on the first matching transition only.
+    """
+    job_key = f"{settings.JOB_STATUS_PREFIX}{job_id}"
+    fields = _encode_fields({
+        key: value for key, value in (additional_data or {}).items()
+        if key not in {"id", "state", "updated_at"}
+    })
+
+    flat = await _SET_STATUS(
+        redis_client,
+        _job_keys(job_key, state),
+        [
+            job_id, time.time(), settings.JOB_TTL, "channel:jobs", state, datetime.utcnow().isoformat(),
+            settings.JOB_EVENT_STREAM_MAXLEN, *fields,
+        ],
+    )
+    return _decode_job_hash(dict(zip(flat[::2], flat[1::2])))
+
+
+class ProgressWriter:
+    """Coalesce a job's progress updates to at most ``max_writes_per_second`` set_status calls.
+
+    Updates arriving inside the window are merged and written once the window has passed,
+    either by the next update or by a trailing flush. State transitions and terminal states
+    are always written immediately, together with any pending fields. When the job reaches a
+    terminal state the writer adds its written/suppressed counts to ``jobs:stats``, where
+    ``job_stats`` reports them as ``progress_writes``.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        job_id: str,
+        *,
+        max_writes_per_second: float | None = None,
+        clock=time.monotonic,
+    ):
+        rate = settings.JOB_PROGRESS_MAX_WRITES_PER_SECOND if max_writes_per_second is None else max_writes_per_second
+        self.redis_client = redis_client
+        self.job_id = job_id
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.clock = clock
+        self.written = 0
+        self.suppressed = 0
+        self._reported = (0, 0)
+        self._state: str | None = None
+        self._pending: Dict[str, Any] = {}
+        self._last_write = float("-inf")
+        self._trailing: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def update(self, state: str, fields: Dict[str, Any] | None = None) -> bool:
+        """Record an update; returns True if it was written now, False if coalesced."""
+        if fields:
+            self._pending.update(fields)
+        urgent = state != self._state or state in _TERMINAL_STATES
+        if urgent or self.clock() - self._last_write >= self.interval:
+            await self._write(state)
+            return True
+
+        self.suppressed += 1
+        if self._trailing is None:
+            delay = self.interval - (self.clock() - self._last_write)
+            self._trailing = asyncio.ensure_future(self._flush_later(delay))
+        return False
+
+    async def flush(self) -> bool:
+        """Write any coalesced fields now."""
+        async with self._lock:
+            if not self._pending or self._state is None:
+                return False
+            await self._write_locked(self._state)
+            return True
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(max(delay, 0.0))
+        self._trailing = None
+        try:
+            await self.flush()
+        except Exception as exc:  # best effort: the fields stay pending for the next update
+            print(f"⚠️ Progress flush for job {self.job_id} failed: {exc}")
+
+    async def _write(self, state: str) -> None:
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+        async with self._lock:
+            await self._write_locked(state)
+
+    async def _write_locked(self, state: str) -> None:
+        fields, self._pending = self._pending, {}
+        try:
+            await set_status(self.redis_client, self.job_id, state, fields)
+        except BaseException:
+            self._pending = {**fields, **self._pending}
+            raise
+        self._state = state
+        self._last_write = self.clock()
+        self.written += 1
+        if state in _TERMINAL_STATES:
+            await self._report_counts()
+
+    async def _report_counts(self) -> None:
+        written, suppressed = self.written - self._reported[0], self.suppressed - self._reported[1]
+        self._reported = (self.written, self.suppressed)
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(JOB_STATS_KEY, "progress:written", written)
+                pipe.hincrby(JOB_STATS_KEY, "progress:suppressed", suppressed)
+                await pipe.execute()
+        except Exception as exc:  # best effort: the job's status is already written
+            print(f"⚠️ Recording progress write counts for job {self.job_id} failed: {exc}")
 
 
 __all__ = [
+    "JOB_FACET_PREFIX",
+    "JOB_FACET_REGISTRY",
+    "JOB_DURATION_BUCKETS",
+    "JOB_SUMMARY_FIELDS",
+    "JOB_UPDATED_INDEX",
+    "JOB_EVENT_STREAM",
+    "ProgressWriter",
+    "decode_job_cursor",
+    "encode_job_cursor",
     "fetch_job_metadata",
+    "fetch_job_summaries",
+    "forget_jobs",
+    "job_stats",
+    "job_facet_index_keys",
+    "parse_event_id",
     "publish_job_update",
+    "query_job_ids",
+    "read_job_events",
+    "reap_job_indexes",
     "set_status",
     "touch_job",
+    "touch_jobs",
+    "with_event_id",
 ]
@@ -0,0 +1,131 @@
+"""Background pre-warming of catalog versions into the worker's local extraction cache.
+
+Workers subscribe to ``version_available`` events (published by import, git sync and bundle
+sync) and extract, optionally byte-compiling, each new version before its first execution.
+At boot they also warm the most-executed versions so first-run latency matches steady state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import compileall
+import json
+import threading
+from typing import Any, Dict, List
+
+import redis.asyncio as redis
+from celery.signals import worker_ready
+
+from api.catalog.events import CATALOG_CHANNEL, most_executed_versions
+from api.catalog.registry import get_local_catalog_item_path
+from api.catalog.settings import catalog_settings
+from api.settings import settings
+
+RETRY_DELAY_SECONDS = 5.0
+
+
+def prewarm_version(item_id: str, version: str, *, compile_sources: bool | None = None) -> str:
+    """Extract item@version into the local cache (no-op if present) and byte-compile it."""
+    path = get_local_catalog_item_path(item_id, version)
+    if catalog_settings.CATALOG_PREWARM_COMPILE if compile_sources is None else compile_sources:
+        compileall.compile_dir(path, quiet=1)
+    return path
+
+
+async def _prewarm(item_id: str, version: str) -> bool:
+    try:
+        await asyncio.to_thread(prewarm_version, item_id, version)
+        return True
+    except Exception as e:
+        print(f"⚠️ Pre-warm of {item_id}@{version} failed: {e}")
+        return False
+
+
+async def prewarm_most_executed(redis_client, limit: int | None = None) -> List[str]:
+    """Warm the ``limit`` most-executed versions; returns the item@version refs warmed."""
+    limit = catalog_settings.CATALOG_PREWARM_TOP_N if limit is None else limit
+    warmed = []
+    for item_id, version in await most_executed_versions(redis_client, limit):
+        if await _prewarm(item_id, version):
+            warmed.append(f"{item_id}@{version}")
+    return warmed
+
+
+async def run_prewarmer(redis_client, *, ready: asyncio.Event | None = None) -> None:
+    """Warm the top versions, then pre-warm every announced version until cancelled."""
+    pubsub = redis_client.pubsub()
+    # Subscribe before the boot pass so versions announced meanwhile are not missed
+    await pubsub.subscribe(CATALOG_CHANNEL)
+    try:
+        await prewarm_most_executed(redis_client)
+        if ready is not None:
+            ready.set()
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                event: Dict[str, Any] = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            if event.get("type") == "version_available" and event.get("item_id") and event.get("version"):
+                await _prewarm(event["item_id"], event["version"])
+    finally:
+        await pubsub.unsubscribe(CATALOG_CHANNEL)
+        await pubsub.aclose()
+
+
+async def _run_prewarmer_forever(redis_client) -> None:
+    while True:
+        try:
+            await run_prewarmer(redis_client)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Catalog pre-warmer stopped ({e}); retrying in {RETRY_DELAY_SECONDS}s")
+        await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+
+async def start_prewarmer(ctx: Dict[str, Any]) -> None:
+    """ARQ ``on_startup`` hook: run the pre-warmer as a background task on the worker loop."""
+    if catalog_settings.CATALOG_PREWARM_ENABLED:
+        ctx["prewarm_task"] = asyncio.create_task(_run_prewarmer_forever(ctx["redis"]))
+
+
+async def stop_prewarmer(ctx: Dict[str, Any]) -> None:
+    """ARQ ``on_shutdown`` hook."""
+    task = ctx.pop("prewarm_task", None)
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _celery_prewarm_main() -> None:
+    async def main() -> None:
+        client = redis.from_url(settings.REDIS_URL)
+        try:
+            await _run_prewarmer_forever(client)
+        finally:
+            await client.aclose()
+
+    asyncio.run(main())
+
+
+@worker_ready.connect
+def start_celery_prewarmer(sender=None, **kwargs) -> None:
+    """Celery ``worker_ready`` hook. Runs once per node in the main process; prefork
+    children share the extracted cache on disk."""
+    if catalog_settings.CATALOG_PREWARM_ENABLED:
+        threading.Thread(target=_celery_prewarm_main, name="catalog-prewarm", daemon=True).start()
+
+
+__all__ = [
+    "prewarm_most_executed",
+    "prewarm_version",
+    "run_prewarmer",
+    "start_celery_prewarmer",
+    "start_prewarmer",
+    "stop_prewarmer",
+]
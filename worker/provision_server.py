@@ -4,7 +4,7 @@ import asyncio
 from datetime import datetime
 from typing import Any, Awaitable, Callable, Dict
 
-from .job_status import touch_job
+from .job_status import ProgressWriter, touch_job
 
 
 async def run_provision_server_task(
@@ -32,17 +32,10 @@ async def run_provision_server_task(
         "error": None,
     }
     await touch_job(redis_client, job_meta)
+    progress_writer = ProgressWriter(redis_client, job_id)
 
     try:
-        job_meta.update(
-            {
-                "state": "RUNNING",
-                "started_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-                "current_step": "Starting provisioning",
-            }
-        )
-        await touch_job(redis_client, job_meta)
+        await progress_writer.update("RUNNING", {"current_step": "Starting provisioning"})
 
         steps = [
             ("Validating configuration", 10),
@@ -57,14 +50,7 @@ async def run_provision_server_task(
 
         for step_name, progress in steps:
             await sleep(2 + (progress % 3))
-            job_meta.update(
-                {
-                    "progress": progress,
-                    "updated_at": datetime.utcnow().isoformat(),
-                    "current_step": step_name,
-                }
-            )
-            await touch_job(redis_client, job_meta)
+            await progress_writer.update("RUNNING", {"progress": progress, "current_step": step_name})
 
         server_config = payload.get("server_config", {})
         result = {
@@ -78,17 +64,10 @@ async def run_provision_server_task(
             "provisioned_at": datetime.utcnow().isoformat(),
         }
 
-        job_meta.update(
-            {
-                "state": "SUCCEEDED",
-                "progress": 100,
-                "finished_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-                "result": result,
-                "current_step": "Completed",
-            }
+        await progress_writer.update(
+            "SUCCEEDED",
+            {"progress": 100, "result": result, "current_step": "Completed"},
         )
-        await touch_job(redis_client, job_meta)
 
     except Exception as exc:  # pragma: no cover - defensive guard
         error_info = {
@@ -97,16 +76,7 @@ async def run_provision_server_task(
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        job_meta.update(
-            {
-                "state": "FAILED",
-                "finished_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-                "error": error_info,
-                "current_step": "Failed",
-            }
-        )
-        await touch_job(redis_client, job_meta)
+        await progress_writer.update("FAILED", {"error": error_info, "current_step": "Failed"})
         raise
 
 
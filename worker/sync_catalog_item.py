@@ -1,16 +1,17 @@
-import io
 import json
 import os
 import subprocess
-import tarfile
 import tempfile
 from datetime import datetime
 from typing import Any, Callable, Dict
 
 import yaml
 
+from api.catalog.bundles import pack_dir, store_bundle
 from api.catalog.descriptor_utils import atomic_write
+from api.catalog.events import publish_version_available
 from api.catalog.registry import upsert_version
+from api.catalog.storage import get_blob_storage
 from worker.job_status import touch_job
 
 BUNDLES_DIR = "/app/data/bundles"
@@ -22,14 +23,6 @@ def parse_tag(tag: str):
         raise ValueError("tag must be in format <item>@<semver>")
     return tag.split("@", 1)
 
-def pack_dir(path: str) -> bytes:
-    """Pack directory into tar.gz bytes"""
-    bio = io.BytesIO()
-    with tarfile.open(fileobj=bio, mode="w:gz") as tar:
-        tar.add(path, arcname=".")
-    bio.seek(0)
-    return bio.read()
-
 def load_descriptor_from_dir(path: str):
     """Load manifest, schema, ui, and any mapped schemas from directory"""
     manifest_path = os.path.join(path, "manifest.yaml")
@@ -212,9 +205,8 @@ async def run_sync_catalog_item_from_git(
 
             bundle_bytes = pack_dir(item_dir)
 
-            os.makedirs(BUNDLES_DIR, exist_ok=True)
-            bundle_path = os.path.join(BUNDLES_DIR, f"{item_id}@{version}.tar.gz")
-            atomic_write_func(bundle_path, bundle_bytes)
+            storage = get_blob_storage("bundles", BUNDLES_DIR, write_func=atomic_write_func)
+            bundle_path = store_bundle(storage, f"{item_id}@{version}.tar.gz", bundle_bytes)
 
             job_meta.update({
                 "progress": 90,
@@ -239,6 +231,9 @@ async def run_sync_catalog_item_from_git(
                 },
                 additional_schemas=additional_schemas,
             )
+            await publish_version_available(
+                redis_client, item_id, version, storage_uri=bundle_path, source="git-sync"
+            )
 
             result = {
                 "item_id": item_id,
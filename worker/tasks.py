@@ -4,10 +4,12 @@ from typing import Any, Dict
 
 from arq import ArqRedis
 
+from .catalog_bundle_sync import run_sync_catalog_bundles_job
 from .catalog_import import run_import_catalog_item_job
 from .catalog_registry import run_sync_catalog_registry_job
+from .catalog_storage_gc import run_catalog_storage_gc_job
 from .example_long import run_example_long_task as execute_example_long_task
-from .job_status import set_status as update_job_status
+from .job_status import reap_job_indexes, set_status as update_job_status
 from .provision_server import run_provision_server_task
 
 
@@ -54,3 +56,23 @@ async def sync_catalog_registry_task(ctx, job_id: str, payload: dict):
 
     redis_client = ctx["redis"]
     await run_sync_catalog_registry_job(redis_client, job_id, payload)
+
+
+async def sync_catalog_bundles_task(ctx, job_id: str, payload: dict):
+    """ARQ wrapper that delegates to the shared bundle sync implementation."""
+
+    redis_client = ctx["redis"]
+    await run_sync_catalog_bundles_job(redis_client, job_id, payload)
+
+
+async def catalog_storage_gc_task(ctx, job_id: str, payload: dict):
+    """ARQ wrapper that delegates to the shared storage GC implementation."""
+
+    redis_client = ctx["redis"]
+    await run_catalog_storage_gc_job(redis_client, job_id, payload)
+
+
+async def reap_job_indexes_task(ctx):
+    """ARQ cron job trimming expired job ids from the jobs:index sorted sets."""
+
+    return await reap_job_indexes(ctx["redis"])
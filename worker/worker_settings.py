@@ -1,13 +1,27 @@
+from arq import cron
 from arq.connections import RedisSettings
 from api.settings import settings
-from .tasks import example_long_task, provision_server_task, import_catalog_item_task, sync_catalog_registry_task
+from .tasks import example_long_task, provision_server_task, import_catalog_item_task, sync_catalog_registry_task, sync_catalog_bundles_task, catalog_storage_gc_task, reap_job_indexes_task
 from .catalog_sync import sync_catalog_item
 from .catalog_execute import run_catalog_item
 from .sync_catalog_item import sync_catalog_item_from_git
+from .prewarm import start_prewarmer, stop_prewarmer
+
+
+def _cron_every(seconds: int) -> dict:
+    """cron() fields that fire every ``seconds``, on the clock (rounded to whole minutes/hours)."""
+    if seconds < 60:
+        return {"second": set(range(0, 60, seconds))}
+    if seconds < 3600:
+        return {"minute": set(range(0, 60, seconds // 60)), "second": 0}
+    return {"hour": set(range(0, 24, min(seconds // 3600, 24))), "minute": 0, "second": 0}
 
 
 class WorkerSettings:
-    functions = [example_long_task, provision_server_task, import_catalog_item_task, sync_catalog_item, run_catalog_item, sync_catalog_registry_task, sync_catalog_item_from_git]
+    functions = [example_long_task, provision_server_task, import_catalog_item_task, sync_catalog_item, run_catalog_item, sync_catalog_registry_task, sync_catalog_bundles_task, catalog_storage_gc_task, sync_catalog_item_from_git]
+    cron_jobs = [cron(reap_job_indexes_task, **_cron_every(settings.JOB_INDEX_REAP_INTERVAL_SECONDS))] if settings.JOB_INDEX_REAP_INTERVAL_SECONDS > 0 else []
     redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
+    on_startup = start_prewarmer
+    on_shutdown = stop_prewarmer
     keep_result = 0  # Don't store results in ARQ (we handle this manually)
     # max_jobs = 10  # Uncomment to limit concurrent jobs